@@ -0,0 +1,30 @@
+"""add planning bucket to material requirements
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+planning_bucket_enum = sa.Enum('NONE', 'DAY', 'WEEK', name='planningbucket')
+
+
+def upgrade():
+    planning_bucket_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column('materialrequirement',
+                  sa.Column('planning_bucket', planning_bucket_enum, nullable=False, server_default='NONE'))
+
+
+def downgrade():
+    op.drop_column('materialrequirement', 'planning_bucket')
+    planning_bucket_enum.drop(op.get_bind(), checkfirst=True)
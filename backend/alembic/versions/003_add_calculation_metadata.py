@@ -0,0 +1,24 @@
+"""add calculation metadata to material requirements
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('materialrequirement', sa.Column('calculation_metadata', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('materialrequirement', 'calculation_metadata')
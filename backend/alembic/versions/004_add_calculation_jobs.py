@@ -0,0 +1,51 @@
+"""add calculation jobs and queued/calculating requirement states
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Nowe wartości typu wyliczeniowego muszą zostać zatwierdzone przed użyciem
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE materialrequirementstatus ADD VALUE IF NOT EXISTS 'QUEUED'")
+            op.execute("ALTER TYPE materialrequirementstatus ADD VALUE IF NOT EXISTS 'CALCULATING'")
+
+    op.create_table('calculationjob',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('material_requirement_id', sa.Integer(), nullable=False),
+                    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='calculationjobstatus'), nullable=False),
+                    sa.Column('progress', sa.Float(), nullable=False),
+                    sa.Column('explosion_mode', sa.String(), nullable=True),
+                    sa.Column('error', sa.Text(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=True),
+                    sa.Column('started_at', sa.DateTime(), nullable=True),
+                    sa.Column('finished_at', sa.DateTime(), nullable=True),
+                    sa.ForeignKeyConstraint(['material_requirement_id'], ['materialrequirement.id'], ),
+                    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_calculationjob_id'), 'calculationjob', ['id'], unique=False)
+    op.create_index(op.f('ix_calculationjob_material_requirement_id'), 'calculationjob', ['material_requirement_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_calculationjob_material_requirement_id'), table_name='calculationjob')
+    op.drop_index(op.f('ix_calculationjob_id'), table_name='calculationjob')
+    op.drop_table('calculationjob')
+    sa.Enum(name='calculationjobstatus').drop(op.get_bind(), checkfirst=True)
+    # Wartości QUEUED/CALCULATING typu materialrequirementstatus pozostają (PostgreSQL nie pozwala ich usunąć)
@@ -0,0 +1,40 @@
+"""add planning change log for net-change MRP
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('planningchange',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('entity_type', sa.String(), nullable=False),
+                    sa.Column('entity_id', sa.Integer(), nullable=False),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_planningchange_id'), 'planningchange', ['id'], unique=False)
+    op.create_index('ix_planningchange_created_at', 'planningchange', ['created_at'], unique=False)
+
+    op.add_column('calculationjob',
+                  sa.Column('net_change', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('calculationjob', 'net_change')
+    op.drop_index('ix_planningchange_created_at', table_name='planningchange')
+    op.drop_index(op.f('ix_planningchange_id'), table_name='planningchange')
+    op.drop_table('planningchange')
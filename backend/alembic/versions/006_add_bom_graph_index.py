@@ -0,0 +1,38 @@
+"""add BOM graph index
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indeks jest wypełniany przy starcie aplikacji (init_db) i aktualizowany przy zapisie list BOM
+    op.create_table('bomgraphnode',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('low_level_code', sa.Integer(), nullable=False),
+                    sa.Column('depth', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_bomgraphnode_id'), 'bomgraphnode', ['id'], unique=False)
+    op.create_index(op.f('ix_bomgraphnode_product_id'), 'bomgraphnode', ['product_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_bomgraphnode_product_id'), table_name='bomgraphnode')
+    op.drop_index(op.f('ix_bomgraphnode_id'), table_name='bomgraphnode')
+    op.drop_table('bomgraphnode')
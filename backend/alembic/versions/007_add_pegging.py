@@ -0,0 +1,60 @@
+"""add material requirement pegging
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('materialrequirementpegging',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('material_requirement_id', sa.Integer(), nullable=False),
+                    sa.Column('material_requirement_item_id', sa.Integer(), nullable=True),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('order_id', sa.Integer(), nullable=False),
+                    sa.Column('order_item_id', sa.Integer(), nullable=True),
+                    sa.Column('end_product_id', sa.Integer(), nullable=False),
+                    sa.Column('bom_path', sa.String(), nullable=False, server_default=''),
+                    sa.Column('quantity', sa.Float(), nullable=False),
+                    sa.Column('required_date', sa.DateTime(), nullable=True),
+                    sa.ForeignKeyConstraint(['material_requirement_id'], ['materialrequirement.id'], ),
+                    sa.ForeignKeyConstraint(['material_requirement_item_id'], ['materialrequirementitem.id'],
+                                            ondelete='SET NULL'),
+                    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+                    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['order_item_id'], ['orderitem.id'], ondelete='SET NULL'),
+                    sa.ForeignKeyConstraint(['end_product_id'], ['product.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_materialrequirementpegging_id'), 'materialrequirementpegging', ['id'], unique=False)
+    op.create_index(op.f('ix_materialrequirementpegging_material_requirement_item_id'), 'materialrequirementpegging',
+                    ['material_requirement_item_id'], unique=False)
+    op.create_index(op.f('ix_materialrequirementpegging_order_id'), 'materialrequirementpegging',
+                    ['order_id'], unique=False)
+    op.create_index(op.f('ix_materialrequirementpegging_order_item_id'), 'materialrequirementpegging',
+                    ['order_item_id'], unique=False)
+    op.create_index('ix_materialrequirementpegging_requirement_product', 'materialrequirementpegging',
+                    ['material_requirement_id', 'product_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_materialrequirementpegging_requirement_product', table_name='materialrequirementpegging')
+    op.drop_index(op.f('ix_materialrequirementpegging_order_item_id'), table_name='materialrequirementpegging')
+    op.drop_index(op.f('ix_materialrequirementpegging_order_id'), table_name='materialrequirementpegging')
+    op.drop_index(op.f('ix_materialrequirementpegging_material_requirement_item_id'),
+                  table_name='materialrequirementpegging')
+    op.drop_index(op.f('ix_materialrequirementpegging_id'), table_name='materialrequirementpegging')
+    op.drop_table('materialrequirementpegging')
@@ -0,0 +1,42 @@
+"""add indexes for MRP hot paths
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Aktywna lista BOM produktu
+    op.create_index('ix_bom_product_id_is_active', 'bom', ['product_id', 'is_active'], unique=False)
+    # Elementy listy BOM (indeks pokrywający dla eksplozji) i wyszukiwanie zastosowań komponentu
+    op.create_index('ix_bomitem_bom_id_covering', 'bomitem',
+                    ['bom_id', 'component_id', 'quantity', 'is_optional'], unique=False)
+    op.create_index(op.f('ix_bomitem_component_id'), 'bomitem', ['component_id'], unique=False)
+    # Pozycje zamówień
+    op.create_index(op.f('ix_orderitem_order_id'), 'orderitem', ['order_id'], unique=False)
+    op.create_index(op.f('ix_orderitem_product_id'), 'orderitem', ['product_id'], unique=False)
+    # Pozycje i zamówienia źródłowe zapotrzebowania
+    op.create_index('ix_materialrequirementitem_requirement_product', 'materialrequirementitem',
+                    ['material_requirement_id', 'product_id'], unique=False)
+    op.create_index('ix_materialrequirementorder_requirement_order', 'materialrequirementorder',
+                    ['material_requirement_id', 'order_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_materialrequirementorder_requirement_order', table_name='materialrequirementorder')
+    op.drop_index('ix_materialrequirementitem_requirement_product', table_name='materialrequirementitem')
+    op.drop_index(op.f('ix_orderitem_product_id'), table_name='orderitem')
+    op.drop_index(op.f('ix_orderitem_order_id'), table_name='orderitem')
+    op.drop_index(op.f('ix_bomitem_component_id'), table_name='bomitem')
+    op.drop_index('ix_bomitem_bom_id_covering', table_name='bomitem')
+    op.drop_index('ix_bom_product_id_is_active', table_name='bom')
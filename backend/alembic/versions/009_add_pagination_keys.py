@@ -0,0 +1,44 @@
+"""add keyset pagination indexes
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Klucze stronicowania nie mogą zawierać NULL - uzupełnij brakujące daty datą utworzenia rekordu
+    op.execute('UPDATE "order" SET order_date = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE order_date IS NULL')
+    op.execute(
+        'UPDATE materialrequirement SET creation_date = COALESCE(created_at, CURRENT_TIMESTAMP) '
+        'WHERE creation_date IS NULL'
+    )
+
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.alter_column('order_date', existing_type=sa.DateTime(), nullable=False)
+    with op.batch_alter_table('materialrequirement') as batch_op:
+        batch_op.alter_column('creation_date', existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index('ix_order_order_date_id', 'order', ['order_date', 'id'], unique=False)
+    op.create_index('ix_materialrequirement_creation_date_id', 'materialrequirement',
+                    ['creation_date', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_materialrequirement_creation_date_id', table_name='materialrequirement')
+    op.drop_index('ix_order_order_date_id', table_name='order')
+
+    with op.batch_alter_table('materialrequirement') as batch_op:
+        batch_op.alter_column('creation_date', existing_type=sa.DateTime(), nullable=True)
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.alter_column('order_date', existing_type=sa.DateTime(), nullable=True)
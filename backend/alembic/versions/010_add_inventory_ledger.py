@@ -0,0 +1,82 @@
+"""add inventory transaction ledger and balances
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inventorytransaction',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('transaction_type', sa.Enum('RECEIPT', 'ISSUE', 'ADJUSTMENT',
+                                                          name='inventorytransactiontype'), nullable=False),
+                    sa.Column('quantity', sa.Float(), nullable=False),
+                    sa.Column('order_id', sa.Integer(), nullable=True),
+                    sa.Column('reference', sa.String(), nullable=True),
+                    sa.Column('notes', sa.Text(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=True),
+                    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+                    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ondelete='SET NULL'),
+                    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_inventorytransaction_id'), 'inventorytransaction', ['id'], unique=False)
+    op.create_index(op.f('ix_inventorytransaction_order_id'), 'inventorytransaction', ['order_id'], unique=False)
+    op.create_index('ix_inventorytransaction_product_id_id', 'inventorytransaction',
+                    ['product_id', 'id'], unique=False)
+
+    op.create_table('inventorybalance',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('on_hand', sa.Float(), nullable=False),
+                    sa.Column('last_transaction_id', sa.Integer(), nullable=True),
+                    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_inventorybalance_id'), 'inventorybalance', ['id'], unique=False)
+    op.create_index(op.f('ix_inventorybalance_product_id'), 'inventorybalance', ['product_id'], unique=True)
+
+    op.create_index('ix_order_order_type_status', 'order', ['order_type', 'status'], unique=False)
+
+    # Stan zapisany w produktach trafia do dziennika jako korekta otwierająca saldo
+    op.execute(
+        "INSERT INTO inventorytransaction (created_at, updated_at, product_id, transaction_type, quantity, "
+        "reference, notes) "
+        "SELECT CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, id, 'ADJUSTMENT', quantity_in_stock, 'BO', 'Stan początkowy' "
+        "FROM product WHERE quantity_in_stock IS NOT NULL AND quantity_in_stock <> 0"
+    )
+    op.execute(
+        "INSERT INTO inventorybalance (created_at, updated_at, product_id, on_hand, last_transaction_id) "
+        "SELECT CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, product.id, COALESCE(product.quantity_in_stock, 0), "
+        "(SELECT MAX(inventorytransaction.id) FROM inventorytransaction "
+        "WHERE inventorytransaction.product_id = product.id) "
+        "FROM product"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_order_order_type_status', table_name='order')
+    op.drop_index(op.f('ix_inventorybalance_product_id'), table_name='inventorybalance')
+    op.drop_index(op.f('ix_inventorybalance_id'), table_name='inventorybalance')
+    op.drop_table('inventorybalance')
+    op.drop_index('ix_inventorytransaction_product_id_id', table_name='inventorytransaction')
+    op.drop_index(op.f('ix_inventorytransaction_order_id'), table_name='inventorytransaction')
+    op.drop_index(op.f('ix_inventorytransaction_id'), table_name='inventorytransaction')
+    op.drop_table('inventorytransaction')
+    sa.Enum(name='inventorytransactiontype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,163 @@
+"""add archive tables for closed orders and material requirements
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+# Typy wyliczeniowe tabel bieżących - tabele archiwum korzystają z istniejących typów
+order_type_enum = postgresql.ENUM('PRODUCTION', 'PURCHASE', name='ordertype', create_type=False)
+order_status_enum = postgresql.ENUM('DRAFT', 'SUBMITTED', 'CONFIRMED', 'IN_PRODUCTION', 'COMPLETED', 'CANCELLED',
+                                    name='orderstatus', create_type=False)
+material_requirement_status_enum = postgresql.ENUM('DRAFT', 'QUEUED', 'CALCULATING', 'CALCULATED', 'PROCESSING',
+                                                   'COMPLETED', 'CANCELLED', name='materialrequirementstatus',
+                                                   create_type=False)
+planning_bucket_enum = postgresql.ENUM('NONE', 'DAY', 'WEEK', name='planningbucket', create_type=False)
+
+
+def upgrade():
+    op.create_table('orderarchive',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('order_number', sa.String(), nullable=False),
+                    sa.Column('order_type', order_type_enum, nullable=False),
+                    sa.Column('status', order_status_enum, nullable=False),
+                    sa.Column('customer_name', sa.String(), nullable=True),
+                    sa.Column('customer_reference', sa.String(), nullable=True),
+                    sa.Column('order_date', sa.DateTime(), nullable=False),
+                    sa.Column('required_date', sa.DateTime(), nullable=True),
+                    sa.Column('estimated_completion_date', sa.DateTime(), nullable=True),
+                    sa.Column('actual_completion_date', sa.DateTime(), nullable=True),
+                    sa.Column('notes', sa.Text(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=True),
+                    sa.Column('archived_at', sa.DateTime(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_orderarchive_id'), 'orderarchive', ['id'], unique=False)
+    op.create_index(op.f('ix_orderarchive_order_number'), 'orderarchive', ['order_number'], unique=False)
+    op.create_index('ix_orderarchive_order_date_id', 'orderarchive', ['order_date', 'id'], unique=False)
+
+    op.create_table('orderitemarchive',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('order_id', sa.Integer(), nullable=False),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('quantity', sa.Float(), nullable=False),
+                    sa.Column('unit_price', sa.Float(), nullable=True),
+                    sa.Column('position', sa.Integer(), nullable=True),
+                    sa.Column('notes', sa.Text(), nullable=True),
+                    sa.ForeignKeyConstraint(['order_id'], ['orderarchive.id'], ),
+                    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_orderitemarchive_id'), 'orderitemarchive', ['id'], unique=False)
+    op.create_index(op.f('ix_orderitemarchive_order_id'), 'orderitemarchive', ['order_id'], unique=False)
+    op.create_index(op.f('ix_orderitemarchive_product_id'), 'orderitemarchive', ['product_id'], unique=False)
+
+    op.create_table('materialrequirementarchive',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('reference_number', sa.String(), nullable=False),
+                    sa.Column('status', material_requirement_status_enum, nullable=False),
+                    sa.Column('creation_date', sa.DateTime(), nullable=False),
+                    sa.Column('calculation_date', sa.DateTime(), nullable=True),
+                    sa.Column('notes', sa.Text(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=True),
+                    sa.Column('consider_stock', sa.Boolean(), nullable=True),
+                    sa.Column('consider_min_stock', sa.Boolean(), nullable=True),
+                    sa.Column('planning_start_date', sa.DateTime(), nullable=False),
+                    sa.Column('planning_end_date', sa.DateTime(), nullable=True),
+                    sa.Column('planning_bucket', planning_bucket_enum, nullable=False),
+                    sa.Column('calculation_metadata', sa.JSON(), nullable=True),
+                    sa.Column('archived_at', sa.DateTime(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_materialrequirementarchive_id'), 'materialrequirementarchive', ['id'], unique=False)
+    op.create_index(op.f('ix_materialrequirementarchive_reference_number'), 'materialrequirementarchive',
+                    ['reference_number'], unique=False)
+    op.create_index('ix_materialrequirementarchive_creation_date_id', 'materialrequirementarchive',
+                    ['creation_date', 'id'], unique=False)
+
+    op.create_table('materialrequirementorderarchive',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('material_requirement_id', sa.Integer(), nullable=False),
+                    sa.Column('order_id', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['material_requirement_id'], ['materialrequirementarchive.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_materialrequirementorderarchive_id'), 'materialrequirementorderarchive',
+                    ['id'], unique=False)
+    op.create_index(op.f('ix_materialrequirementorderarchive_material_requirement_id'),
+                    'materialrequirementorderarchive', ['material_requirement_id'], unique=False)
+
+    op.create_table('materialrequirementitemarchive',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('material_requirement_id', sa.Integer(), nullable=False),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('required_quantity', sa.Float(), nullable=False),
+                    sa.Column('available_quantity', sa.Float(), nullable=True),
+                    sa.Column('quantity_to_procure', sa.Float(), nullable=False),
+                    sa.Column('requirement_date', sa.DateTime(), nullable=True),
+                    sa.Column('planned_order_date', sa.DateTime(), nullable=True),
+                    sa.Column('is_available', sa.Boolean(), nullable=True),
+                    sa.Column('notes', sa.Text(), nullable=True),
+                    sa.ForeignKeyConstraint(['material_requirement_id'], ['materialrequirementarchive.id'], ),
+                    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_materialrequirementitemarchive_id'), 'materialrequirementitemarchive',
+                    ['id'], unique=False)
+    op.create_index(op.f('ix_materialrequirementitemarchive_material_requirement_id'),
+                    'materialrequirementitemarchive', ['material_requirement_id'], unique=False)
+
+    # Ruch magazynowy może wskazywać zamówienie przeniesione do archiwum
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('inventorytransaction_order_id_fkey', 'inventorytransaction', type_='foreignkey')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key('inventorytransaction_order_id_fkey', 'inventorytransaction', 'order',
+                              ['order_id'], ['id'], ondelete='SET NULL')
+
+    op.drop_index(op.f('ix_materialrequirementitemarchive_material_requirement_id'),
+                  table_name='materialrequirementitemarchive')
+    op.drop_index(op.f('ix_materialrequirementitemarchive_id'), table_name='materialrequirementitemarchive')
+    op.drop_table('materialrequirementitemarchive')
+    op.drop_index(op.f('ix_materialrequirementorderarchive_material_requirement_id'),
+                  table_name='materialrequirementorderarchive')
+    op.drop_index(op.f('ix_materialrequirementorderarchive_id'), table_name='materialrequirementorderarchive')
+    op.drop_table('materialrequirementorderarchive')
+    op.drop_index('ix_materialrequirementarchive_creation_date_id', table_name='materialrequirementarchive')
+    op.drop_index(op.f('ix_materialrequirementarchive_reference_number'), table_name='materialrequirementarchive')
+    op.drop_index(op.f('ix_materialrequirementarchive_id'), table_name='materialrequirementarchive')
+    op.drop_table('materialrequirementarchive')
+    op.drop_index(op.f('ix_orderitemarchive_product_id'), table_name='orderitemarchive')
+    op.drop_index(op.f('ix_orderitemarchive_order_id'), table_name='orderitemarchive')
+    op.drop_index(op.f('ix_orderitemarchive_id'), table_name='orderitemarchive')
+    op.drop_table('orderitemarchive')
+    op.drop_index('ix_orderarchive_order_date_id', table_name='orderarchive')
+    op.drop_index(op.f('ix_orderarchive_order_number'), table_name='orderarchive')
+    op.drop_index(op.f('ix_orderarchive_id'), table_name='orderarchive')
+    op.drop_table('orderarchive')
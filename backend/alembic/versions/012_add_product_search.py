@@ -0,0 +1,57 @@
+"""add trigram / full-text product search indexes
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_product_code_trgm ON product USING gin (code gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_product_name_trgm ON product USING gin (name gin_trgm_ops)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS productsearch USING fts5("
+            "code, name, content='product', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS product_search_insert AFTER INSERT ON product BEGIN "
+            "INSERT INTO productsearch(rowid, code, name) VALUES (new.id, new.code, new.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS product_search_delete AFTER DELETE ON product BEGIN "
+            "INSERT INTO productsearch(productsearch, rowid, code, name) "
+            "VALUES ('delete', old.id, old.code, old.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS product_search_update AFTER UPDATE OF code, name ON product BEGIN "
+            "INSERT INTO productsearch(productsearch, rowid, code, name) "
+            "VALUES ('delete', old.id, old.code, old.name); "
+            "INSERT INTO productsearch(rowid, code, name) VALUES (new.id, new.code, new.name); END"
+        )
+        # Zbudowanie indeksu dla istniejących produktów
+        op.execute("INSERT INTO productsearch(productsearch) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_product_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_product_code_trgm")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS product_search_update")
+        op.execute("DROP TRIGGER IF EXISTS product_search_delete")
+        op.execute("DROP TRIGGER IF EXISTS product_search_insert")
+        op.execute("DROP TABLE IF EXISTS productsearch")
@@ -0,0 +1,36 @@
+"""add calculation lock table (fallback for databases without advisory locks)
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calculationlock',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('lock_key', sa.String(), nullable=False),
+                    sa.Column('owner', sa.String(), nullable=False),
+                    sa.Column('expires_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_calculationlock_id'), 'calculationlock', ['id'], unique=False)
+    op.create_index(op.f('ix_calculationlock_lock_key'), 'calculationlock', ['lock_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_calculationlock_lock_key'), table_name='calculationlock')
+    op.drop_index(op.f('ix_calculationlock_id'), table_name='calculationlock')
+    op.drop_table('calculationlock')
@@ -0,0 +1,24 @@
+"""add case-insensitive product code index for prefix search
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_product_code_upper', 'product', [sa.text('upper(code)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_product_code_upper', table_name='product')
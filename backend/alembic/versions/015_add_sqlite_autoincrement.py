@@ -0,0 +1,49 @@
+"""use AUTOINCREMENT for archived tables in SQLite (archived ids must not be reused)
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-18 23:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+# Tabele bieżące i ich tabele archiwum - rekordy przenoszone do archiwum zachowują ID
+ARCHIVED_TABLES = {
+    'order': 'orderarchive',
+    'orderitem': 'orderitemarchive',
+    'materialrequirement': 'materialrequirementarchive',
+    'materialrequirementitem': 'materialrequirementitemarchive',
+    'materialrequirementorder': 'materialrequirementorderarchive',
+}
+
+
+def upgrade():
+    # PostgreSQL nadaje ID z sekwencji, które nigdy nie są używane ponownie
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, archive_table in ARCHIVED_TABLES.items():
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        # Kolejne ID mają być większe także od ID rekordów już przeniesionych do archiwum
+        op.execute(sa.text('DELETE FROM sqlite_sequence WHERE name = :table').bindparams(table=table))
+        op.execute(sa.text(
+            'INSERT INTO sqlite_sequence (name, seq) SELECT :table, max(coalesce(max_id, 0)) FROM ('
+            f'SELECT max(id) AS max_id FROM "{table}" UNION ALL SELECT max(id) FROM "{archive_table}")'
+        ).bindparams(table=table))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in ARCHIVED_TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
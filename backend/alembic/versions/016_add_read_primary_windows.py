@@ -0,0 +1,35 @@
+"""add server-side read-your-writes windows
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('readprimarywindow',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), nullable=True),
+                    sa.Column('window_key', sa.String(), nullable=False),
+                    sa.Column('read_primary_until', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_readprimarywindow_id'), 'readprimarywindow', ['id'], unique=False)
+    op.create_index(op.f('ix_readprimarywindow_window_key'), 'readprimarywindow', ['window_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_readprimarywindow_window_key'), table_name='readprimarywindow')
+    op.drop_index(op.f('ix_readprimarywindow_id'), table_name='readprimarywindow')
+    op.drop_table('readprimarywindow')
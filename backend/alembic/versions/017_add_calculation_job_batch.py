@@ -0,0 +1,26 @@
+"""add batch id to calculation jobs (batch calculations run as one job)
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('calculationjob', sa.Column('batch_id', sa.String(), nullable=True))
+    op.create_index(op.f('ix_calculationjob_batch_id'), 'calculationjob', ['batch_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_calculationjob_batch_id'), table_name='calculationjob')
+    op.drop_column('calculationjob', 'batch_id')
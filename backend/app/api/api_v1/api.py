@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import auth, users, products, boms, orders, setup, material_requirements
+from app.db.pool import async_pool_metrics, async_replica_pool_metrics, connection_budget, pool_status, replica_pool_metrics
+from app.db.session import async_engine, async_replica_engine, engine, replica_engine
+from app.api.api_v1.endpoints import auth, users, products, boms, orders, setup, material_requirements, inventory
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -9,6 +11,7 @@ api_router.include_router(products.router, prefix="/products", tags=["products"]
 api_router.include_router(boms.router, prefix="/boms", tags=["boms"])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(material_requirements.router, prefix="/material-requirements", tags=["material-requirements"])
+api_router.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
 api_router.include_router(setup.router, prefix="/setup", tags=["setup"])
 
 # Dodanie testowego endpointu do sprawdzenia, czy API działa
@@ -18,3 +21,22 @@ def health_check():
     Endpoint sprawdzający, czy API działa
     """
     return {"status": "ok", "message": "API działa poprawnie"}
+
+
+@api_router.get("/healthcheck/pool")
+def pool_health_check():
+    """
+    Stan puli połączeń z bazą danych (zajęte i wolne połączenia, nadmiar, oczekiwania)
+    do monitorowania. Pula silnika asynchronicznego jest raportowana w polu "async",
+    a pule repliki do odczytu (jeśli skonfigurowana) w polach "replica" i "async_replica".
+    Pole "connection_budget" zawiera maksymalną liczbę połączeń procesu według konfiguracji pul.
+    """
+    status = {
+        **pool_status(engine),
+        "async": pool_status(async_engine.sync_engine, async_pool_metrics),
+        "connection_budget": connection_budget(),
+    }
+    if replica_engine is not None:
+        status["replica"] = pool_status(replica_engine, replica_pool_metrics)
+        status["async_replica"] = pool_status(async_replica_engine.sync_engine, async_replica_pool_metrics)
+    return status
@@ -1,39 +1,74 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from app.api.deps import get_db, get_current_active_user
+from app.api.deps import get_async_read_db, get_db, get_read_db, get_current_active_user, get_current_active_user_async
+from app.api.pagination import paginate, set_next_cursor
+from app.core.bom_index import BOMCycleError, update_bom_index
+from app.core.explosion_cache import explosion_cache
+from app.core.net_change import record_planning_changes
 from app.models.user import User
 from app.models.bom import BOM, BOMItem
-from app.schemas.bom import BOM as BOMSchema, BOMCreate, BOMUpdate, BOMItem as BOMItemSchema
+from app.models.bom_graph_node import BOMGraphNode
+from app.schemas.bom import BOM as BOMSchema, BOMCreate, BOMUpdate, BOMItem as BOMItemSchema, BOMGraphNode as BOMGraphNodeSchema
 
 router = APIRouter()
 
+# Kolejność listy BOM (klucz stronicowania kursorem)
+BOM_SORT_KEYS = (BOM.id,)
+
 
 @router.get("/", response_model=List[BOMSchema])
-def read_boms(
-    db: Session = Depends(get_db),
+async def read_boms(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     is_active: bool = None,
     product_id: int = None,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Pobierz listę struktur materiałowych (BOM).
+    
+    Kursor następnej strony jest zwracany w nagłówku X-Next-Cursor.
     """
-    query = db.query(BOM)
+    # Elementy list BOM ładowane jednym dodatkowym zapytaniem (sesja asynchroniczna nie ładuje relacji leniwie)
+    query = select(BOM).options(selectinload(BOM.items))
     
     if is_active is not None:
-        query = query.filter(BOM.is_active == is_active)
+        query = query.where(BOM.is_active == is_active)
     if product_id:
-        query = query.filter(BOM.product_id == product_id)
+        query = query.where(BOM.product_id == product_id)
     
-    boms = query.offset(skip).limit(limit).all()
+    result = await db.execute(paginate(query, BOM_SORT_KEYS, cursor, skip, limit))
+    boms = result.scalars().all()
+    set_next_cursor(response, boms, BOM_SORT_KEYS, limit)
     return boms
 
 
+@router.get("/graph-index", response_model=List[BOMGraphNodeSchema])
+def read_bom_graph_index(
+    db: Session = Depends(get_read_db),
+    product_id: int = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Pobierz indeks grafu struktur materiałowych (kody niskiego poziomu i głębokość struktur)
+    w kolejności topologicznej - od produktów najwyższego poziomu.
+    """
+    query = db.query(BOMGraphNode)
+    
+    if product_id:
+        query = query.filter(BOMGraphNode.product_id == product_id)
+    
+    return query.order_by(BOMGraphNode.low_level_code, BOMGraphNode.product_id).all()
+
+
 @router.post("/", response_model=BOMSchema)
 def create_bom(
     *,
@@ -53,8 +88,7 @@ def create_bom(
         is_active=bom_in.is_active,
     )
     db.add(bom)
-    db.commit()
-    db.refresh(bom)
+    db.flush()
     
     # Dodaj elementy BOM, jeśli zostały podane
     if bom_in.items:
@@ -69,23 +103,30 @@ def create_bom(
                 is_optional=item_in.is_optional,
             )
             db.add(bom_item)
-        db.commit()
-        db.refresh(bom)
+    
+    record_planning_changes(
+        db, "bom", bom.id, [bom.product_id] + [item_in.component_id for item_in in bom_in.items]
+    )
+    _update_bom_index(db)
+    db.commit()
+    db.refresh(bom)
+    # Nowa lista BOM zmienia rozwinięcie produktu i zespołów, w których on występuje
+    explosion_cache.invalidate([bom.product_id])
     
     return bom
 
 
 @router.get("/{bom_id}", response_model=BOMSchema)
-def read_bom(
+async def read_bom(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     bom_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Pobierz informacje o konkretnej strukturze materiałowej (BOM).
     """
-    bom = db.query(BOM).filter(BOM.id == bom_id).first()
+    bom = await db.get(BOM, bom_id, options=[selectinload(BOM.items)])
     if not bom:
         raise HTTPException(
             status_code=404,
@@ -112,13 +153,23 @@ def update_bom(
             detail="Struktura materiałowa nie została znaleziona",
         )
     
+    # Produkty struktury przed zmianą - do dziennika zmian planistycznych
+    previous_product_id = bom.product_id
+    changed_product_ids = [bom.product_id] + [
+        component_id for (component_id,) in
+        db.query(BOMItem.component_id).filter(BOMItem.bom_id == bom_id)
+    ]
+    
     # Aktualizuj główne dane BOM
     update_data = bom_in.dict(exclude={"items"}, exclude_unset=True)
     for field in update_data:
         setattr(bom, field, update_data[field])
+    changed_product_ids.append(bom.product_id)
     
     # Jeśli podane są elementy, zaktualizuj je
     if bom_in.items is not None:
+        changed_product_ids += [item_in.component_id for item_in in bom_in.items]
+        
         # Usuń istniejące elementy
         db.query(BOMItem).filter(BOMItem.bom_id == bom_id).delete()
         
@@ -135,9 +186,12 @@ def update_bom(
             )
             db.add(bom_item)
     
+    record_planning_changes(db, "bom", bom.id, changed_product_ids)
     db.add(bom)
+    _update_bom_index(db)
     db.commit()
     db.refresh(bom)
+    explosion_cache.invalidate([previous_product_id, bom.product_id])
     return bom
 
 
@@ -158,6 +212,26 @@ def delete_bom(
             detail="Struktura materiałowa nie została znaleziona",
         )
     
+    product_id = bom.product_id
+    record_planning_changes(db, "bom", bom.id, [product_id] + [item.component_id for item in bom.items])
     db.delete(bom)
+    _update_bom_index(db)
     db.commit()
+    explosion_cache.invalidate([product_id])
     return bom
+
+
+def _update_bom_index(db: Session) -> None:
+    """
+    Aktualizuje indeks grafu BOM w bieżącej transakcji. Zmiana tworząca cykl
+    w strukturach jest wycofywana i kończy żądanie błędem.
+    """
+    db.flush()
+    try:
+        update_bom_index(db)
+    except BOMCycleError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
@@ -0,0 +1,165 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.deps import (
+    get_async_read_db, get_db, get_read_db, get_current_active_user, get_current_active_user_async
+)
+from app.api.pagination import paginate, set_next_cursor
+from app.core.inventory import InventoryError, load_scheduled_receipts, post_inventory_transactions, receive_order
+from app.models.inventory import InventoryBalance, InventoryTransaction, InventoryTransactionType
+from app.models.order import Order
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.inventory import (
+    InventoryBalance as InventoryBalanceSchema,
+    InventoryTransaction as InventoryTransactionSchema,
+    InventoryTransactionCreate,
+)
+
+router = APIRouter()
+
+# Kolejność dziennika ruchów (klucz stronicowania kursorem)
+INVENTORY_TRANSACTION_SORT_KEYS = (InventoryTransaction.id,)
+
+
+@router.get("/transactions", response_model=List[InventoryTransactionSchema])
+async def read_inventory_transactions(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    product_id: Optional[int] = None,
+    order_id: Optional[int] = None,
+    transaction_type: InventoryTransactionType = None,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Pobierz dziennik ruchów magazynowych w kolejności księgowania.
+
+    Kursor następnej strony jest zwracany w nagłówku X-Next-Cursor - przekazanie go
+    w parametrze cursor zastępuje skip.
+    """
+    query = select(InventoryTransaction)
+    if product_id is not None:
+        query = query.where(InventoryTransaction.product_id == product_id)
+    if order_id is not None:
+        query = query.where(InventoryTransaction.order_id == order_id)
+    if transaction_type:
+        query = query.where(InventoryTransaction.transaction_type == transaction_type)
+
+    result = await db.execute(paginate(query, INVENTORY_TRANSACTION_SORT_KEYS, cursor, skip, limit))
+    transactions = result.scalars().all()
+    set_next_cursor(response, transactions, INVENTORY_TRANSACTION_SORT_KEYS, limit)
+    return transactions
+
+
+@router.post("/transactions", response_model=List[InventoryTransactionSchema])
+def create_inventory_transactions(
+    *,
+    db: Session = Depends(get_db),
+    transactions_in: List[InventoryTransactionCreate],
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Zaksięguj ruchy magazynowe (np. pozycje jednego dokumentu magazynowego).
+
+    Wszystkie ruchy są księgowane w jednej transakcji - jeśli którykolwiek jest niepoprawny
+    lub wydanie przekracza stan magazynowy, żaden ruch nie zostaje zapisany.
+    """
+    if not transactions_in:
+        raise HTTPException(
+            status_code=400,
+            detail="Podaj co najmniej jeden ruch magazynowy.",
+        )
+
+    try:
+        transactions = post_inventory_transactions(
+            db, [transaction_in.dict() for transaction_in in transactions_in], current_user.id
+        )
+    except InventoryError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+    db.commit()
+    return transactions
+
+
+@router.get("/balances/{product_id}", response_model=InventoryBalanceSchema)
+def read_inventory_balance(
+    *,
+    db: Session = Depends(get_read_db),
+    product_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Pobierz saldo magazynowe produktu wraz z przyjęciami planowanymi (otwartymi zamówieniami
+    zakupu) i prognozowanym stanem po każdej dostawie.
+    """
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if not product:
+        raise HTTPException(
+            status_code=404,
+            detail="Produkt nie został znaleziony",
+        )
+
+    balance = db.query(InventoryBalance).filter(InventoryBalance.product_id == product_id).first()
+    # Produkt bez salda (sprzed dziennika ruchów) - stan początkowy produktu
+    on_hand = balance.on_hand if balance else product.opening_stock or 0.0
+
+    scheduled_receipts = []
+    projected_balance = on_hand
+    for receipt in load_scheduled_receipts(db, [product_id]).get(product_id, []):
+        projected_balance += receipt.quantity
+        scheduled_receipts.append({**receipt._asdict(), "projected_balance": projected_balance})
+
+    return {
+        "product_id": product_id,
+        "on_hand": on_hand,
+        "last_transaction_id": balance.last_transaction_id if balance else None,
+        "updated_at": balance.updated_at if balance else None,
+        "scheduled_receipts": scheduled_receipts,
+    }
+
+
+@router.post("/orders/{order_id}/receive", response_model=List[InventoryTransactionSchema])
+def receive_purchase_order(
+    *,
+    db: Session = Depends(get_db),
+    order_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Przyjmij na magazyn dostawę zamówienia zakupu - księguje przyjęcie wszystkich pozycji
+    i oznacza zamówienie jako ukończone.
+    """
+    order = db.query(Order).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(
+            status_code=404,
+            detail="Zamówienie nie zostało znalezione",
+        )
+
+    # Sprawdź uprawnienia
+    if not current_user.is_superuser and order.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403,
+            detail="Brak uprawnień do przyjęcia dostawy tego zamówienia",
+        )
+
+    try:
+        transactions = receive_order(db, order, current_user.id)
+    except InventoryError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+    db.commit()
+    return transactions
@@ -1,11 +1,22 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app import schemas
 from app.api import deps
-from app.core.mrp import calculate_mrp
-from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementStatus
+from app.api.export import streaming_export
+from app.api.pagination import paginate, paginate_with_archive, set_next_cursor
+from app.core.archive import reference_number_exists
+from app.core.calculation_lock import CalculationLockTimeout
+from app.core.jobs import enqueue_batch_calculation, enqueue_calculation
+from app.core.mrp import EXPLOSION_MODES
+from app.models.archive import (
+    MaterialRequirementArchive, MaterialRequirementItemArchive, MaterialRequirementOrderArchive, OrderArchive
+)
+from app.models.calculation_job import CalculationJob, CalculationJobStatus
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementPegging, MaterialRequirementStatus
 from app.models.order import Order, OrderStatus
 from app.models.product import Product
 from app.models.user import User
@@ -15,28 +26,54 @@ import uuid
 router = APIRouter()
 
 
+# Kolejność listy zapotrzebowań (klucz stronicowania kursorem)
+MATERIAL_REQUIREMENT_SORT_KEYS = (MaterialRequirement.creation_date, MaterialRequirement.id)
+
+# Relacje serializowane w odpowiedzi - sesja asynchroniczna nie ładuje ich leniwie
+MATERIAL_REQUIREMENT_LOAD_OPTIONS = (
+    selectinload(MaterialRequirement.items),
+    selectinload(MaterialRequirement.source_orders),
+)
+
+
 @router.get("/", response_model=List[schemas.MaterialRequirement])
-def read_material_requirements(
-    db: Session = Depends(deps.get_db),
+async def read_material_requirements(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: Optional[MaterialRequirementStatus] = None,
-    current_user: User = Depends(deps.get_current_active_user),
+    include_archived: bool = False,
+    current_user: User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Pobierz listę zapotrzebowań materiałowych.
+    
+    Lista jest posortowana po dacie utworzenia. Kursor następnej strony jest zwracany
+    w nagłówku X-Next-Cursor - przekazanie go w parametrze cursor zastępuje skip.
+    Z include_archived lista obejmuje również zapotrzebowania przeniesione do archiwum.
     """
-    if current_user.is_superuser:
-        query = db.query(MaterialRequirement)
-        if status:
-            query = query.filter(MaterialRequirement.status == status)
-        material_requirements = query.offset(skip).limit(limit).all()
-    else:
-        query = db.query(MaterialRequirement).filter(MaterialRequirement.user_id == current_user.id)
+    def material_requirements_query(model: Any) -> Any:
+        query = select(model).options(selectinload(model.items), selectinload(model.source_orders))
+        if not current_user.is_superuser:
+            query = query.where(model.user_id == current_user.id)
         if status:
-            query = query.filter(MaterialRequirement.status == status)
-        material_requirements = query.offset(skip).limit(limit).all()
+            query = query.where(model.status == status)
+        return query
     
+    if include_archived:
+        material_requirements = await paginate_with_archive(db, [
+            (material_requirements_query(MaterialRequirement), MATERIAL_REQUIREMENT_SORT_KEYS),
+            (material_requirements_query(MaterialRequirementArchive),
+             (MaterialRequirementArchive.creation_date, MaterialRequirementArchive.id)),
+        ], cursor, skip, limit)
+    else:
+        result = await db.execute(paginate(
+            material_requirements_query(MaterialRequirement), MATERIAL_REQUIREMENT_SORT_KEYS, cursor, skip, limit
+        ))
+        material_requirements = result.scalars().all()
+    set_next_cursor(response, material_requirements, MATERIAL_REQUIREMENT_SORT_KEYS, limit)
     return material_requirements
 
 
@@ -54,11 +91,8 @@ def create_material_requirement(
     if not material_requirement_in.reference_number:
         material_requirement_in.reference_number = f"MRP-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
     
-    # Sprawdź, czy nie istnieje już zapotrzebowanie o takim samym numerze
-    db_req = db.query(MaterialRequirement).filter(
-        MaterialRequirement.reference_number == material_requirement_in.reference_number
-    ).first()
-    if db_req:
+    # Sprawdź, czy nie istnieje już zapotrzebowanie o takim samym numerze (także w archiwum)
+    if reference_number_exists(db, material_requirement_in.reference_number):
         raise HTTPException(
             status_code=400,
             detail="Zapotrzebowanie materiałowe o takim numerze już istnieje."
@@ -73,16 +107,21 @@ def create_material_requirement(
         consider_min_stock=material_requirement_in.consider_min_stock,
         planning_start_date=material_requirement_in.planning_start_date,
         planning_end_date=material_requirement_in.planning_end_date,
+        planning_bucket=material_requirement_in.planning_bucket,
         user_id=current_user.id
     )
     db.add(db_requirement)
     db.flush()  # Zapisz, aby uzyskać ID
     
-    # Dodaj powiązania z zamówieniami
+    # Dodaj powiązania z zamówieniami (istnienie zamówień sprawdzane jednym zapytaniem)
+    existing_order_ids = {
+        order_id for (order_id,) in db.query(Order.id).filter(
+            Order.id.in_(material_requirement_in.source_orders)
+        )
+    }
     for order_id in material_requirement_in.source_orders:
         # Sprawdź, czy zamówienie istnieje
-        order = db.query(Order).get(order_id)
-        if not order:
+        if order_id not in existing_order_ids:
             db.rollback()
             raise HTTPException(
                 status_code=404,
@@ -102,19 +141,71 @@ def create_material_requirement(
     return db_requirement
 
 
+@router.get("/pegging", response_model=List[schemas.MaterialRequirementPegging])
+def read_pegging(
+    db: Session = Depends(deps.get_read_db),
+    material_requirement_id: Optional[int] = None,
+    item_id: Optional[int] = None,
+    order_id: Optional[int] = None,
+    order_item_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 1000,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Pobierz powiązania (pegging) zapotrzebowania z zamówieniami zapisane podczas obliczeń.
+    
+    Pozwala wskazać zamówienia, z których wynika pozycja zapotrzebowania (item_id), oraz
+    pozycje zapotrzebowania wynikające z zamówienia (order_id, order_item_id).
+    """
+    if material_requirement_id is None and item_id is None and order_id is None and order_item_id is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Podaj zapotrzebowanie, pozycję zapotrzebowania, zamówienie lub pozycję zamówienia."
+        )
+    
+    query = db.query(MaterialRequirementPegging)
+    if material_requirement_id is not None:
+        query = query.filter(MaterialRequirementPegging.material_requirement_id == material_requirement_id)
+    if item_id is not None:
+        query = query.filter(MaterialRequirementPegging.material_requirement_item_id == item_id)
+    if order_id is not None:
+        query = query.filter(MaterialRequirementPegging.order_id == order_id)
+    if order_item_id is not None:
+        query = query.filter(MaterialRequirementPegging.order_item_id == order_item_id)
+    if product_id is not None:
+        query = query.filter(MaterialRequirementPegging.product_id == product_id)
+    
+    if not current_user.is_superuser:
+        query = query.join(
+            MaterialRequirement, MaterialRequirementPegging.material_requirement_id == MaterialRequirement.id
+        ).filter(MaterialRequirement.user_id == current_user.id)
+    
+    return query.order_by(MaterialRequirementPegging.id).offset(skip).limit(limit).all()
+
+
 @router.get("/{material_requirement_id}", response_model=schemas.MaterialRequirement)
-def read_material_requirement(
+async def read_material_requirement(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_read_db),
     material_requirement_id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    include_archived: bool = False,
+    current_user: User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
-    Pobierz szczegóły zapotrzebowania materiałowego.
+    Pobierz szczegóły zapotrzebowania materiałowego (z include_archived również z archiwum).
     """
-    material_requirement = db.query(MaterialRequirement).filter(
-        MaterialRequirement.id == material_requirement_id
-    ).first()
+    material_requirement = await db.get(
+        MaterialRequirement, material_requirement_id, options=MATERIAL_REQUIREMENT_LOAD_OPTIONS
+    )
+    if not material_requirement and include_archived:
+        material_requirement = await db.get(
+            MaterialRequirementArchive, material_requirement_id, options=(
+                selectinload(MaterialRequirementArchive.items),
+                selectinload(MaterialRequirementArchive.source_orders),
+            )
+        )
     
     if not material_requirement:
         raise HTTPException(
@@ -160,6 +251,15 @@ def update_material_requirement(
     
     # Aktualizuj pola
     update_data = material_requirement_in.dict(exclude_unset=True)
+    reference_number = update_data.get("reference_number")
+    if (
+        reference_number and reference_number != material_requirement.reference_number
+        and reference_number_exists(db, reference_number)
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="Zapotrzebowanie materiałowe o takim numerze już istnieje."
+        )
     for field, value in update_data.items():
         setattr(material_requirement, field, value)
     
@@ -196,6 +296,10 @@ def delete_material_requirement(
         )
     
     # Usuń powiązane elementy
+    db.query(MaterialRequirementPegging).filter(
+        MaterialRequirementPegging.material_requirement_id == material_requirement_id
+    ).delete()
+    
     db.query(MaterialRequirementItem).filter(
         MaterialRequirementItem.material_requirement_id == material_requirement_id
     ).delete()
@@ -204,21 +308,31 @@ def delete_material_requirement(
         MaterialRequirementOrder.material_requirement_id == material_requirement_id
     ).delete()
     
+    db.query(CalculationJob).filter(
+        CalculationJob.material_requirement_id == material_requirement_id
+    ).delete()
+    
     db.delete(material_requirement)
     db.commit()
     
     return {"status": "success", "message": "Zapotrzebowanie materiałowe zostało usunięte."}
 
 
-@router.post("/{material_requirement_id}/calculate", response_model=schemas.MaterialRequirement)
+@router.post("/{material_requirement_id}/calculate", response_model=schemas.CalculationJob, status_code=202)
 def calculate_material_requirement(
     *,
     db: Session = Depends(deps.get_db),
     material_requirement_id: int,
+    explosion_mode: Optional[str] = Query(None, description="Silnik eksplozji BOM: cached, llc, recursive lub sparse"),
+    net_change: bool = Query(False, description="Przelicz tylko zmiany od poprzedniego obliczenia"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Oblicz zapotrzebowanie materiałowe na podstawie powiązanych zamówień.
+    Zleć obliczenie zapotrzebowania materiałowego na podstawie powiązanych zamówień.
+    
+    Obliczenia są wykonywane w tle - endpoint od razu zwraca zadanie, którego stan
+    można sprawdzać przez /material-requirements/jobs/{job_id}. Jeśli obliczenia tego
+    zapotrzebowania są już zlecone lub w toku, zwracane jest istniejące zadanie.
     """
     material_requirement = db.query(MaterialRequirement).filter(
         MaterialRequirement.id == material_requirement_id
@@ -236,26 +350,140 @@ def calculate_material_requirement(
             detail="Brak uprawnień do obliczenia tego zapotrzebowania materiałowego."
         )
     
+    if explosion_mode and explosion_mode not in EXPLOSION_MODES:
+        raise HTTPException(status_code=400, detail=f"Nieznany tryb eksplozji BOM: {explosion_mode}")
+    
     try:
-        updated_requirement = calculate_mrp(db, material_requirement_id, current_user.id)
-        return updated_requirement
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return enqueue_calculation(db, material_requirement, current_user.id, explosion_mode, net_change)
+    except CalculationLockTimeout as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
 
 
-@router.get("/{material_requirement_id}/details", response_model=schemas.MaterialRequirementWithDetails)
-def read_material_requirement_with_details(
+@router.post("/calculate-batch", response_model=List[schemas.MaterialRequirementBatchResult], status_code=202)
+def calculate_material_requirements_batch(
     *,
     db: Session = Depends(deps.get_db),
-    material_requirement_id: int,
+    batch_in: schemas.MaterialRequirementBatchCalculate,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Pobierz szczegóły zapotrzebowania materiałowego wraz z dodatkowymi informacjami o produktach i zamówieniach.
+    Zleć obliczenie wielu zapotrzebowań materiałowych w jednym przebiegu.
+    
+    Obliczenia są wykonywane w tle jako jedna partia - zapotrzebowania korzystają ze wspólnej
+    migawki struktur BOM i wspólnej eksplozji zamówień, a wyniki są zapisywane w jednej transakcji.
+    Odpowiedź zawiera dla każdego zapotrzebowania zadanie (stan przez /material-requirements/jobs/{job_id})
+    lub błąd, jeśli obliczeń nie można zlecić. Zapotrzebowanie, którego obliczenia są już zlecone
+    lub w toku, otrzymuje istniejące zadanie.
     """
-    material_requirement = db.query(MaterialRequirement).filter(
-        MaterialRequirement.id == material_requirement_id
-    ).first()
+    if batch_in.explosion_mode and batch_in.explosion_mode not in EXPLOSION_MODES:
+        raise HTTPException(status_code=400, detail=f"Nieznany tryb eksplozji BOM: {batch_in.explosion_mode}")
+    
+    requirement_ids = list(dict.fromkeys(batch_in.material_requirement_ids))
+    material_requirements = {
+        material_requirement.id: material_requirement
+        for material_requirement in db.query(MaterialRequirement).filter(MaterialRequirement.id.in_(requirement_ids))
+    }
+    results = {}
+    allowed = []
+    for material_requirement_id in requirement_ids:
+        material_requirement = material_requirements.get(material_requirement_id)
+        if not material_requirement:
+            results[material_requirement_id] = {
+                "status": "failed",
+                "error": "Zapotrzebowanie materiałowe nie zostało znalezione."
+            }
+        elif not current_user.is_superuser and material_requirement.user_id != current_user.id:
+            results[material_requirement_id] = {
+                "status": "failed",
+                "error": "Brak uprawnień do obliczenia tego zapotrzebowania materiałowego."
+            }
+        else:
+            allowed.append(material_requirement)
+    
+    if allowed:
+        jobs, errors = enqueue_batch_calculation(db, allowed, current_user.id, batch_in.explosion_mode)
+        for material_requirement_id, job in jobs.items():
+            results[material_requirement_id] = {"status": job.status.value, "job_id": job.id, "error": job.error}
+        for material_requirement_id, error in errors.items():
+            results[material_requirement_id] = {"status": "failed", "error": error}
+    
+    return [
+        {"material_requirement_id": material_requirement_id, **results[material_requirement_id]}
+        for material_requirement_id in requirement_ids
+    ]
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.CalculationJob)
+def read_calculation_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Pobierz stan i postęp zadania obliczeniowego.
+    """
+    return _get_calculation_job(db, job_id, current_user)
+
+
+@router.get("/jobs/{job_id}/result", response_model=schemas.MaterialRequirement)
+def read_calculation_job_result(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Pobierz wynik zakończonego zadania obliczeniowego (obliczone zapotrzebowanie materiałowe).
+    """
+    job = _get_calculation_job(db, job_id, current_user)
+    
+    if job.status == CalculationJobStatus.FAILED:
+        raise HTTPException(status_code=400, detail=job.error or "Obliczenia zakończyły się błędem.")
+    if job.status != CalculationJobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Obliczenia nie zostały jeszcze zakończone.")
+    
+    return job.material_requirement
+
+
+def _get_calculation_job(db: Session, job_id: int, current_user: User) -> CalculationJob:
+    job = db.query(CalculationJob).filter(CalculationJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=404, 
+            detail="Zadanie obliczeniowe nie zostało znalezione."
+        )
+    
+    # Właściciel zapotrzebowania ma dostęp także do zadania zleconego przez innego użytkownika,
+    # do którego dołączył jego własne zlecenie obliczeń
+    if (
+        not current_user.is_superuser
+        and job.user_id != current_user.id
+        and job.material_requirement.user_id != current_user.id
+    ):
+        raise HTTPException(
+            status_code=403, 
+            detail="Brak uprawnień do tego zadania obliczeniowego."
+        )
+    
+    return job
+
+
+@router.get("/{material_requirement_id}/details", response_model=schemas.MaterialRequirementWithDetails)
+async def read_material_requirement_with_details(
+    *,
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    material_requirement_id: int,
+    include_archived: bool = False,
+    current_user: User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Pobierz szczegóły zapotrzebowania materiałowego wraz z dodatkowymi informacjami o produktach i zamówieniach
+    (z include_archived również z archiwum).
+    """
+    material_requirement = await _get_material_requirement(db, material_requirement_id, include_archived)
     
     if not material_requirement:
         raise HTTPException(
@@ -269,41 +497,50 @@ def read_material_requirement_with_details(
             detail="Brak uprawnień do tego zapotrzebowania materiałowego."
         )
     
-    # Pobierz szczegóły elementów zapotrzebowania
-    items_with_details = []
-    for item in material_requirement.items:
-        product = db.query(Product).get(item.product_id)
-        if product:
-            items_with_details.append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "product_code": product.code,
-                "product_name": product.name,
-                "product_type": product.product_type,
-                "required_quantity": item.required_quantity,
-                "available_quantity": item.available_quantity,
-                "quantity_to_procure": item.quantity_to_procure,
-                "requirement_date": item.requirement_date,
-                "planned_order_date": item.planned_order_date,
-                "is_available": item.is_available,
-                "unit": product.unit,
-                "lead_time_days": product.lead_time_days,
-                "notes": item.notes
-            })
-    
-    # Pobierz szczegóły zamówień źródłowych
-    orders_with_details = []
-    for order_link in material_requirement.source_orders:
-        order = db.query(Order).get(order_link.order_id)
-        if order:
-            orders_with_details.append({
-                "id": order_link.id,
-                "order_id": order.id,
-                "order_number": order.order_number,
-                "status": order.status,
-                "required_date": order.required_date,
-                "order_date": order.order_date
-            })
+    # Pozycje zapotrzebowania z danymi produktów - jedno zapytanie niezależnie od liczby pozycji
+    archived = isinstance(material_requirement, MaterialRequirementArchive)
+    item_rows = await db.execute(_material_requirement_items_query(
+        material_requirement_id, MaterialRequirementItemArchive if archived else MaterialRequirementItem
+    ))
+    items_with_details = [dict(row._mapping) for row in item_rows]
+    
+    # Zamówienia źródłowe z danymi zamówień - jedno zapytanie
+    if archived:
+        # Zamówienia zarchiwizowanego zapotrzebowania mogą być jeszcze w tabeli bieżącej albo już w archiwum
+        orders_query = select(
+            MaterialRequirementOrderArchive.id, MaterialRequirementOrderArchive.order_id,
+            func.coalesce(Order.order_number, OrderArchive.order_number).label("order_number"),
+            func.coalesce(Order.status, OrderArchive.status).label("status"),
+            func.coalesce(Order.required_date, OrderArchive.required_date).label("required_date"),
+            func.coalesce(Order.order_date, OrderArchive.order_date).label("order_date"),
+        ).outerjoin(
+            Order, MaterialRequirementOrderArchive.order_id == Order.id
+        ).outerjoin(
+            OrderArchive, MaterialRequirementOrderArchive.order_id == OrderArchive.id
+        ).where(
+            MaterialRequirementOrderArchive.material_requirement_id == material_requirement_id
+        ).order_by(MaterialRequirementOrderArchive.id)
+    else:
+        orders_query = select(
+            MaterialRequirementOrder.id, Order.id.label("order_id"), Order.order_number,
+            Order.status, Order.required_date, Order.order_date,
+        ).join(
+            Order, MaterialRequirementOrder.order_id == Order.id
+        ).where(
+            MaterialRequirementOrder.material_requirement_id == material_requirement_id
+        ).order_by(MaterialRequirementOrder.id)
+    order_rows = await db.execute(orders_query)
+    orders_with_details = [
+        {
+            "id": row.id,
+            "order_id": row.order_id,
+            "order_number": row.order_number,
+            "status": row.status,
+            "required_date": row.required_date,
+            "order_date": row.order_date
+        }
+        for row in order_rows
+    ]
     
     # Utwórz odpowiedź
     result = {
@@ -312,14 +549,84 @@ def read_material_requirement_with_details(
         "status": material_requirement.status,
         "creation_date": material_requirement.creation_date,
         "calculation_date": material_requirement.calculation_date,
+        "calculation_metadata": material_requirement.calculation_metadata,
         "notes": material_requirement.notes,
         "consider_stock": material_requirement.consider_stock,
         "consider_min_stock": material_requirement.consider_min_stock,
         "planning_start_date": material_requirement.planning_start_date,
         "planning_end_date": material_requirement.planning_end_date,
+        "planning_bucket": material_requirement.planning_bucket,
         "user_id": material_requirement.user_id,
         "items": items_with_details,
         "source_orders": orders_with_details
     }
     
     return result
+
+
+@router.get("/{material_requirement_id}/export")
+async def export_material_requirement(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    material_requirement_id: int,
+    export_format: str = Query("csv", alias="format", description="Format pliku: csv lub ndjson"),
+    delimiter: str = Query(",", min_length=1, max_length=1, description="Separator kolumn pliku CSV: przecinek, średnik, tabulator lub |"),
+    include_archived: bool = False,
+    current_user: User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Eksportuj pozycje zapotrzebowania materiałowego z danymi produktów do pliku CSV lub NDJSON
+    (z include_archived również zapotrzebowania z archiwum).
+    
+    Pozycje są przesyłane strumieniowo, bez budowania całej odpowiedzi w pamięci.
+    """
+    material_requirement = await _get_material_requirement(db, material_requirement_id, include_archived)
+    
+    if not material_requirement:
+        raise HTTPException(
+            status_code=404, 
+            detail="Zapotrzebowanie materiałowe nie zostało znalezione."
+        )
+    
+    if not current_user.is_superuser and material_requirement.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, 
+            detail="Brak uprawnień do tego zapotrzebowania materiałowego."
+        )
+    
+    return streaming_export(
+        await deps.async_read_session_factory(request),
+        _material_requirement_items_query(
+            material_requirement_id,
+            MaterialRequirementItemArchive if isinstance(material_requirement, MaterialRequirementArchive)
+            else MaterialRequirementItem,
+        ),
+        export_format,
+        material_requirement.reference_number or f"zapotrzebowanie-{material_requirement_id}",
+        delimiter,
+    )
+
+
+async def _get_material_requirement(db: AsyncSession, material_requirement_id: int, include_archived: bool) -> Any:
+    """Zapotrzebowanie z tabeli bieżącej, a z include_archived - gdy go tam nie ma - z archiwum."""
+    material_requirement = await db.get(MaterialRequirement, material_requirement_id)
+    if not material_requirement and include_archived:
+        material_requirement = await db.get(MaterialRequirementArchive, material_requirement_id)
+    return material_requirement
+
+
+def _material_requirement_items_query(material_requirement_id: int, item_model: Any = MaterialRequirementItem) -> Any:
+    """Pozycje zapotrzebowania (bieżącego lub z archiwum) z danymi produktów w kolejności zapisu (szczegóły i eksport)."""
+    return select(
+        item_model.id, item_model.product_id,
+        Product.code.label("product_code"), Product.name.label("product_name"), Product.product_type,
+        item_model.required_quantity, item_model.available_quantity,
+        item_model.quantity_to_procure, item_model.requirement_date,
+        item_model.planned_order_date, item_model.is_available,
+        Product.unit, Product.lead_time_days, item_model.notes,
+    ).join(
+        Product, item_model.product_id == Product.id
+    ).where(
+        item_model.material_requirement_id == material_requirement_id
+    ).order_by(item_model.id)
@@ -1,48 +1,79 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from app.api.deps import get_db, get_current_active_user
+from app.api.deps import get_async_read_db, get_db, get_current_active_user, get_current_active_user_async
+from app.api.pagination import paginate, paginate_with_archive, set_next_cursor
+from app.core.archive import existing_order_numbers
+from app.core.net_change import record_planning_changes
+from app.core.order_intake import create_orders_batch
+from app.models.archive import OrderArchive
+from app.models.material_requirement import MaterialRequirementPegging
 from app.models.user import User
 from app.models.order import Order, OrderItem, OrderStatus, OrderType
-from app.schemas.order import Order as OrderSchema, OrderCreate, OrderUpdate, OrderItem as OrderItemSchema
+from app.schemas.order import (
+    Order as OrderSchema, OrderBatchCreate, OrderBatchResult, OrderCreate, OrderUpdate, OrderItem as OrderItemSchema
+)
 
 router = APIRouter()
 
+# Kolejność listy zamówień (klucz stronicowania kursorem)
+ORDER_SORT_KEYS = (Order.order_date, Order.id)
+
 
 @router.get("/", response_model=List[OrderSchema])
-def read_orders(
-    db: Session = Depends(get_db),
+async def read_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: OrderStatus = None,
     order_type: OrderType = None,
     from_date: datetime = None,
     to_date: datetime = None,
-    current_user: User = Depends(get_current_active_user),
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Pobierz listę zamówień z możliwością filtrowania.
+    
+    Lista jest posortowana po dacie zamówienia. Kursor następnej strony jest zwracany
+    w nagłówku X-Next-Cursor - przekazanie go w parametrze cursor zastępuje skip.
+    Z include_archived lista obejmuje również zamówienia przeniesione do archiwum.
     """
-    query = db.query(Order)
-    
-    # Zastosuj filtry, jeśli zostały podane
-    if status:
-        query = query.filter(Order.status == status)
-    if order_type:
-        query = query.filter(Order.order_type == order_type)
-    if from_date:
-        query = query.filter(Order.order_date >= from_date)
-    if to_date:
-        query = query.filter(Order.order_date <= to_date)
-    
-    # Zwykły użytkownik może widzieć tylko swoje zamówienia
-    if not current_user.is_superuser:
-        query = query.filter(Order.user_id == current_user.id)
-    
-    orders = query.offset(skip).limit(limit).all()
+    def orders_query(model: Any) -> Any:
+        # Pozycje zamówień ładowane jednym dodatkowym zapytaniem (sesja asynchroniczna nie ładuje relacji leniwie)
+        query = select(model).options(selectinload(model.items))
+        
+        # Zastosuj filtry, jeśli zostały podane
+        if status:
+            query = query.where(model.status == status)
+        if order_type:
+            query = query.where(model.order_type == order_type)
+        if from_date:
+            query = query.where(model.order_date >= from_date)
+        if to_date:
+            query = query.where(model.order_date <= to_date)
+        
+        # Zwykły użytkownik może widzieć tylko swoje zamówienia
+        if not current_user.is_superuser:
+            query = query.where(model.user_id == current_user.id)
+        return query
+    
+    if include_archived:
+        orders = await paginate_with_archive(db, [
+            (orders_query(Order), ORDER_SORT_KEYS),
+            (orders_query(OrderArchive), (OrderArchive.order_date, OrderArchive.id)),
+        ], cursor, skip, limit)
+    else:
+        result = await db.execute(paginate(orders_query(Order), ORDER_SORT_KEYS, cursor, skip, limit))
+        orders = result.scalars().all()
+    set_next_cursor(response, orders, ORDER_SORT_KEYS, limit)
     return orders
 
 
@@ -56,9 +87,8 @@ def create_order(
     """
     Utwórz nowe zamówienie.
     """
-    # Sprawdź czy zamówienie o tym numerze już istnieje
-    existing_order = db.query(Order).filter(Order.order_number == order_in.order_number).first()
-    if existing_order:
+    # Sprawdź czy zamówienie o tym numerze już istnieje (także w archiwum)
+    if existing_order_numbers(db, [order_in.order_number]):
         raise HTTPException(
             status_code=400,
             detail="Zamówienie o tym numerze już istnieje.",
@@ -94,23 +124,46 @@ def create_order(
                 notes=item_in.notes,
             )
             db.add(order_item)
+        record_planning_changes(db, "order", order.id, [item_in.product_id for item_in in order_in.items])
         db.commit()
         db.refresh(order)
     
     return order
 
 
-@router.get("/{order_id}", response_model=OrderSchema)
-def read_order(
+@router.post("/batch", response_model=List[OrderBatchResult])
+def create_orders(
     *,
     db: Session = Depends(get_db),
-    order_id: int,
+    batch_in: OrderBatchCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Pobierz informacje o konkretnym zamówieniu.
+    Utwórz wiele zamówień w jednym żądaniu (np. partię zamówień EDI).
+    
+    Poprawne zamówienia są zapisywane w jednej transakcji. Odpowiedź zawiera wynik
+    dla każdego zamówienia - zamówienia z błędem (istniejący lub powtórzony numer,
+    nieistniejący produkt) nie są tworzone.
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    results = create_orders_batch(db, batch_in.orders, current_user.id)
+    db.commit()
+    return results
+
+
+@router.get("/{order_id}", response_model=OrderSchema)
+async def read_order(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    order_id: int,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Pobierz informacje o konkretnym zamówieniu (z include_archived również z archiwum).
+    """
+    order = await db.get(Order, order_id, options=[selectinload(Order.items)])
+    if not order and include_archived:
+        order = await db.get(OrderArchive, order_id, options=[selectinload(OrderArchive.items)])
     if not order:
         raise HTTPException(
             status_code=404,
@@ -152,13 +205,27 @@ def update_order(
             detail="Brak uprawnień do edycji tego zamówienia",
         )
     
+    # Produkty zamówienia przed zmianą - do dziennika zmian planistycznych
+    changed_product_ids = [
+        product_id for (product_id,) in
+        db.query(OrderItem.product_id).filter(OrderItem.order_id == order_id)
+    ]
+    
     # Aktualizuj główne dane zamówienia
     update_data = order_in.dict(exclude={"items"}, exclude_unset=True)
+    new_order_number = update_data.get("order_number")
+    if new_order_number and new_order_number != order.order_number and existing_order_numbers(db, [new_order_number]):
+        raise HTTPException(
+            status_code=400,
+            detail="Zamówienie o tym numerze już istnieje.",
+        )
     for field in update_data:
         setattr(order, field, update_data[field])
     
     # Jeśli podane są elementy, zaktualizuj je
     if order_in.items is not None:
+        changed_product_ids += [item_in.product_id for item_in in order_in.items]
+
         # Usuń istniejące elementy
         db.query(OrderItem).filter(OrderItem.order_id == order_id).delete()
         
@@ -174,6 +241,7 @@ def update_order(
             )
             db.add(order_item)
     
+    record_planning_changes(db, "order", order.id, changed_product_ids)
     db.add(order)
     db.commit()
     db.refresh(order)
@@ -204,6 +272,9 @@ def delete_order(
             detail="Brak uprawnień do usunięcia tego zamówienia",
         )
     
+    record_planning_changes(db, "order", order.id, [item.product_id for item in order.items])
+    # Powiązania pegging usuwanego zamówienia tracą źródło zapotrzebowania
+    db.query(MaterialRequirementPegging).filter(MaterialRequirementPegging.order_id == order.id).delete()
     db.delete(order)
     db.commit()
     return order
@@ -237,6 +308,7 @@ def update_order_status(
     order.status = status
     if status == OrderStatus.COMPLETED:
         order.actual_completion_date = datetime.utcnow()
+    record_planning_changes(db, "order", order.id, [item.product_id for item in order.items])
     
     db.add(order)
     db.commit()
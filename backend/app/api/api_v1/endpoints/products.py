@@ -1,46 +1,97 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user
+from app.api.deps import get_async_read_db, get_db, get_current_active_user, get_current_active_user_async
+from app.api.pagination import paginate, set_next_cursor
+from app.core.config import settings
+from app.core.csv_format import CSVDelimiterError, check_csv_delimiter
+from app.core.explosion_cache import explosion_cache
+from app.core.inventory import InventoryError, adjust_stock, open_balances
+from app.core.net_change import record_planning_changes
+from app.core.product_import import ProductImportError, ProductImporter, iter_import_records
+from app.core.product_search import product_search_statement
+from app.models.inventory import InventoryBalance, InventoryTransaction
 from app.models.user import User
 from app.models.product import Product, ProductType
-from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate, ProductFilter
+from app.schemas.product import Product as ProductSchema, ProductCreate, ProductImportResult, ProductUpdate, ProductFilter
 
 router = APIRouter()
 
+# Kolejność listy produktów (klucz stronicowania kursorem - kod produktu jest unikalny)
+PRODUCT_SORT_KEYS = (Product.code,)
+
+# Typy treści żądania importu produktów
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
 
 @router.get("/", response_model=List[ProductSchema])
-def read_products(
-    db: Session = Depends(get_db),
+async def read_products(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     name: str = None,
     code: str = None,
     product_type: ProductType = None,
     active: bool = None,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Pobierz listę produktów z możliwością filtrowania.
+    
+    Lista jest posortowana po kodzie produktu. Kursor następnej strony jest zwracany
+    w nagłówku X-Next-Cursor - przekazanie go w parametrze cursor zastępuje skip.
     """
-    query = db.query(Product)
+    query = select(Product)
     
     # Zastosuj filtry, jeśli zostały podane
     if name:
-        query = query.filter(Product.name.contains(name))
+        query = query.where(Product.name.contains(name))
     if code:
-        query = query.filter(Product.code.contains(code))
+        query = query.where(Product.code.contains(code))
     if product_type:
-        query = query.filter(Product.product_type == product_type)
+        query = query.where(Product.product_type == product_type)
     if active is not None:
-        query = query.filter(Product.active == active)
+        query = query.where(Product.active == active)
     
-    products = query.offset(skip).limit(limit).all()
+    result = await db.execute(paginate(query, PRODUCT_SORT_KEYS, cursor, skip, limit))
+    products = result.scalars().all()
+    set_next_cursor(response, products, PRODUCT_SORT_KEYS, limit)
     return products
 
 
+@router.get("/search", response_model=List[ProductSchema])
+async def search_products(
+    db: AsyncSession = Depends(get_async_read_db),
+    q: str = Query(..., min_length=1, description="Fragment kodu lub nazwy produktu"),
+    limit: int = Query(20, ge=1, le=100),
+    product_type: ProductType = None,
+    active: bool = None,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Wyszukaj produkty po fragmentach kodu i nazwy (np. w polu wyboru produktu).
+    
+    Wyniki są uporządkowane według trafności. Wyszukiwanie korzysta z indeksu
+    trigramowego (PostgreSQL) lub pełnotekstowego FTS5 (SQLite) zamiast przeglądania
+    całego katalogu.
+    """
+    statement = product_search_statement(db.bind.dialect.name, q, limit, product_type, active)
+    result = await db.execute(statement)
+    return result.scalars().all()
+
+
 @router.post("/", response_model=ProductSchema)
 def create_product(
     *,
@@ -67,28 +118,91 @@ def create_product(
         product_type=product_in.product_type,
         unit=product_in.unit,
         price=product_in.price,
-        quantity_in_stock=product_in.quantity_in_stock,
+        opening_stock=product_in.quantity_in_stock,
         minimum_stock=product_in.minimum_stock,
         lead_time_days=product_in.lead_time_days,
         active=product_in.active,
     )
     db.add(product)
+    db.flush()
+    
+    # Saldo magazynowe produktu - stan początkowy trafia do dziennika ruchów jako korekta
+    open_balances(db, [product.id])
     db.commit()
     db.refresh(product)
     return product
 
 
-@router.get("/{product_id}", response_model=ProductSchema)
-def read_product(
+@router.post("/import", response_model=ProductImportResult)
+async def import_products(
     *,
+    request: Request,
     db: Session = Depends(get_db),
-    product_id: int,
+    import_format: Optional[str] = Query(
+        None, alias="format", description="Format pliku: csv lub ndjson (domyślnie według Content-Type)"
+    ),
+    delimiter: str = Query(",", min_length=1, max_length=1, description="Separator kolumn pliku CSV: przecinek, średnik, tabulator lub |"),
     current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Importuj produkty z pliku CSV (z nagłówkiem) lub NDJSON przesłanego jako treść żądania.
+    
+    Produkty o istniejących kodach są aktualizowane (tylko podane pola), pozostałe - tworzone.
+    Plik jest odczytywany strumieniowo i zapisywany partiami po IMPORT_CHUNK_SIZE wierszy,
+    każda w osobnej transakcji. Odpowiedź zawiera liczbę utworzonych i zaktualizowanych
+    produktów oraz błędy poszczególnych wierszy. Błąd pliku w jego dalszej części (np. niepoprawne
+    kodowanie) przerywa import - odpowiedź zawiera wtedy raport z błędem pliku w wierszu 0.
+    """
+    try:
+        check_csv_delimiter(delimiter)
+    except CSVDelimiterError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if import_format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        import_format = IMPORT_CONTENT_TYPES.get(content_type)
+        if import_format is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Podaj format pliku (csv lub ndjson) w parametrze format lub nagłówku Content-Type.",
+            )
+    
+    importer = ProductImporter(db, current_user.id)
+    chunk = []
+    try:
+        async for record in iter_import_records(request.stream(), import_format, delimiter):
+            chunk.append(record)
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                await run_in_threadpool(importer.import_records, chunk)
+                chunk = []
+    except ProductImportError as e:
+        if not chunk and not importer.result.rows:
+            # Plik odrzucony przed odczytaniem pierwszego wiersza (np. nagłówek bez kolumny code)
+            raise HTTPException(
+                status_code=400,
+                detail=str(e),
+            )
+        # Błąd w dalszej części pliku - wiersze odczytane przed nim są importowane, a raport
+        # obejmuje również partie zapisane wcześniej
+        if chunk:
+            await run_in_threadpool(importer.import_records, chunk)
+        importer.fail_file(str(e))
+        return importer.result
+    if chunk:
+        await run_in_threadpool(importer.import_records, chunk)
+    return importer.result
+
+
+@router.get("/{product_id}", response_model=ProductSchema)
+async def read_product(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    product_id: int,
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Pobierz informacje o konkretnym produkcie.
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(
             status_code=404,
@@ -116,12 +230,26 @@ def update_product(
         )
     
     update_data = product_in.dict(exclude_unset=True)
+    # Zmiana stanu magazynowego jest księgowana w dzienniku ruchów jako korekta
+    quantity_in_stock = update_data.pop("quantity_in_stock", None)
     for field in update_data:
         setattr(product, field, update_data[field])
     
+    record_planning_changes(db, "product", product.id, [product.id])
     db.add(product)
+    if quantity_in_stock is not None:
+        try:
+            adjust_stock(db, product.id, quantity_in_stock, current_user.id, notes="Korekta stanu produktu")
+        except InventoryError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=str(e),
+            )
     db.commit()
     db.refresh(product)
+    # Typ produktu decyduje, czy jest on rozwijany jako zespół
+    explosion_cache.invalidate([product.id])
     return product
 
 
@@ -142,6 +270,20 @@ def delete_product(
             detail="Produkt nie został znaleziony",
         )
     
+    # Dziennik ruchów jest tylko dopisywany - produktu z historią ruchów nie można usunąć
+    has_transactions = db.query(
+        db.query(InventoryTransaction).filter(InventoryTransaction.product_id == product_id).exists()
+    ).scalar()
+    if has_transactions:
+        raise HTTPException(
+            status_code=409,
+            detail="Nie można usunąć produktu, który ma ruchy magazynowe. Oznacz produkt jako nieaktywny.",
+        )
+
+    record_planning_changes(db, "product", product.id, [product.id])
+    # Saldo produktu bez ruchów (zerowe)
+    db.query(InventoryBalance).filter(InventoryBalance.product_id == product_id).delete(synchronize_session=False)
     db.delete(product)
     db.commit()
+    explosion_cache.invalidate([product_id])
     return product
@@ -1,28 +1,37 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_superuser, get_current_active_user
+from app.api.deps import get_db, get_read_db, get_current_active_superuser, get_current_active_user
+from app.api.pagination import paginate, set_next_cursor
 from app.core.auth import get_password_hash
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
 
 router = APIRouter()
 
+# Kolejność listy użytkowników (klucz stronicowania kursorem)
+USER_SORT_KEYS = (User.id,)
+
 
 @router.get("/", response_model=List[UserSchema])
 def read_users(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_superuser),
 ) -> Any:
     """
     Pobierz listę użytkowników.
+    
+    Kursor następnej strony jest zwracany w nagłówku X-Next-Cursor.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = paginate(db.query(User), USER_SORT_KEYS, cursor, skip, limit).all()
+    set_next_cursor(response, users, USER_SORT_KEYS, limit)
     return users
 
 
@@ -101,7 +110,7 @@ def update_user_me(
 def read_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> Any:
     """
     Pobierz użytkownika po ID.
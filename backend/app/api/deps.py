@@ -1,16 +1,26 @@
-from typing import Generator, Optional
+import time
+from typing import AsyncGenerator, Generator, List, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from jose.exceptions import JWTError
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncReplicaSessionLocal, AsyncSessionLocal, ReplicaSessionLocal, SessionLocal
 from app.models.user import User
 from app.schemas.token import TokenPayload
+from app.core.auth import ALGORITHM
 from app.core.config import settings
+from app.core.read_your_writes import read_primary_statement, window_keys
+
+# Ciasteczko z czasem (epoch), do którego odczyty klienta trafiają do bazy głównej -
+# ustawiane po każdym udanym zapisie (read-your-writes przy replice do odczytu). Klienci bez
+# ciasteczek są objęci oknami po stronie serwera (ReadPrimaryWindow) - użytkownika i zapotrzebowania.
+READ_PRIMARY_COOKIE = "mrp_read_primary_until"
 
 # Zmienna kontrolująca, czy uwierzytelnianie jest wymagane
 AUTHENTICATION_REQUIRED = False  # Ustaw na True w środowisku produkcyjnym
@@ -31,6 +41,106 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator:
+    """
+    Dependency dla uzyskiwania asynchronicznej sesji bazy danych (endpointy odczytu)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Czy odczyt klienta musi trafić do bazy głównej - w oknie read-your-writes po jego zapisie
+    (ciasteczko lub okno użytkownika po stronie serwera) albo po obliczeniu odczytywanego zapotrzebowania.
+    """
+    if _read_primary_cookie(request):
+        return True
+    keys = read_primary_window_keys(request)
+    if not keys:
+        return False
+    with SessionLocal() as db:
+        return db.execute(read_primary_statement(keys)).scalar()
+
+
+async def async_reads_from_primary(request: Request) -> bool:
+    """
+    Asynchroniczny odpowiednik reads_from_primary
+    """
+    if _read_primary_cookie(request):
+        return True
+    keys = read_primary_window_keys(request)
+    if not keys:
+        return False
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(read_primary_statement(keys))).scalar()
+
+
+def _read_primary_cookie(request: Request) -> bool:
+    read_primary_until = request.cookies.get(READ_PRIMARY_COOKIE)
+    if not read_primary_until:
+        return False
+    try:
+        return float(read_primary_until) > time.time()
+    except ValueError:
+        return False
+
+
+def read_primary_window_keys(request: Request) -> List[str]:
+    """
+    Klucze okien read-your-writes żądania: użytkownik z tokenu i zapotrzebowanie ze ścieżki.
+    Okna po stronie serwera istnieją tylko przy replice do odczytu.
+    """
+    if not settings.DATABASE_REPLICA_URL:
+        return []
+    material_requirement_id = request.path_params.get("material_requirement_id")
+    return window_keys(
+        token_user_id(request),
+        [int(material_requirement_id)] if str(material_requirement_id or "").isdigit() else []
+    )
+
+
+def token_user_id(request: Request) -> Optional[int]:
+    """
+    ID użytkownika z tokenu Bearer żądania (bez odczytu z bazy) lub None.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return TokenPayload(**jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])).sub
+    except (JWTError, ValidationError):
+        return None
+
+
+def get_read_db(request: Request) -> Generator:
+    """
+    Dependency dla sesji endpointów tylko do odczytu - replika (jeśli skonfigurowana),
+    a w oknie read-your-writes po zapisie klienta baza główna
+    """
+    db = SessionLocal() if reads_from_primary(request) else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def async_read_session_factory(request: Request) -> async_sessionmaker:
+    """
+    Fabryka asynchronicznych sesji odczytu dla klienta - replika lub (w oknie read-your-writes)
+    baza główna. Używana także przez odpowiedzi strumieniowe, które otwierają własną sesję.
+    """
+    return AsyncSessionLocal if await async_reads_from_primary(request) else AsyncReplicaSessionLocal
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    """
+    Asynchroniczny odpowiednik get_read_db
+    """
+    async with (await async_read_session_factory(request))() as db:
+        yield db
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> Optional[User]:
@@ -66,7 +176,7 @@ def get_current_user(
     # Standardowa walidacja tokenu, gdy AUTHENTICATION_REQUIRED=True lub token jest podany
     try:
         payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
         )
         token_data = TokenPayload(**payload)
     except (JWTError, ValidationError):
@@ -110,6 +220,57 @@ def get_current_active_user(
     return current_user
 
 
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_read_db), token: str = Depends(oauth2_scheme)
+) -> Optional[User]:
+    """
+    Asynchroniczny odpowiednik get_current_user dla endpointów odczytu korzystających z AsyncSession
+    (użytkownik jest odczytywany w tej samej sesji co dane endpointu)
+    """
+    if not AUTHENTICATION_REQUIRED and token is None:
+        # W trybie testowym: użytkownik o id=1, pierwszy administrator lub dowolny użytkownik
+        for query in (
+            select(User).where(User.id == 1),
+            select(User).where(User.is_superuser == True),
+            select(User),
+        ):
+            test_user = (await db.execute(query.limit(1))).scalars().first()
+            if test_user:
+                return test_user
+        print("Nie znaleziono żadnego użytkownika do uwierzytelnienia testowego")
+        return None
+
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
+        )
+        token_data = TokenPayload(**payload)
+    except (JWTError, ValidationError):
+        if AUTHENTICATION_REQUIRED:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Brak autoryzacji - token niepoprawny",
+            )
+        return None
+
+    user = (await db.execute(select(User).where(User.id == token_data.sub))).scalars().first()
+    if not user and AUTHENTICATION_REQUIRED:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Brak autoryzacji - użytkownik nie istnieje",
+        )
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> Optional[User]:
+    """
+    Asynchroniczny odpowiednik get_current_active_user
+    """
+    return get_current_active_user(current_user)
+
+
 def get_current_active_superuser(
     current_user: User = Depends(get_current_active_user),
 ) -> Optional[User]:
@@ -0,0 +1,96 @@
+import csv
+import enum
+import io
+import json
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql import Select
+
+from app.core.csv_format import CSVDelimiterError, check_csv_delimiter
+
+# Formaty eksportu i ich typy treści
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+# Liczba wierszy pobieranych z kursora bazy danych i wysyłanych w jednym fragmencie odpowiedzi
+EXPORT_BATCH_SIZE = 1000
+
+
+def streaming_export(
+    session_factory: async_sessionmaker,
+    statement: Select,
+    export_format: str,
+    filename: str,
+    delimiter: str = ","
+) -> StreamingResponse:
+    """
+    Odpowiedź strumieniowa z wierszami zapytania w formacie CSV (z nagłówkiem) lub NDJSON.
+
+    Wiersze są pobierane kursorem po stronie serwera (yield_per) i wysyłane partiami, więc
+    zużycie pamięci nie zależy od liczby wierszy. Strumień korzysta z własnej sesji,
+    ponieważ jest wysyłany po zakończeniu funkcji endpointu.
+
+    Raises:
+        HTTPException: Jeśli format eksportu lub separator kolumn CSV jest nieobsługiwany
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nieobsługiwany format eksportu: {export_format} (dostępne: csv, ndjson)",
+        )
+    try:
+        check_csv_delimiter(delimiter)
+    except CSVDelimiterError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    safe_filename = re.sub(r"[^\w.-]", "_", filename, flags=re.ASCII)
+    return StreamingResponse(
+        _export_rows(session_factory, statement, export_format, delimiter),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{safe_filename}.{export_format}"'},
+    )
+
+
+async def _export_rows(
+    session_factory: async_sessionmaker,
+    statement: Select,
+    export_format: str,
+    delimiter: str
+) -> AsyncIterator[bytes]:
+    async with session_factory() as session:
+        result = await session.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+        if export_format == "csv":
+            # BOM - arkusze kalkulacyjne rozpoznają wtedy kodowanie UTF-8
+            yield ("\ufeff" + _csv_lines([columns], delimiter)).encode()
+        async for rows in result.partitions():
+            if export_format == "csv":
+                chunk = _csv_lines([[_export_value(value) for value in row] for row in rows], delimiter)
+            else:
+                chunk = "".join(
+                    json.dumps(_export_record(columns, row), ensure_ascii=False) + "\n" for row in rows
+                )
+            yield chunk.encode()
+
+
+def _csv_lines(rows: Sequence[Sequence[Any]], delimiter: str) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=delimiter, lineterminator="\r\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def _export_record(columns: Sequence[str], row: Sequence[Any]) -> Dict[str, Any]:
+    return {column: _export_value(value) for column, value in zip(columns, row)}
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
@@ -0,0 +1,110 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+# Nagłówek odpowiedzi z kursorem następnej strony (brak nagłówka - ostatnia strona)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def paginate(
+    query: Any,
+    keys: Sequence[InstrumentedAttribute],
+    cursor: Optional[str],
+    skip: int,
+    limit: int
+) -> Any:
+    """
+    Stronicowanie listy w stałej kolejności kluczy sortowania - kolumn indeksowanych bez wartości
+    NULL, które razem jednoznacznie wyznaczają wiersz (np. data i ID).
+
+    Z kursorem zapytanie zaczyna od pierwszego wiersza po kluczu zapisanym w kursorze
+    (keyset - koszt nie rośnie z numerem strony), a parametr skip jest pomijany.
+    Bez kursora działa dotychczasowe stronicowanie skip/limit.
+
+    Args:
+        query: Zapytanie (Query lub Select) zwracające obiekty modelu
+        keys: Kolumny sortowania
+        cursor: Kursor z nagłówka X-Next-Cursor poprzedniej strony
+    """
+    query = query.order_by(*keys)
+    if cursor is None:
+        return query.offset(skip).limit(limit)
+    values = decode_cursor(cursor, keys)
+    return query.where(tuple_(*keys) > tuple(values)).limit(limit)
+
+
+async def paginate_with_archive(
+    db: Any,
+    queries: Sequence[Tuple[Any, Sequence[InstrumentedAttribute]]],
+    cursor: Optional[str],
+    skip: int,
+    limit: int
+) -> List[Any]:
+    """
+    Stronicowanie listy złożonej z tabeli bieżącej i tabeli archiwum (include_archived).
+
+    Każda tabela jest stronicowana osobno kluczami sortowania o tych samych nazwach, a strony
+    są scalane w kolejności kluczy - rekordy zachowują ID przy archiwizacji, więc klucze się
+    nie powtarzają, a kursor następnej strony działa dla obu tabel. Bez kursora każda tabela
+    zwraca skip + limit wierszy, a skip jest stosowany po scaleniu.
+
+    Args:
+        db: Sesja asynchroniczna
+        queries: Pary (zapytanie Select, kolumny sortowania) dla kolejnych tabel
+    """
+    offset = 0 if cursor is not None else skip
+    pages = []
+    for query, keys in queries:
+        result = await db.execute(paginate(query, keys, cursor, 0, offset + limit))
+        pages.append(result.scalars().all())
+    names = [key.key for key in queries[0][1]]
+    merged = heapq.merge(*pages, key=lambda item: tuple(getattr(item, name) for name in names))
+    return list(islice(merged, offset, offset + limit))
+
+
+def set_next_cursor(
+    response: Response,
+    items: List[Any],
+    keys: Sequence[InstrumentedAttribute],
+    limit: int
+) -> None:
+    """
+    Ustawia nagłówek z kursorem następnej strony, jeśli strona jest pełna.
+    """
+    if limit > 0 and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(items[-1], key.key) for key in keys])
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> List[Any]:
+    """
+    Odczytuje wartości kluczy z kursora.
+
+    Raises:
+        HTTPException: Jeśli kursor jest uszkodzony lub nie pasuje do kluczy sortowania listy
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if key.type.python_type is datetime else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=400,
+            detail="Niepoprawny kursor stronicowania.",
+        )
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import (
+    MaterialRequirementArchive, MaterialRequirementItemArchive, MaterialRequirementOrderArchive,
+    OrderArchive, OrderItemArchive
+)
+from app.models.calculation_job import CalculationJob
+from app.models.material_requirement import (
+    MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementPegging,
+    MaterialRequirementStatus
+)
+from app.models.order import Order, OrderItem, OrderStatus
+
+
+# Statusy rekordów zamkniętych, które trafiają do archiwum
+ARCHIVED_ORDER_STATUSES = (OrderStatus.COMPLETED, OrderStatus.CANCELLED)
+ARCHIVED_MATERIAL_REQUIREMENT_STATUSES = (MaterialRequirementStatus.COMPLETED, MaterialRequirementStatus.CANCELLED)
+
+
+def archive_records(
+    db: Session,
+    older_than: Optional[datetime] = None,
+    batch_size: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Przenosi do tabel archiwum ukończone i anulowane zapotrzebowania materiałowe oraz zamówienia,
+    których ostatnia zmiana jest starsza niż older_than (domyślnie ARCHIVE_AFTER_DAYS dni).
+
+    Rekordy są przenoszone partiami (INSERT ... SELECT i DELETE), każda partia w osobnej
+    transakcji. Zapotrzebowania są przenoszone wraz z pozycjami i powiązaniami z zamówieniami;
+    pegging i zadania obliczeniowe archiwizowanych zapotrzebowań są usuwane. Zamówienie
+    powiązane z zapotrzebowaniem, które pozostaje w tabeli bieżącej, nie jest archiwizowane.
+
+    Args:
+        db: Sesja bazy danych
+        older_than: Data graniczna ostatniej zmiany rekordu
+        batch_size: Liczba rekordów nadrzędnych w jednej partii (domyślnie ARCHIVE_BATCH_SIZE)
+
+    Returns:
+        Liczba zarchiwizowanych zapotrzebowań i zamówień
+    """
+    if older_than is None:
+        older_than = datetime.utcnow() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    archived = {"material_requirements": 0, "orders": 0}
+
+    material_requirements = db.query(MaterialRequirement.id).filter(
+        MaterialRequirement.status.in_(ARCHIVED_MATERIAL_REQUIREMENT_STATUSES),
+        func.coalesce(MaterialRequirement.updated_at, MaterialRequirement.creation_date) < older_than
+    ).order_by(MaterialRequirement.id)
+    while True:
+        ids = [material_requirement_id for material_requirement_id, in material_requirements.limit(batch_size)]
+        if not ids:
+            break
+        archive_material_requirements(db, ids)
+        db.commit()
+        archived["material_requirements"] += len(ids)
+
+    orders = db.query(Order.id).filter(
+        Order.status.in_(ARCHIVED_ORDER_STATUSES),
+        func.coalesce(Order.actual_completion_date, Order.updated_at, Order.order_date) < older_than,
+        ~exists().where(MaterialRequirementOrder.order_id == Order.id)
+    ).order_by(Order.id)
+    while True:
+        ids = [order_id for order_id, in orders.limit(batch_size)]
+        if not ids:
+            break
+        archive_orders(db, ids)
+        db.commit()
+        archived["orders"] += len(ids)
+
+    return archived
+
+
+def archive_material_requirements(db: Session, material_requirement_ids: List[int]) -> None:
+    """
+    Przenosi zapotrzebowania wraz z pozycjami i powiązaniami z zamówieniami do archiwum
+    w bieżącej transakcji.
+    """
+    archived_at = datetime.utcnow()
+    _copy_rows(db, MaterialRequirement, MaterialRequirementArchive,
+               MaterialRequirement.id.in_(material_requirement_ids), archived_at)
+    _copy_rows(db, MaterialRequirementItem, MaterialRequirementItemArchive,
+               MaterialRequirementItem.material_requirement_id.in_(material_requirement_ids))
+    _copy_rows(db, MaterialRequirementOrder, MaterialRequirementOrderArchive,
+               MaterialRequirementOrder.material_requirement_id.in_(material_requirement_ids))
+
+    # Pegging i zadania obliczeniowe dotyczą tylko zapotrzebowań bieżących
+    for model in (MaterialRequirementPegging, CalculationJob, MaterialRequirementItem, MaterialRequirementOrder):
+        db.execute(delete(model.__table__).where(
+            model.__table__.c.material_requirement_id.in_(material_requirement_ids)
+        ))
+    db.execute(delete(MaterialRequirement.__table__).where(
+        MaterialRequirement.__table__.c.id.in_(material_requirement_ids)
+    ))
+
+
+def archive_orders(db: Session, order_ids: List[int]) -> None:
+    """
+    Przenosi zamówienia wraz z pozycjami do archiwum w bieżącej transakcji.
+    """
+    _copy_rows(db, Order, OrderArchive, Order.id.in_(order_ids), datetime.utcnow())
+    _copy_rows(db, OrderItem, OrderItemArchive, OrderItem.order_id.in_(order_ids))
+
+    db.execute(delete(MaterialRequirementPegging.__table__).where(
+        MaterialRequirementPegging.__table__.c.order_id.in_(order_ids)
+    ))
+    db.execute(delete(OrderItem.__table__).where(OrderItem.__table__.c.order_id.in_(order_ids)))
+    db.execute(delete(Order.__table__).where(Order.__table__.c.id.in_(order_ids)))
+
+
+def existing_order_numbers(db: Session, order_numbers: Iterable[str]) -> Set[str]:
+    """
+    Zwraca numery zamówień, które są już zajęte - w tabeli bieżącej lub w archiwum.
+
+    Indeks numeru w tabeli archiwum nie jest unikalny, więc unikalność numeru w całym
+    systemie sprawdza się przed utworzeniem zamówienia w obu tabelach.
+    """
+    order_numbers = set(order_numbers)
+    if not order_numbers:
+        return set()
+    return set(db.execute(
+        select(Order.order_number).where(Order.order_number.in_(order_numbers)).union(
+            select(OrderArchive.order_number).where(OrderArchive.order_number.in_(order_numbers))
+        )
+    ).scalars())
+
+
+def reference_number_exists(db: Session, reference_number: str) -> bool:
+    """
+    Sprawdza, czy numer zapotrzebowania materiałowego jest zajęty w tabeli bieżącej lub w archiwum.
+    """
+    return db.execute(select(
+        exists().where(MaterialRequirement.reference_number == reference_number)
+        | exists().where(MaterialRequirementArchive.reference_number == reference_number)
+    )).scalar()
+
+
+def _copy_rows(db: Session, model: Any, archive_model: Any, condition: Any, archived_at: Optional[datetime] = None) -> None:
+    # Wszystkie kolumny tabeli bieżącej (łącznie z ID) trafiają do kolumn archiwum o tych samych nazwach
+    columns = list(model.__table__.columns)
+    names = [column.name for column in columns]
+    if archived_at is not None:
+        columns.append(literal(archived_at, DateTime).label("archived_at"))
+        names.append("archived_at")
+    db.execute(insert(archive_model.__table__).from_select(names, select(*columns).where(condition)))
@@ -0,0 +1,283 @@
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+import logging
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.bom import BOM, BOMItem
+from app.models.bom_graph_node import BOMGraphNode
+from app.models.inventory import InventoryBalance
+from app.models.product import Product, ProductType
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProductInfo(NamedTuple):
+    """Lekka kopia danych produktu potrzebnych w obliczeniach MRP"""
+    id: int
+    code: str
+    name: str
+    product_type: ProductType
+    unit: str
+    quantity_in_stock: float
+    minimum_stock: float
+    lead_time_days: int
+
+
+class BOMEdge(NamedTuple):
+    """Krawędź grafu BOM: komponent wchodzący w skład produktu nadrzędnego"""
+    component_id: int
+    quantity: float
+    is_optional: bool
+
+
+class BOMGraph:
+    """
+    Migawka aktywnych struktur materiałowych w postaci listy sąsiedztwa.
+
+    Graf jest ładowany kilkoma zbiorczymi zapytaniami i pozwala przeprowadzić
+    całą eksplozję BOM bez odwoływania się do sesji bazy danych.
+    """
+
+    def __init__(
+        self,
+        products: Dict[int, ProductInfo],
+        bom_ids: Dict[int, int],
+        children: Dict[int, List[BOMEdge]],
+        bom_versions: Optional[Dict[int, str]] = None,
+        is_partial: bool = False,
+    ) -> None:
+        # ID produktu -> dane produktu
+        self.products = products
+        # ID produktu -> ID aktywnej listy BOM
+        self.bom_ids = bom_ids
+        # ID produktu -> lista komponentów aktywnej listy BOM
+        self.children = children
+        # ID aktywnej listy BOM -> wersja listy
+        self.bom_versions = bom_versions or {}
+        # Czy graf jest wycinkiem (np. zakres net-change) - nie zawiera wszystkich krawędzi
+        self.is_partial = is_partial
+        self._low_level_codes: Optional[Dict[int, int]] = None
+
+    def get_product(self, product_id: int) -> Optional[ProductInfo]:
+        return self.products.get(product_id)
+
+    def has_bom(self, product_id: int) -> bool:
+        return product_id in self.bom_ids
+
+    def components(self, product_id: int) -> List[BOMEdge]:
+        return self.children.get(product_id, [])
+
+    def is_assembly(self, product_id: int) -> bool:
+        """
+        Czy produkt napotkany jako komponent jest rozwijany dalej
+        (produkt końcowy lub komponent z aktywną listą BOM).
+        """
+        product = self.products.get(product_id)
+        if product is None or not self.has_bom(product_id):
+            return False
+        return product.product_type in (ProductType.FINAL, ProductType.COMPONENT)
+
+    def subgraph(self, product_ids: Set[int]) -> "BOMGraph":
+        """
+        Widok grafu ograniczony do krawędzi prowadzących do wskazanych produktów.
+        Dane produktów i przypisanie list BOM pozostają wspólne z grafem źródłowym.
+        """
+        children = {
+            parent_id: [edge for edge in edges if edge.component_id in product_ids]
+            for parent_id, edges in self.children.items()
+            if parent_id in product_ids
+        }
+        graph = BOMGraph(
+            products=self.products, bom_ids=self.bom_ids, children=children,
+            bom_versions=self.bom_versions, is_partial=True
+        )
+        # Kolejność poziomów pozostaje poprawna dla podzbioru krawędzi
+        graph._low_level_codes = self._low_level_codes
+        return graph
+
+    def low_level_codes(self) -> Dict[int, int]:
+        """
+        Zwraca kody niskiego poziomu (low-level codes) wszystkich produktów grafu.
+
+        Kod niskiego poziomu to najgłębszy poziom, na którym produkt występuje
+        w jakiejkolwiek strukturze (0 - produkty niewystępujące jako komponent).
+        Kody pochodzą z indeksu grafu BOM (use_low_level_codes), a gdy indeks nie
+        pasuje do migawki - są liczone raz na migawkę.
+        """
+        if self._low_level_codes is None:
+            self._low_level_codes = compute_low_level_codes(self)
+        return self._low_level_codes
+
+    def use_low_level_codes(self, codes: Dict[int, int]) -> bool:
+        """
+        Przyjmuje kody niskiego poziomu z indeksu, jeśli są zgodne z migawką, tzn. każdy
+        rozwijany komponent leży na głębszym poziomie niż jego zespół.
+
+        Returns:
+            Czy kody zostały przyjęte
+        """
+        for parent_id, edges in self.children.items():
+            if not self.is_assembly(parent_id):
+                continue
+            parent_code = codes.get(parent_id, 0)
+            for edge in edges:
+                if not edge.is_optional and codes.get(edge.component_id, 0) <= parent_code:
+                    return False
+        self._low_level_codes = {
+            product_id: codes.get(product_id, 0)
+            for product_id in set(self.products) | set(self.bom_ids) | set(codes)
+        }
+        return True
+
+
+def compute_low_level_codes(graph: BOMGraph, all_edges: bool = False) -> Dict[int, int]:
+    """
+    Wyznacza kody niskiego poziomu sortowaniem topologicznym (algorytm Kahna).
+
+    Domyślnie uwzględniane są tylko krawędzie, po których faktycznie schodzi eksplozja,
+    czyli nieopcjonalne komponenty zespołów posiadających aktywną listę BOM.
+    Z all_edges=True uwzględniane są wszystkie krawędzie aktywnych list BOM
+    (kody są wtedy poprawne również dla eksplozji).
+
+    Raises:
+        ValueError: Jeśli struktury BOM zawierają cykl
+    """
+    nodes = set(graph.products) | set(graph.bom_ids)
+    edges: Dict[int, List[int]] = {}
+    in_degree: Dict[int, int] = {}
+    for parent_id, parent_edges in graph.children.items():
+        if not all_edges and not graph.is_assembly(parent_id):
+            continue
+        for edge in parent_edges:
+            if edge.is_optional and not all_edges:
+                continue
+            nodes.add(edge.component_id)
+            edges.setdefault(parent_id, []).append(edge.component_id)
+            in_degree[edge.component_id] = in_degree.get(edge.component_id, 0) + 1
+
+    codes = {node: 0 for node in nodes}
+    queue = deque(node for node in nodes if in_degree.get(node, 0) == 0)
+    visited = 0
+    while queue:
+        node = queue.popleft()
+        visited += 1
+        for component_id in edges.get(node, []):
+            codes[component_id] = max(codes[component_id], codes[node] + 1)
+            in_degree[component_id] -= 1
+            if in_degree[component_id] == 0:
+                queue.append(component_id)
+
+    if visited < len(nodes):
+        # Odrzucenie produktów leżących jedynie poniżej cyklu - zostają produkty tworzące cykle
+        cyclic = {node for node, degree in in_degree.items() if degree > 0}
+        pruned = True
+        while pruned:
+            pruned = False
+            for node in list(cyclic):
+                if not any(component_id in cyclic for component_id in edges.get(node, [])):
+                    cyclic.discard(node)
+                    pruned = True
+        cyclic = sorted(cyclic)
+        raise ValueError(f"Wykryto cykl w strukturach BOM (produkty: {cyclic[:10]})")
+
+    return codes
+
+
+def compute_structure_depths(graph: BOMGraph, codes: Dict[int, int]) -> Dict[int, int]:
+    """
+    Wyznacza głębokość struktury poniżej każdego produktu (0 - produkty bez komponentów)
+    na podstawie wszystkich krawędzi aktywnych list BOM.
+
+    Args:
+        codes: Kody niskiego poziomu wyznaczone z all_edges=True (kolejność topologiczna)
+    """
+    depths: Dict[int, int] = {}
+    # Od najgłębszych poziomów - komponenty są przetwarzane przed swoimi zespołami
+    for product_id in sorted(codes, key=lambda node: codes[node], reverse=True):
+        depths[product_id] = max(
+            (depths.get(edge.component_id, 0) + 1 for edge in graph.components(product_id)),
+            default=0
+        )
+    return depths
+
+
+def load_bom_graph(db: Session, product_ids: Iterable[int] = (), use_index: bool = True) -> BOMGraph:
+    """
+    Ładuje migawkę grafu BOM zbiorczymi zapytaniami (listy BOM, ich elementy, produkty
+    oraz kody niskiego poziomu z indeksu grafu BOM).
+
+    Args:
+        db: Sesja bazy danych
+        product_ids: Dodatkowe produkty (np. z pozycji zamówień), których dane mają trafić do migawki
+        use_index: Czy pobrać kody niskiego poziomu z indeksu grafu BOM
+
+    Returns:
+        Graf aktywnych list BOM wraz z danymi wszystkich powiązanych produktów
+    """
+    # Aktywne listy BOM - przy kilku aktywnych wersjach wygrywa najstarsza
+    bom_ids: Dict[int, int] = {}
+    bom_versions: Dict[int, str] = {}
+    for bom_id, product_id, version in db.query(BOM.id, BOM.product_id, BOM.version).filter(
+        BOM.is_active == True
+    ).order_by(BOM.id):
+        bom_ids.setdefault(product_id, bom_id)
+        bom_versions[bom_id] = version
+
+    parent_by_bom = {bom_id: product_id for product_id, bom_id in bom_ids.items()}
+
+    # Elementy wszystkich aktywnych list BOM
+    children: Dict[int, List[BOMEdge]] = {}
+    bom_items = db.query(
+        BOMItem.bom_id, BOMItem.component_id, BOMItem.quantity, BOMItem.is_optional
+    ).join(BOM, BOMItem.bom_id == BOM.id).filter(
+        BOM.is_active == True
+    ).order_by(BOMItem.bom_id, BOMItem.id)
+    for bom_id, component_id, quantity, is_optional in bom_items:
+        parent_id = parent_by_bom.get(bom_id)
+        if parent_id is None:
+            continue
+        children.setdefault(parent_id, []).append(
+            BOMEdge(component_id, quantity, bool(is_optional))
+        )
+
+    # Dane produktów występujących w strukturach oraz produktów dodatkowych
+    active_parents = select(BOM.product_id).where(BOM.is_active == True)
+    active_components = select(BOMItem.component_id).join(
+        BOM, BOMItem.bom_id == BOM.id
+    ).where(BOM.is_active == True)
+    conditions = [Product.id.in_(active_parents), Product.id.in_(active_components)]
+    extra_ids = set(product_ids)
+    if extra_ids:
+        conditions.append(Product.id.in_(extra_ids))
+
+    products: Dict[int, ProductInfo] = {}
+    # Stan magazynowy z salda produktu (InventoryBalance) - bez przeglądania dziennika ruchów
+    rows = db.query(
+        Product.id, Product.code, Product.name, Product.product_type, Product.unit,
+        func.coalesce(InventoryBalance.on_hand, Product.opening_stock).label("quantity_in_stock"),
+        Product.minimum_stock, Product.lead_time_days
+    ).outerjoin(InventoryBalance, InventoryBalance.product_id == Product.id).filter(or_(*conditions))
+    for row in rows:
+        products[row.id] = ProductInfo(
+            id=row.id,
+            code=row.code,
+            name=row.name,
+            product_type=row.product_type,
+            unit=row.unit,
+            quantity_in_stock=row.quantity_in_stock or 0.0,
+            minimum_stock=row.minimum_stock or 0.0,
+            lead_time_days=row.lead_time_days or 0,
+        )
+
+    graph = BOMGraph(products=products, bom_ids=bom_ids, children=children, bom_versions=bom_versions)
+
+    # Kolejność poziomów z indeksu grafu BOM - wyznaczana lokalnie tylko przy niezgodności indeksu
+    if use_index:
+        codes = dict(db.query(BOMGraphNode.product_id, BOMGraphNode.low_level_code))
+        if not graph.use_low_level_codes(codes):
+            logger.warning("Indeks grafu BOM jest niezgodny ze strukturami - kody poziomów zostaną wyznaczone ponownie")
+
+    return graph
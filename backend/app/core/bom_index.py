@@ -0,0 +1,85 @@
+from typing import Dict
+
+from sqlalchemy import false, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.bom_graph import compute_low_level_codes, compute_structure_depths, load_bom_graph
+from app.models.bom_graph_node import BOMGraphNode
+
+
+# Klucz blokady doradczej PostgreSQL zmian struktur BOM
+BOM_STRUCTURE_LOCK = 0x424F4D01
+
+
+class BOMCycleError(ValueError):
+    """Zapis listy BOM utworzyłby cykl w strukturach materiałowych"""
+
+
+def lock_bom_structures(db: Session) -> None:
+    """
+    Blokuje zmiany struktur BOM w innych transakcjach do zakończenia bieżącej transakcji,
+    aby sprawdzenie cykli i zapis zmian list BOM nie przeplatały się między transakcjami.
+
+    W PostgreSQL jest to blokada doradcza transakcji (pg_advisory_xact_lock). W SQLite
+    zapisywać może tylko jedna transakcja naraz - blokadę zapisu bazy (jak BEGIN IMMEDIATE)
+    uzyskuje pierwsze polecenie zapisu i utrzymuje ją do zatwierdzenia lub wycofania.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(BOM_STRUCTURE_LOCK)))
+    else:
+        # Polecenie zapisu bez zmienianych wierszy - wystarcza do uzyskania blokady zapisu
+        db.execute(
+            update(BOMGraphNode).where(false()).values(depth=BOMGraphNode.depth)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def update_bom_index(db: Session) -> Dict[str, int]:
+    """
+    Aktualizuje indeks grafu BOM (kody niskiego poziomu i głębokość struktur) po zmianie list BOM.
+
+    Indeks jest wyznaczany z aktywnych list BOM widocznych w bieżącej transakcji, więc zmiany
+    muszą być wcześniej wysłane do bazy (flush). Zapisywane są tylko zmienione węzły -
+    zatwierdzenie należy do wywołującego. Struktury są wczytywane po uzyskaniu blokady
+    zmian BOM (lock_bom_structures), utrzymywanej do zatwierdzenia, więc współbieżne zmiany
+    (np. A -> B i B -> A) są sprawdzane kolejno i nie mogą razem utworzyć cyklu.
+
+    Raises:
+        BOMCycleError: Jeśli aktywne listy BOM zawierają cykl
+
+    Returns:
+        Liczba dodanych, zmienionych i usuniętych węzłów
+    """
+    lock_bom_structures(db)
+    graph = load_bom_graph(db, use_index=False)
+    try:
+        codes = compute_low_level_codes(graph, all_edges=True)
+    except ValueError as e:
+        raise BOMCycleError(str(e)) from e
+    depths = compute_structure_depths(graph, codes)
+
+    # Węzłami indeksu są produkty występujące w aktywnych strukturach
+    structure_ids = set(graph.bom_ids) | {
+        edge.component_id for edges in graph.children.values() for edge in edges
+    }
+
+    changes = {"inserted": 0, "updated": 0, "deleted": 0}
+    existing = {node.product_id: node for node in db.query(BOMGraphNode)}
+    for product_id, node in existing.items():
+        if product_id not in structure_ids:
+            db.delete(node)
+            changes["deleted"] += 1
+
+    for product_id in structure_ids:
+        node = existing.get(product_id)
+        if node is None:
+            db.add(BOMGraphNode(
+                product_id=product_id, low_level_code=codes[product_id], depth=depths[product_id]
+            ))
+            changes["inserted"] += 1
+        elif node.low_level_code != codes[product_id] or node.depth != depths[product_id]:
+            node.low_level_code = codes[product_id]
+            node.depth = depths[product_id]
+            changes["updated"] += 1
+
+    return changes
@@ -0,0 +1,263 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+import logging
+import threading
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.models.calculation_job import CalculationLock
+
+
+# Zakresy blokad zapotrzebowania (pierwszy klucz blokady doradczej PostgreSQL)
+CALCULATION = 0x4D525001  # obliczenia - usuwanie i zapis pozycji zapotrzebowania
+ENQUEUE = 0x4D525002  # zlecanie obliczeń - wybór zadania w toku lub utworzenie nowego
+# Odstęp między kolejnymi próbami uzyskania zajętej blokady (s)
+POLL_INTERVAL_SECONDS = 0.1
+
+logger = logging.getLogger(__name__)
+
+
+class CalculationLockTimeout(ValueError):
+    """Blokada zapotrzebowania nie została zwolniona w wyznaczonym czasie"""
+
+
+class CalculationLockLost(ValueError):
+    """Blokada zapotrzebowania wygasła lub została przejęta w trakcie obliczeń"""
+
+
+class RequirementLock:
+    """
+    Blokada zapotrzebowania materiałowego wspólna dla wszystkich procesów aplikacji.
+
+    W PostgreSQL jest to blokada doradcza (pg_advisory_lock) utrzymywana na osobnym połączeniu -
+    zwalniana automatycznie także po zerwaniu połączenia. W pozostałych bazach blokadą jest
+    wiersz tabeli CalculationLock z czasem wygaśnięcia, przedłużanym przez refresh().
+
+    Wątek start_heartbeat() przedłuża blokadę przez cały czas jej utrzymywania, niezależnie
+    od postępu obliczeń. Przed zapisem wyników verify() sprawdza, czy blokada nie została utracona.
+    """
+
+    def __init__(self, bind: Engine, material_requirement_id: int, scope: int = CALCULATION):
+        self.bind = bind
+        self.material_requirement_id = material_requirement_id
+        self.scope = scope
+        self.key = f"{scope:x}:{material_requirement_id}"
+        self.owner = uuid.uuid4().hex
+        self.advisory = bind.dialect.name == "postgresql"
+        self.connection: Optional[Connection] = None
+        self.acquired = False
+        self.lost = False
+        # Połączenie blokady doradczej jest używane również przez wątek podtrzymujący
+        self._connection_lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._heartbeat_stopped = threading.Event()
+
+    def acquire(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Uzyskuje blokadę. Bez oczekiwania zwraca False, jeśli blokada jest zajęta.
+
+        Raises:
+            CalculationLockTimeout: Jeśli blokada nie została zwolniona w czasie timeout
+                (domyślnie CALCULATION_LOCK_TIMEOUT_SECONDS)
+        """
+        if timeout is None:
+            timeout = settings.CALCULATION_LOCK_TIMEOUT_SECONDS
+        deadline = time.monotonic() + timeout
+        while not self._try_acquire():
+            if not wait:
+                return False
+            if time.monotonic() >= deadline:
+                raise CalculationLockTimeout(
+                    f"Obliczenia zapotrzebowania materiałowego {self.material_requirement_id} są w toku - "
+                    "spróbuj ponownie później"
+                )
+            time.sleep(POLL_INTERVAL_SECONDS)
+        return True
+
+    def refresh(self, connection: Optional[Connection] = None) -> bool:
+        """
+        Przedłuża czas wygaśnięcia blokady tabelowej.
+
+        Args:
+            connection: Połączenie, w którego transakcji blokada jest przedłużana (domyślnie
+                osobna transakcja) - przedłużenie w transakcji zapisu wyników jest z nimi zatwierdzane
+
+        Returns:
+            Czy blokada jest nadal utrzymywana przez tego właściciela
+        """
+        if self.advisory:
+            with self._connection_lock:
+                if self.connection is None or not self.acquired:
+                    return False
+                # Blokada doradcza o dwóch kluczach: classid i objid, objsubid = 2
+                held = self.connection.execute(text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted "
+                    "AND pid = pg_backend_pid() AND classid = :scope AND objid = :material_requirement_id "
+                    "AND objsubid = 2)"
+                ), {"scope": self.scope, "material_requirement_id": self.material_requirement_id}).scalar()
+                self.connection.commit()
+                return bool(held)
+        statement = (
+            update(CalculationLock)
+            .where(CalculationLock.lock_key == self.key, CalculationLock.owner == self.owner)
+            .values(expires_at=self._expires_at(), updated_at=datetime.utcnow())
+        )
+        if connection is not None:
+            return connection.execute(statement).rowcount == 1
+        with self.bind.begin() as connection:
+            return connection.execute(statement).rowcount == 1
+
+    def verify(self, connection: Optional[Connection] = None) -> None:
+        """
+        Sprawdza przed zatwierdzeniem wyników obliczeń, czy blokada jest nadal utrzymywana.
+
+        Args:
+            connection: Połączenie transakcji zapisu wyników - blokada tabelowa jest przedłużana
+                w tej transakcji, więc nie może zostać przejęta przed jej zatwierdzeniem
+
+        Raises:
+            CalculationLockLost: Jeśli blokada wygasła lub została przejęta
+        """
+        if self.lost or not self.refresh(connection):
+            self.lost = True
+            raise CalculationLockLost(
+                f"Blokada obliczeń zapotrzebowania materiałowego {self.material_requirement_id} została utracona - "
+                "wyniki nie zostały zapisane"
+            )
+
+    def start_heartbeat(self, on_beat: Optional[Callable[[], bool]] = None, interval: Optional[float] = None) -> None:
+        """
+        Uruchamia wątek przedłużający blokadę do czasu jej zwolnienia.
+
+        Args:
+            on_beat: Dodatkowa funkcja wywoływana przy każdym przedłużeniu (np. oznaczenie
+                zadania jako aktywnego); zwrócenie False oznacza utratę blokady
+            interval: Odstęp między przedłużeniami (domyślnie 1/3 CALCULATION_LOCK_TTL_SECONDS)
+        """
+        if interval is None:
+            interval = settings.CALCULATION_LOCK_TTL_SECONDS / 3
+        self._heartbeat = threading.Thread(
+            target=self._run_heartbeat, args=(on_beat, interval),
+            name=f"mrp-lock-{self.key}", daemon=True
+        )
+        self._heartbeat.start()
+
+    def _run_heartbeat(self, on_beat: Optional[Callable[[], bool]], interval: float) -> None:
+        while not self._heartbeat_stopped.wait(interval):
+            try:
+                held = self.refresh() and (on_beat is None or on_beat())
+            except Exception:
+                # Przejściowy błąd bazy - kolejna próba przy następnym przedłużeniu
+                logger.warning(f"Nie udało się przedłużyć blokady {self.key}", exc_info=True)
+                continue
+            if not held:
+                self.lost = True
+                return
+
+    def release(self) -> None:
+        """Zwalnia blokadę."""
+        if self._heartbeat is not None:
+            self._heartbeat_stopped.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self.advisory:
+            with self._connection_lock:
+                if self.connection is not None:
+                    try:
+                        if self.acquired:
+                            self.connection.execute(
+                                select(func.pg_advisory_unlock(self.scope, self.material_requirement_id))
+                            )
+                            self.connection.commit()
+                    finally:
+                        self.connection.close()
+                        self.connection = None
+                        self.acquired = False
+            return
+        with self.bind.begin() as connection:
+            connection.execute(
+                delete(CalculationLock)
+                .where(CalculationLock.lock_key == self.key, CalculationLock.owner == self.owner)
+            )
+
+    def _try_acquire(self) -> bool:
+        if self.advisory:
+            if self.connection is None:
+                self.connection = self.bind.connect()
+            acquired = self.connection.execute(
+                select(func.pg_try_advisory_lock(self.scope, self.material_requirement_id))
+            ).scalar()
+            # Blokada doradcza sesji przetrwa zakończenie transakcji - połączenie nie trzyma otwartej transakcji
+            self.connection.commit()
+            self.acquired = bool(acquired)
+            return self.acquired
+
+        now = datetime.utcnow()
+        try:
+            with self.bind.begin() as connection:
+                # Przejęcie blokady porzuconej przez proces, który przestał działać
+                connection.execute(
+                    delete(CalculationLock)
+                    .where(CalculationLock.lock_key == self.key, CalculationLock.expires_at < now)
+                )
+                connection.execute(insert(CalculationLock).values(
+                    lock_key=self.key, owner=self.owner, expires_at=self._expires_at(),
+                    created_at=now, updated_at=now
+                ))
+        except IntegrityError:
+            return False
+        return True
+
+    @staticmethod
+    def _expires_at() -> datetime:
+        return datetime.utcnow() + timedelta(seconds=settings.CALCULATION_LOCK_TTL_SECONDS)
+
+
+@contextmanager
+def requirement_lock(
+    bind: Engine,
+    material_requirement_id: int,
+    scope: int = CALCULATION,
+    wait: bool = True,
+    timeout: Optional[float] = None,
+    heartbeat: bool = False
+) -> Iterator[Optional[RequirementLock]]:
+    """
+    Utrzymuje blokadę zapotrzebowania materiałowego w obrębie bloku.
+
+    Args:
+        bind: Silnik bazy danych (blokada korzysta z własnego połączenia, niezależnego od sesji)
+        material_requirement_id: ID zapotrzebowania materiałowego
+        scope: Zakres blokady (CALCULATION lub ENQUEUE)
+        wait: Czy czekać na zwolnienie zajętej blokady
+        timeout: Maksymalny czas oczekiwania (domyślnie CALCULATION_LOCK_TIMEOUT_SECONDS)
+        heartbeat: Czy przedłużać blokadę w tle przez cały czas trwania bloku
+
+    Yields:
+        Uzyskana blokada lub None, jeśli blokada jest zajęta, a wait=False
+
+    Raises:
+        CalculationLockTimeout: Jeśli blokada nie została zwolniona w czasie timeout
+    """
+    lock = RequirementLock(bind, material_requirement_id, scope)
+    try:
+        acquired = lock.acquire(wait, timeout)
+    except BaseException:
+        lock.release()
+        raise
+    if not acquired:
+        lock.release()
+        yield None
+        return
+    try:
+        if heartbeat:
+            lock.start_heartbeat()
+        yield lock
+    finally:
+        lock.release()
@@ -0,0 +1,17 @@
+# Dozwolone separatory kolumn plików CSV (import i eksport)
+CSV_DELIMITERS = (",", ";", "\t", "|")
+
+
+class CSVDelimiterError(ValueError):
+    """Nieobsługiwany separator kolumn pliku CSV"""
+
+
+def check_csv_delimiter(delimiter: str) -> None:
+    """
+    Sprawdza, czy separator kolumn pliku CSV jest jednym z dozwolonych (CSV_DELIMITERS).
+
+    Raises:
+        CSVDelimiterError: Jeśli separator jest niedozwolony
+    """
+    if delimiter not in CSV_DELIMITERS:
+        raise CSVDelimiterError("Nieobsługiwany separator kolumn CSV (dostępne: przecinek, średnik, tabulator, |)")
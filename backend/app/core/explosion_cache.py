@@ -0,0 +1,226 @@
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.bom_graph import BOMGraph
+from app.core.config import settings
+from app.models.planning_change import PlanningChange
+
+
+# Klucz wpisu: (ID produktu, ID aktywnej listy BOM, wersja listy)
+CacheKey = Tuple[int, int, Optional[str]]
+
+# Zmiany tych obiektów mogą zmienić strukturę rozwinięcia zespołu
+STRUCTURE_ENTITY_TYPES = ("bom", "product")
+
+
+class CachedExplosion(NamedTuple):
+    """Spłaszczone rozwinięcie jednej sztuki zespołu"""
+    # ID komponentu (liścia eksplozji) -> ilość na jednostkę zespołu
+    quantities: Dict[int, float]
+    # Wszystkie produkty napotkane w rozwinięciu (łącznie z samym zespołem)
+    dependencies: FrozenSet[int]
+
+
+class ExplosionCache:
+    """
+    Pamięć podręczna spłaszczonych rozwinięć zespołów z wypieraniem LRU.
+
+    Wpisy są kluczowane produktem i wersją aktywnej listy BOM. Zmiana listy BOM
+    zespołu lub dowolnego zespołu w jego strukturze unieważnia wpis (invalidate).
+    Zmiany wykonane w innych procesach są uwzględniane na podstawie dziennika
+    zmian planistycznych (sync).
+
+    Każde unieważnienie zmienia pokolenie pamięci. Rozwinięcia wyznaczone na grafie BOM
+    wczytanym przed unieważnieniem (put z wcześniejszym pokoleniem) nie są zapisywane,
+    ponieważ mogą pochodzić ze struktur sprzed zmiany.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        # Maksymalna liczba wpisów (0 wyłącza przechowywanie)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, CachedExplosion]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_change_id: Optional[int] = None
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        """Bieżące pokolenie pamięci - zmienia się przy każdym unieważnieniu."""
+        return self._generation
+
+    def get(self, key: CacheKey) -> Optional[CachedExplosion]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: CacheKey, entry: CachedExplosion, generation: Optional[int] = None) -> None:
+        """
+        Zapisuje rozwinięcie. Z podanym pokoleniem (z sync() wywołanego przed wczytaniem
+        grafu BOM) wpis jest pomijany, jeśli od tego czasu pamięć została unieważniona.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, product_ids: Iterable[Optional[int]]) -> int:
+        """
+        Usuwa rozwinięcia zawierające którykolwiek ze wskazanych produktów -
+        zarówno rozwinięcia samych produktów, jak i zespołów, w których występują.
+
+        Returns:
+            Liczba usuniętych wpisów
+        """
+        changed = {product_id for product_id in product_ids if product_id is not None}
+        if not changed:
+            return 0
+        with self._lock:
+            return self._invalidate(changed)
+
+    def _invalidate(self, changed: Set[int]) -> int:
+        # Wywoływane z uzyskaną blokadą
+        self._generation += 1
+        stale = [
+            key for key, entry in self._entries.items()
+            if not changed.isdisjoint(entry.dependencies)
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def items(self) -> List[Tuple[CacheKey, CachedExplosion]]:
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def sync(self, db: Session) -> int:
+        """
+        Unieważnia wpisy na podstawie zmian list BOM i produktów zapisanych w dzienniku
+        od ostatniej synchronizacji (np. przez inny proces aplikacji).
+
+        Wywoływane przed wczytaniem grafu BOM - rozwinięcia wyznaczone na tym grafie
+        są zapisywane ze zwróconym pokoleniem (put).
+
+        Returns:
+            Pokolenie pamięci po synchronizacji
+        """
+        with self._lock:
+            last_change_id = self._last_change_id
+        if last_change_id is None:
+            # Pierwsza synchronizacja - pamięć jest pusta, wystarczy zapamiętać pozycję w dzienniku
+            change_id = db.query(func.max(PlanningChange.id)).scalar() or 0
+            with self._lock:
+                if self._last_change_id is None:
+                    self._generation += 1
+                    self._entries.clear()
+                    self._last_change_id = change_id
+                return self._generation
+
+        rows = db.query(PlanningChange.id, PlanningChange.product_id).filter(
+            PlanningChange.id > last_change_id,
+            PlanningChange.entity_type.in_(STRUCTURE_ENTITY_TYPES)
+        ).all()
+        with self._lock:
+            if rows:
+                # Wpisy list BOM obejmują również komponenty - unieważnienie jest ostrożne (nadmiarowe)
+                self._invalidate({product_id for _, product_id in rows if product_id is not None})
+                self._last_change_id = max(self._last_change_id, max(change_id for change_id, _ in rows))
+            return self._generation
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+def explode_per_unit(
+    graph: BOMGraph,
+    product_id: int,
+    cache: ExplosionCache,
+    generation: Optional[int] = None
+) -> CachedExplosion:
+    """
+    Zwraca spłaszczone rozwinięcie jednej sztuki zespołu, korzystając z pamięci podręcznej
+    również dla zespołów występujących w jego strukturze.
+
+    Brakujące rozwinięcia są wyznaczane bez rekurencji - w kolejności kodów niskiego
+    poziomu z indeksu grafu BOM, od najgłębszych zespołów, i zapisywane w pamięci
+    z pokoleniem generation (z sync() wywołanego przed wczytaniem grafu).
+
+    Raises:
+        ValueError: Jeśli struktury BOM zawierają cykl
+    """
+    entry = cache.get(cache_key(graph, product_id))
+    if entry is not None:
+        return entry
+
+    # Zespoły struktury bez rozwinięcia w pamięci podręcznej
+    explosions: Dict[int, CachedExplosion] = {}
+    pending = {product_id}
+    stack = [product_id]
+    while stack:
+        for edge in graph.components(stack.pop()):
+            component_id = edge.component_id
+            if edge.is_optional or not graph.is_assembly(component_id):
+                continue
+            if component_id in explosions or component_id in pending:
+                continue
+            component = cache.get(cache_key(graph, component_id))
+            if component is not None:
+                explosions[component_id] = component
+            else:
+                pending.add(component_id)
+                stack.append(component_id)
+
+    codes = graph.low_level_codes()
+    for assembly_id in sorted(pending, key=lambda node: codes.get(node, 0), reverse=True):
+        quantities: Dict[int, float] = {}
+        dependencies = {assembly_id}
+        for edge in graph.components(assembly_id):
+            # Jeśli komponent jest opcjonalny, pomijamy go
+            if edge.is_optional:
+                continue
+
+            dependencies.add(edge.component_id)
+            if graph.is_assembly(edge.component_id):
+                component = explosions[edge.component_id]
+                for component_id, quantity in component.quantities.items():
+                    quantities[component_id] = quantities.get(component_id, 0) + edge.quantity * quantity
+                dependencies |= component.dependencies
+            else:
+                quantities[edge.component_id] = quantities.get(edge.component_id, 0) + edge.quantity
+
+        explosions[assembly_id] = CachedExplosion(quantities=quantities, dependencies=frozenset(dependencies))
+        cache.put(cache_key(graph, assembly_id), explosions[assembly_id], generation)
+
+    return explosions[product_id]
+
+
+def cache_key(graph: BOMGraph, product_id: int) -> CacheKey:
+    bom_id = graph.bom_ids.get(product_id)
+    return (product_id, bom_id, graph.bom_versions.get(bom_id))
+
+
+# Pamięć podręczna rozwinięć współdzielona przez obliczenia w bieżącym procesie
+explosion_cache = ExplosionCache(settings.MRP_EXPLOSION_CACHE_SIZE)
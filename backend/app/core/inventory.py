@@ -0,0 +1,245 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, true, update
+from sqlalchemy.orm import Session
+
+from app.core.net_change import record_planning_changes
+from app.models.inventory import InventoryBalance, InventoryTransaction, InventoryTransactionType
+from app.models.order import Order, OrderItem, OrderStatus, OrderType
+from app.models.product import Product
+
+
+# Statusy zamówień zakupu, których dostawy są oczekiwane (przyjęcia planowane)
+OPEN_PURCHASE_STATUSES = (OrderStatus.SUBMITTED, OrderStatus.CONFIRMED, OrderStatus.IN_PRODUCTION)
+# Numer dokumentu korekty otwierającej saldo ze stanu zapisanego w produkcie
+OPENING_REFERENCE = "BO"
+
+
+class InventoryError(ValueError):
+    """Ruch magazynowy jest niepoprawny lub doprowadziłby do ujemnego stanu"""
+
+
+class ScheduledReceipt(NamedTuple):
+    """Przyjęcie planowane - oczekiwana dostawa pozycji otwartego zamówienia zakupu"""
+    receipt_date: datetime
+    quantity: float
+    order_id: int
+    order_number: str
+
+
+def transaction_delta(transaction_type: InventoryTransactionType, quantity: float) -> float:
+    """
+    Zmiana stanu wynikająca z ruchu. Przyjęcie i wydanie podaje się jako ilość dodatnią,
+    korektę - jako zmianę stanu ze znakiem.
+    """
+    if transaction_type == InventoryTransactionType.ADJUSTMENT:
+        if quantity == 0:
+            raise InventoryError("Korekta stanu musi zmieniać stan magazynowy")
+        return quantity
+    if quantity <= 0:
+        raise InventoryError("Ilość przyjęcia lub wydania musi być dodatnia")
+    return quantity if transaction_type == InventoryTransactionType.RECEIPT else -quantity
+
+
+def post_inventory_transactions(
+    db: Session,
+    transactions: List[Dict[str, Any]],
+    user_id: Optional[int] = None
+) -> List[InventoryTransaction]:
+    """
+    Księguje ruchy magazynowe w bieżącej transakcji - zatwierdza je commit wywołującego.
+
+    Ruchy są dopisywane do dziennika, a saldo każdego produktu jest zmieniane jednym
+    warunkowym UPDATE (on_hand = on_hand + zmiana), więc współbieżne ruchy tego samego
+    produktu nie nadpisują się wzajemnie, a wydanie ponad stan kończy się błędem.
+    Wiersz produktu nie jest zmieniany - Product.quantity_in_stock odczytuje saldo.
+
+    Args:
+        db: Sesja bazy danych
+        transactions: Słowniki z polami product_id, transaction_type, quantity
+            oraz opcjonalnie order_id, reference i notes
+        user_id: ID użytkownika księgującego ruchy
+
+    Returns:
+        Zaksięgowane wpisy dziennika
+
+    Raises:
+        InventoryError: Jeśli ruch jest niepoprawny, produkt nie istnieje lub brakuje stanu
+    """
+    entries = [
+        InventoryTransaction(
+            product_id=values["product_id"],
+            transaction_type=values["transaction_type"],
+            quantity=transaction_delta(values["transaction_type"], values["quantity"]),
+            order_id=values.get("order_id"),
+            reference=values.get("reference"),
+            notes=values.get("notes"),
+            user_id=user_id,
+        )
+        for values in transactions
+    ]
+    if not entries:
+        return []
+
+    product_ids = {entry.product_id for entry in entries}
+    known = {product_id for product_id, in db.query(Product.id).filter(Product.id.in_(product_ids))}
+    if product_ids - known:
+        raise InventoryError(f"Nie znaleziono produktu o ID {min(product_ids - known)}")
+    open_balances(db, product_ids)
+
+    db.add_all(entries)
+    db.flush()
+
+    # Produkt -> (łączna zmiana stanu, ostatni ruch)
+    changes: Dict[int, Tuple[float, int]] = {}
+    for entry in entries:
+        delta, _ = changes.get(entry.product_id, (0.0, 0))
+        changes[entry.product_id] = (delta + entry.quantity, entry.id)
+
+    for product_id, (delta, last_transaction_id) in sorted(changes.items()):
+        result = db.execute(
+            update(InventoryBalance)
+            .where(
+                InventoryBalance.product_id == product_id,
+                InventoryBalance.on_hand + delta >= 0 if delta < 0 else true()
+            )
+            .values(
+                on_hand=InventoryBalance.on_hand + delta,
+                last_transaction_id=last_transaction_id,
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise InventoryError(f"Niewystarczający stan magazynowy produktu o ID {product_id}")
+
+    record_planning_changes(db, "inventory", entries[-1].id, changes)
+    return entries
+
+
+def open_balances(db: Session, product_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Zakłada saldo produktom, które go jeszcze nie mają (nowe produkty i produkty sprzed
+    dziennika ruchów). Stan początkowy produktu trafia do dziennika jako korekta otwierająca.
+
+    Args:
+        db: Sesja bazy danych
+        product_ids: Produkty do sprawdzenia (None - wszystkie produkty)
+
+    Returns:
+        Liczba założonych sald
+    """
+    query = db.query(Product.id, Product.opening_stock).outerjoin(
+        InventoryBalance, InventoryBalance.product_id == Product.id
+    ).filter(InventoryBalance.id.is_(None))
+    if product_ids is not None:
+        query = query.filter(Product.id.in_(set(product_ids)))
+    rows = query.all()
+
+    openings = {
+        product_id: InventoryTransaction(
+            product_id=product_id,
+            transaction_type=InventoryTransactionType.ADJUSTMENT,
+            quantity=opening_stock,
+            reference=OPENING_REFERENCE,
+            notes="Stan początkowy",
+        )
+        for product_id, opening_stock in rows if opening_stock
+    }
+    db.add_all(openings.values())
+    db.flush()
+    db.add_all([
+        InventoryBalance(
+            product_id=product_id,
+            on_hand=opening_stock or 0.0,
+            last_transaction_id=openings[product_id].id if product_id in openings else None,
+        )
+        for product_id, opening_stock in rows
+    ])
+    db.flush()
+    return len(rows)
+
+
+def adjust_stock(
+    db: Session,
+    product_id: int,
+    quantity_in_stock: float,
+    user_id: Optional[int] = None,
+    notes: Optional[str] = None
+) -> Optional[InventoryTransaction]:
+    """
+    Ustawia stan magazynowy produktu (np. po inwentaryzacji), księgując korektę o różnicę
+    względem bieżącego salda. Zwraca None, jeśli stan się nie zmienia.
+    """
+    open_balances(db, [product_id])
+    on_hand = db.query(InventoryBalance.on_hand).filter(InventoryBalance.product_id == product_id).scalar()
+    delta = quantity_in_stock - (on_hand or 0.0)
+    if delta == 0:
+        return None
+    return post_inventory_transactions(db, [{
+        "product_id": product_id,
+        "transaction_type": InventoryTransactionType.ADJUSTMENT,
+        "quantity": delta,
+        "notes": notes,
+    }], user_id)[0]
+
+
+def receive_order(db: Session, order: Order, user_id: Optional[int] = None) -> List[InventoryTransaction]:
+    """
+    Przyjmuje na magazyn dostawę zamówienia zakupu: księguje przyjęcie wszystkich pozycji
+    i oznacza zamówienie jako ukończone (przestaje być przyjęciem planowanym).
+
+    Raises:
+        InventoryError: Jeśli zamówienie nie jest otwartym zamówieniem zakupu
+    """
+    if order.order_type != OrderType.PURCHASE:
+        raise InventoryError("Na magazyn można przyjąć tylko zamówienie zakupu")
+    if order.status not in OPEN_PURCHASE_STATUSES:
+        raise InventoryError("Zamówienie zakupu nie oczekuje na dostawę")
+
+    entries = post_inventory_transactions(db, [
+        {
+            "product_id": item.product_id,
+            "transaction_type": InventoryTransactionType.RECEIPT,
+            "quantity": item.quantity,
+            "order_id": order.id,
+            "reference": order.order_number,
+        }
+        for item in order.items if item.quantity > 0
+    ], user_id)
+    order.status = OrderStatus.COMPLETED
+    order.actual_completion_date = datetime.utcnow()
+    return entries
+
+
+def load_scheduled_receipts(
+    db: Session,
+    product_ids: Optional[Iterable[int]] = None
+) -> Dict[int, List[ScheduledReceipt]]:
+    """
+    Przyjęcia planowane - pozycje otwartych zamówień zakupu z oczekiwaną datą dostawy
+    (przewidywana data realizacji, a bez niej data wymagana). Zamówienia bez żadnej
+    z tych dat nie są uwzględniane, ponieważ nie wiadomo, kiedy dostawa będzie dostępna.
+
+    Returns:
+        Słownik: ID produktu -> przyjęcia planowane posortowane po dacie dostawy
+    """
+    receipt_date = func.coalesce(Order.estimated_completion_date, Order.required_date)
+    query = db.query(
+        OrderItem.product_id, receipt_date, OrderItem.quantity, Order.id, Order.order_number
+    ).join(
+        Order, OrderItem.order_id == Order.id
+    ).filter(
+        Order.order_type == OrderType.PURCHASE,
+        Order.status.in_(OPEN_PURCHASE_STATUSES),
+        receipt_date.isnot(None),
+        OrderItem.quantity > 0
+    )
+    if product_ids is not None:
+        query = query.filter(OrderItem.product_id.in_(set(product_ids)))
+
+    receipts: Dict[int, List[ScheduledReceipt]] = {}
+    for product_id, *receipt in query.order_by(receipt_date, Order.id):
+        receipts.setdefault(product_id, []).append(ScheduledReceipt(*receipt))
+    return receipts
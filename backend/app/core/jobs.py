@@ -0,0 +1,486 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+import uuid
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.calculation_lock import (
+    ENQUEUE, CalculationLockLost, CalculationLockTimeout, RequirementLock, requirement_lock
+)
+from app.core.config import settings
+from app.core.mrp import calculate_locked_mrp_batch, calculate_mrp
+from app.core.read_your_writes import open_read_primary_windows, window_keys
+from app.db.session import SessionLocal, engine
+from app.models.calculation_job import CalculationJob, CalculationJobStatus
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Zadania, które nie zostały jeszcze zakończone
+ACTIVE_JOB_STATUSES = (CalculationJobStatus.QUEUED, CalculationJobStatus.RUNNING)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+class CalculationJobLost(ValueError):
+    """Zadanie obliczeniowe zostało w trakcie obliczeń uznane za porzucone przez inny proces"""
+
+
+def get_executor() -> Executor:
+    """
+    Zwraca pulę wykonującą zadania obliczeniowe (tworzoną przy pierwszym użyciu).
+    Rodzaj puli (wątki lub procesy) i jej rozmiar określają ustawienia MRP_JOB_EXECUTOR i MRP_JOB_WORKERS.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if settings.MRP_JOB_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.MRP_JOB_WORKERS,
+                    initializer=_init_worker_process
+                )
+            elif settings.MRP_JOB_EXECUTOR == "thread":
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.MRP_JOB_WORKERS,
+                    thread_name_prefix="mrp-job"
+                )
+            else:
+                raise ValueError(f"Nieznany rodzaj puli zadań: {settings.MRP_JOB_EXECUTOR}")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """
+    Zamyka pulę zadań (wywoływane przy zatrzymaniu aplikacji).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _init_worker_process() -> None:
+    # Połączenia odziedziczone po procesie nadrzędnym nie mogą być współdzielone
+    engine.dispose(close=False)
+
+
+def enqueue_calculation(
+    db: Session,
+    material_requirement: MaterialRequirement,
+    user_id: Optional[int] = None,
+    explosion_mode: Optional[str] = None,
+    net_change: bool = False
+) -> CalculationJob:
+    """
+    Tworzy zadanie obliczenia zapotrzebowania materiałowego i przekazuje je do puli.
+    
+    Jeśli zapotrzebowanie ma już zadanie oczekujące lub w toku (zlecone w dowolnym procesie
+    aplikacji), nowe zadanie nie jest tworzone - zwracane jest zadanie w toku, a wywołujący
+    otrzyma jego wynik. Wybór zadania odbywa się pod blokadą zapotrzebowania (ENQUEUE),
+    więc równoczesne zlecenia nie tworzą duplikatów.
+    
+    Args:
+        db: Sesja bazy danych
+        material_requirement: Zapotrzebowanie materiałowe do obliczenia
+        user_id: ID użytkownika zlecającego obliczenia
+        explosion_mode: Silnik eksplozji BOM
+        net_change: Czy przeliczyć tylko zmiany od poprzedniego obliczenia
+        
+    Returns:
+        Nowe zadanie w stanie QUEUED lub zadanie w toku
+    
+    Raises:
+        CalculationLockTimeout: Jeśli blokada zapotrzebowania nie została uzyskana w wyznaczonym czasie
+    """
+    job, created = _queue_job(db, material_requirement, user_id, explosion_mode, net_change)
+    if created:
+        get_executor().submit(run_calculation_job, job.id)
+    return job
+
+
+def enqueue_batch_calculation(
+    db: Session,
+    material_requirements: List[MaterialRequirement],
+    user_id: Optional[int] = None,
+    explosion_mode: Optional[str] = None
+) -> Tuple[Dict[int, CalculationJob], Dict[int, str]]:
+    """
+    Tworzy zadania obliczenia partii zapotrzebowań materiałowych (pełne przeliczenie) i przekazuje
+    je do puli jako jedno zadanie - partia jest obliczana razem (calculate_locked_mrp_batch).
+    
+    Każde zapotrzebowanie otrzymuje własne zadanie ze wspólnym batch_id, więc stan obliczeń
+    i wynik są dostępne tak samo jak dla pojedynczego zlecenia. Zapotrzebowanie, które ma już
+    zadanie oczekujące lub w toku, nie trafia do partii - zwracane jest jego zadanie.
+    
+    Args:
+        db: Sesja bazy danych
+        material_requirements: Zapotrzebowania materiałowe do obliczenia
+        user_id: ID użytkownika zlecającego obliczenia
+        explosion_mode: Silnik eksplozji BOM
+        
+    Returns:
+        Zadania zapotrzebowań (ID zapotrzebowania -> zadanie) oraz błędy zapotrzebowań, których
+        blokada nie została uzyskana w wyznaczonym czasie (ID zapotrzebowania -> opis błędu)
+    """
+    batch_id = uuid.uuid4().hex
+    jobs: Dict[int, CalculationJob] = {}
+    errors: Dict[int, str] = {}
+    queued = False
+    try:
+        for material_requirement in sorted(material_requirements, key=lambda requirement: requirement.id):
+            try:
+                job, created = _queue_job(db, material_requirement, user_id, explosion_mode, batch_id=batch_id)
+            except CalculationLockTimeout as e:
+                db.rollback()
+                errors[material_requirement.id] = str(e)
+                continue
+            jobs[material_requirement.id] = job
+            queued = queued or created
+    finally:
+        # Zadania zapisane przed ewentualnym błędem nie mogą pozostać w kolejce bez wykonawcy
+        if queued:
+            get_executor().submit(run_batch_calculation_job, batch_id)
+    return jobs, errors
+
+
+def _queue_job(
+    db: Session,
+    material_requirement: MaterialRequirement,
+    user_id: Optional[int] = None,
+    explosion_mode: Optional[str] = None,
+    net_change: bool = False,
+    batch_id: Optional[str] = None
+) -> Tuple[CalculationJob, bool]:
+    # Zadanie w toku lub nowe zadanie w stanie QUEUED (wybór pod blokadą ENQUEUE); True - nowe zadanie
+    with requirement_lock(db.get_bind(), material_requirement.id, ENQUEUE):
+        job = active_calculation_job(db, material_requirement.id)
+        if job:
+            db.commit()
+            return job, False
+        
+        job = CalculationJob(
+            material_requirement_id=material_requirement.id,
+            status=CalculationJobStatus.QUEUED,
+            progress=0.0,
+            explosion_mode=explosion_mode,
+            net_change=net_change,
+            batch_id=batch_id,
+            user_id=user_id
+        )
+        db.add(job)
+        material_requirement.status = MaterialRequirementStatus.QUEUED
+        db.commit()
+        db.refresh(job)
+    return job, True
+
+
+def active_calculation_job(db: Session, material_requirement_id: int) -> Optional[CalculationJob]:
+    """
+    Zwraca oczekujące lub wykonywane zadanie obliczeniowe zapotrzebowania.
+    
+    Zadanie bez oznak życia dłużej niż CALCULATION_LOCK_TTL_SECONDS (np. utracone przy
+    restarcie procesu) jest oznaczane jako nieudane - wynik zatwierdza commit wywołującego.
+    Wykonywane zadanie jest oznaczane jako aktywne przez wątek podtrzymujący blokadę, a zmiana
+    statusu jest warunkowa, więc zadanie odświeżone w międzyczasie nie jest przerywane.
+    """
+    job = db.query(CalculationJob).filter(
+        CalculationJob.material_requirement_id == material_requirement_id,
+        CalculationJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(CalculationJob.id.desc()).first()
+    if not job:
+        return None
+    
+    abandoned_before = datetime.utcnow() - timedelta(seconds=settings.CALCULATION_LOCK_TTL_SECONDS)
+    if (job.updated_at or job.created_at) < abandoned_before:
+        abandoned = db.execute(
+            update(CalculationJob)
+            .where(
+                CalculationJob.id == job.id,
+                CalculationJob.status.in_(ACTIVE_JOB_STATUSES),
+                CalculationJob.updated_at < abandoned_before
+            )
+            .values(
+                status=CalculationJobStatus.FAILED,
+                error="Zadanie obliczeniowe zostało przerwane",
+                finished_at=datetime.utcnow()
+            )
+        ).rowcount
+        if abandoned:
+            return None
+        db.refresh(job)
+    return job
+
+
+def run_calculation_job(job_id: int) -> None:
+    """
+    Wykonuje zadanie obliczeniowe w wątku lub procesie puli.
+    
+    Obliczenia są wykonywane pod blokadą zapotrzebowania (CALCULATION) wspólną dla wszystkich
+    procesów, więc dwa przeliczenia tego samego zapotrzebowania nigdy nie nadpisują
+    wzajemnie swoich pozycji. Postęp i wynik zadania są zapisywane w osobnej sesji,
+    niezależnej od transakcji obliczeń.
+    """
+    status_db = SessionLocal()
+    db = SessionLocal()
+    try:
+        job = status_db.query(CalculationJob).filter(CalculationJob.id == job_id).first()
+        if not job:
+            logger.warning(f"Nie znaleziono zadania obliczeniowego {job_id}")
+            return
+        
+        try:
+            with requirement_lock(engine, job.material_requirement_id) as lock:
+                _run_locked_job(db, status_db, job, lock)
+        except CalculationLockTimeout as e:
+            status_db.rollback()
+            _fail_job(status_db, job, str(e))
+    finally:
+        db.close()
+        status_db.close()
+
+
+def _run_locked_job(db: Session, status_db: Session, job: CalculationJob, lock: RequirementLock) -> None:
+    # Zadanie mogło zostać uznane za porzucone w czasie oczekiwania na blokadę
+    status_db.refresh(job)
+    if job.status != CalculationJobStatus.QUEUED:
+        return
+    
+    job_id = job.id
+    job_user_id = job.user_id
+    material_requirement_id = job.material_requirement_id
+    job.status = CalculationJobStatus.RUNNING
+    job.started_at = datetime.utcnow()
+    material_requirement = status_db.query(MaterialRequirement).filter(
+        MaterialRequirement.id == job.material_requirement_id
+    ).first()
+    if material_requirement:
+        material_requirement.status = MaterialRequirementStatus.CALCULATING
+    status_db.commit()
+    
+    # Blokada i zadanie są podtrzymywane przez cały czas obliczeń, nie tylko przy postępie
+    lock.start_heartbeat(lambda: _touch_job(job_id))
+    
+    def report_progress(progress: float) -> None:
+        lock.verify()
+        job.progress = progress
+        status_db.commit()
+    
+    def complete_job(session: Session) -> None:
+        # Wyniki są zatwierdzane razem z zakończeniem zadania, tylko jeśli blokada i zadanie
+        # nadal należą do tego przebiegu (zadanie nie zostało w międzyczasie uznane za porzucone)
+        lock.verify(session.connection())
+        completed = session.execute(
+            update(CalculationJob)
+            .where(CalculationJob.id == job_id, CalculationJob.status == CalculationJobStatus.RUNNING)
+            .values(status=CalculationJobStatus.COMPLETED, progress=1.0, finished_at=datetime.utcnow())
+        ).rowcount
+        if not completed:
+            raise CalculationJobLost(f"Zadanie obliczeniowe {job_id} zostało przerwane - wyniki nie zostały zapisane")
+        # Odczyty wyników (zleceniodawcy i zapotrzebowania) trafiają przez chwilę do bazy głównej
+        open_read_primary_windows(session, window_keys(job_user_id, [material_requirement_id]))
+    
+    try:
+        calculate_mrp(
+            db,
+            job.material_requirement_id,
+            job.user_id,
+            job.explosion_mode,
+            progress_callback=report_progress,
+            net_change=job.net_change,
+            before_commit=complete_job
+        )
+    except Exception as e:
+        db.rollback()
+        status_db.rollback()
+        if isinstance(e, (CalculationLockLost, CalculationJobLost)):
+            logger.warning(f"Zadanie obliczeniowe {job_id}: {e}")
+        elif not isinstance(e, ValueError):
+            logger.exception(f"Błąd zadania obliczeniowego {job_id}")
+        _fail_job(status_db, job, str(e))
+        return
+    
+    status_db.expire(job)
+
+
+def run_batch_calculation_job(batch_id: str) -> None:
+    """
+    Wykonuje w wątku lub procesie puli zadania partii zapotrzebowań jednym obliczeniem.
+    
+    Blokady zapotrzebowań (CALCULATION) są uzyskiwane w kolejności ID i podtrzymywane w tle.
+    Zadanie, którego blokady nie udało się uzyskać, kończy się błędem - pozostałe są obliczane.
+    Wyniki są zapisywane w jednej transakcji razem z zakończeniem zadań.
+    """
+    status_db = SessionLocal()
+    db = SessionLocal()
+    try:
+        batch_jobs = status_db.query(CalculationJob).filter(
+            CalculationJob.batch_id == batch_id,
+            CalculationJob.status == CalculationJobStatus.QUEUED
+        ).order_by(CalculationJob.material_requirement_id).all()
+        with ExitStack() as locks:
+            locked: List[Tuple[CalculationJob, RequirementLock]] = []
+            for job in batch_jobs:
+                try:
+                    locked.append((job, locks.enter_context(requirement_lock(engine, job.material_requirement_id))))
+                except CalculationLockTimeout as e:
+                    status_db.rollback()
+                    _fail_job(status_db, job, str(e))
+            if locked:
+                _run_locked_batch(db, status_db, locked)
+    finally:
+        db.close()
+        status_db.close()
+
+
+def _run_locked_batch(db: Session, status_db: Session, locked: List[Tuple[CalculationJob, RequirementLock]]) -> None:
+    running: Dict[int, Tuple[CalculationJob, RequirementLock]] = {}
+    for job, lock in locked:
+        # Zadanie mogło zostać uznane za porzucone w czasie oczekiwania na blokadę
+        status_db.refresh(job)
+        if job.status != CalculationJobStatus.QUEUED:
+            continue
+        job.status = CalculationJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        material_requirement = status_db.query(MaterialRequirement).filter(
+            MaterialRequirement.id == job.material_requirement_id
+        ).first()
+        if material_requirement:
+            material_requirement.status = MaterialRequirementStatus.CALCULATING
+        running[job.material_requirement_id] = (job, lock)
+    status_db.commit()
+    if not running:
+        return
+    
+    job_ids = {material_requirement_id: job.id for material_requirement_id, (job, _) in running.items()}
+    user_id, explosion_mode = next((job.user_id, job.explosion_mode) for job, _ in running.values())
+    for material_requirement_id, (_, lock) in running.items():
+        lock.start_heartbeat(lambda job_id=job_ids[material_requirement_id]: _touch_job(job_id))
+    
+    def complete_jobs(session: Session, calculated_ids: List[int]) -> None:
+        # Wyniki partii są zatwierdzane tylko wtedy, gdy wszystkie blokady i zadania należą do tego przebiegu
+        for _, lock in running.values():
+            lock.verify(session.connection())
+        for material_requirement_id in calculated_ids:
+            job_id = job_ids[material_requirement_id]
+            completed = session.execute(
+                update(CalculationJob)
+                .where(CalculationJob.id == job_id, CalculationJob.status == CalculationJobStatus.RUNNING)
+                .values(status=CalculationJobStatus.COMPLETED, progress=1.0, finished_at=datetime.utcnow())
+            ).rowcount
+            if not completed:
+                raise CalculationJobLost(f"Zadanie obliczeniowe {job_id} zostało przerwane - wyniki nie zostały zapisane")
+        open_read_primary_windows(session, window_keys(user_id, calculated_ids))
+    
+    try:
+        results = calculate_locked_mrp_batch(
+            db, list(running), user_id, explosion_mode, before_commit=complete_jobs, skip_in_progress=False
+        )
+    except Exception as e:
+        db.rollback()
+        status_db.rollback()
+        if isinstance(e, (CalculationLockLost, CalculationJobLost)):
+            logger.warning(f"Partia zadań obliczeniowych: {e}")
+        elif not isinstance(e, ValueError):
+            logger.exception("Błąd partii zadań obliczeniowych")
+        for job, _ in running.values():
+            _fail_job(status_db, job, str(e))
+        return
+    
+    for material_requirement_id, (job, _) in running.items():
+        result = results[material_requirement_id]
+        if result["status"] == "failed":
+            _fail_job(status_db, job, result["error"])
+        else:
+            status_db.expire(job)
+
+
+def recover_interrupted_jobs(db: Session) -> int:
+    """
+    Kończy błędem zadania obliczeniowe przerwane przez zatrzymanie aplikacji (wywoływana przy starcie).
+    
+    Zadania oczekujące i wykonywane znajdowały się w puli zatrzymanego procesu, więc nie zostaną
+    już wykonane - bez tego zapotrzebowania pozostawałyby w statusie QUEUED lub CALCULATING
+    do czasu uznania zadań za porzucone. Zapotrzebowania wracają do statusu sprzed zlecenia
+    obliczeń. Zadania i zapotrzebowania, których blokadę obliczeń trzyma inny działający proces,
+    nie są zmieniane.
+    
+    Returns:
+        Liczba zadań oznaczonych jako przerwane
+    """
+    bind = db.get_bind()
+    interrupted = 0
+    active_jobs = db.query(CalculationJob).filter(
+        CalculationJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(CalculationJob.id).all()
+    for job in active_jobs:
+        with requirement_lock(bind, job.material_requirement_id, wait=False) as lock:
+            if lock and _fail_job(db, job, "Zadanie obliczeniowe zostało przerwane przez restart aplikacji"):
+                interrupted += 1
+    
+    # Zapotrzebowania pozostawione w toku obliczeń bez aktywnego zadania
+    stale_requirement_ids = [
+        material_requirement_id for (material_requirement_id,) in db.query(MaterialRequirement.id).filter(
+            MaterialRequirement.status.in_((MaterialRequirementStatus.QUEUED, MaterialRequirementStatus.CALCULATING)),
+            ~db.query(CalculationJob).filter(
+                CalculationJob.material_requirement_id == MaterialRequirement.id,
+                CalculationJob.status.in_(ACTIVE_JOB_STATUSES)
+            ).exists()
+        )
+    ]
+    for material_requirement_id in stale_requirement_ids:
+        with requirement_lock(bind, material_requirement_id, wait=False) as lock:
+            if lock:
+                _restore_requirement_status(db, material_requirement_id)
+                db.commit()
+    
+    if interrupted:
+        logger.warning(f"Zadania obliczeniowe przerwane przez restart aplikacji: {interrupted}")
+    return interrupted
+
+
+def _touch_job(job_id: int) -> bool:
+    # Oznaczenie wykonywanego zadania jako aktywnego; False - zadanie zostało już zakończone
+    with engine.begin() as connection:
+        return connection.execute(
+            update(CalculationJob.__table__)
+            .where(
+                CalculationJob.__table__.c.id == job_id,
+                CalculationJob.__table__.c.status == CalculationJobStatus.RUNNING
+            )
+            .values(updated_at=datetime.utcnow())
+        ).rowcount == 1
+
+
+def _fail_job(status_db: Session, job: CalculationJob, error: str) -> bool:
+    # Zadanie zakończone w międzyczasie (np. uznane za porzucone przez inny proces) nie jest zmieniane;
+    # False - zadanie było już zakończone
+    failed = status_db.execute(
+        update(CalculationJob)
+        .where(CalculationJob.id == job.id, CalculationJob.status.in_(ACTIVE_JOB_STATUSES))
+        .values(status=CalculationJobStatus.FAILED, error=error, finished_at=datetime.utcnow())
+    ).rowcount
+    if failed:
+        _restore_requirement_status(status_db, job.material_requirement_id)
+    status_db.commit()
+    return failed == 1
+
+
+def _restore_requirement_status(db: Session, material_requirement_id: int) -> None:
+    # Przywrócenie statusu zapotrzebowania sprzed zlecenia obliczeń
+    material_requirement = db.query(MaterialRequirement).filter(
+        MaterialRequirement.id == material_requirement_id
+    ).first()
+    if material_requirement:
+        db.refresh(material_requirement)
+        material_requirement.status = (
+            MaterialRequirementStatus.CALCULATED if material_requirement.calculation_date
+            else MaterialRequirementStatus.DRAFT
+        )
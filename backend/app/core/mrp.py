@@ -1,33 +1,84 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Iterator, Optional, Set, Tuple
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session, selectinload
 import logging
+import time
 
-from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementStatus
+from app.core.bom_graph import BOMGraph, load_bom_graph
+from app.core.calculation_lock import CalculationLockLost, requirement_lock
+from app.core.config import settings
+from app.core.explosion_cache import ExplosionCache, explode_per_unit, explosion_cache
+from app.core.inventory import ScheduledReceipt, load_scheduled_receipts
+from app.core.net_change import (
+    affected_products, calculation_parameters, changed_product_ids,
+    relevant_products, upsert_requirement_items
+)
+from app.core.parallel_explosion import explode_units_parallel
+from app.core.pegging import build_pegging_rows, delete_pegging, insert_pegging, link_pegging_items
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementStatus, PlanningBucket
 from app.models.order import Order, OrderStatus
-from app.models.product import Product, ProductType
-from app.models.bom import BOM, BOMItem
+from app.models.product import ProductType
 
 
 logger = logging.getLogger(__name__)
 
+# Dostępne silniki eksplozji BOM:
+# - "cached": skalowanie spłaszczonych rozwinięć zespołów przechowywanych w pamięci podręcznej
+# - "llc": eksplozja poziomami według kodów niskiego poziomu (każdy zespół rozwijany raz)
+# - "recursive": referencyjna eksplozja rekurencyjna, rozwijająca zespół osobno dla każdego rodzica
+# - "sparse": wektorowa eksplozja na macierzy rzadkiej (wymaga numpy i scipy)
+EXPLOSION_MODES = ("cached", "llc", "recursive", "sparse")
+
 
 def calculate_mrp(
     db: Session,
     material_requirement_id: int,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    explosion_mode: Optional[str] = None,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    net_change: bool = False,
+    parallel_workers: Optional[int] = None,
+    before_commit: Optional[Callable[[Session], None]] = None
 ) -> MaterialRequirement:
     """
     Główna funkcja obliczająca zapotrzebowanie materiałowe na podstawie ID zapotrzebowania.
     
+    Struktury BOM są ładowane jednorazowo do migawki grafu (BOMGraph), a cała
+    eksplozja odbywa się w pamięci - sesja jest używana ponownie dopiero przy zapisie wyników.
+    
+    W trybie net-change przeliczane są tylko produkty dotknięte zmianami zamówień, list BOM
+    i produktów od poprzedniego obliczenia, a zapisywane są wyłącznie zmienione pozycje.
+    Jeśli poprzednie obliczenie nie istnieje lub zmieniły się parametry zapotrzebowania,
+    wykonywane jest pełne przeliczenie (regeneracyjne).
+    
+    Z parallel_workers > 1 silnik "cached" rozwija produkty końcowe w puli procesów;
+    wynik jest identyczny z obliczeniem sekwencyjnym.
+    
     Args:
         db: Sesja bazy danych
         material_requirement_id: ID zapotrzebowania materiałowego
         user_id: ID użytkownika wykonującego obliczenia
+        explosion_mode: Silnik eksplozji BOM (domyślnie settings.MRP_EXPLOSION_MODE)
+        progress_callback: Funkcja informowana o postępie obliczeń (wartość 0-1)
+        net_change: Czy przeliczyć tylko zmiany od poprzedniego obliczenia
+        parallel_workers: Liczba procesów eksplozji (domyślnie settings.MRP_PARALLEL_WORKERS)
+        before_commit: Funkcja wywoływana z sesją tuż przed zatwierdzeniem transakcji zapisu
+            (np. sprawdzenie, czy blokada obliczeń nie została utracona); wyjątek przerywa zapis
         
     Returns:
         Zaktualizowane zapotrzebowanie materiałowe
     """
+    explosion_mode = explosion_mode or settings.MRP_EXPLOSION_MODE
+    if explosion_mode not in EXPLOSION_MODES:
+        raise ValueError(f"Nieznany tryb eksplozji BOM: {explosion_mode}")
+    workers = parallel_workers if parallel_workers is not None else settings.MRP_PARALLEL_WORKERS
+    workers = max(1, workers) if explosion_mode == "cached" else 1
+    
+    started_at = time.perf_counter()
+    snapshot_at = datetime.utcnow()
+    
     # Pobranie obiektu zapotrzebowania materiałowego
     material_requirement = db.query(MaterialRequirement).filter(
         MaterialRequirement.id == material_requirement_id
@@ -46,8 +97,8 @@ def calculate_mrp(
     
     order_ids = [link.order_id for link in order_links]
     
-    # Pobranie zamówień
-    orders = db.query(Order).filter(
+    # Pobranie zamówień wraz z pozycjami
+    orders = db.query(Order).options(selectinload(Order.items)).filter(
         Order.id.in_(order_ids),
         Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.IN_PRODUCTION])
     ).all()
@@ -55,108 +106,927 @@ def calculate_mrp(
     if not orders:
         raise ValueError("Nie znaleziono potwierdzonych zamówień do obliczenia zapotrzebowania")
     
-    # Usunięcie istniejących pozycji zapotrzebowania
-    db.query(MaterialRequirementItem).filter(
-        MaterialRequirementItem.material_requirement_id == material_requirement_id
-    ).delete()
+    # Unieważnienie rozwinięć zmienionych w innych procesach - przed wczytaniem grafu, aby
+    # rozwinięcia z grafu sprzed późniejszej zmiany nie trafiły do pamięci podręcznej
+    cache_generation = explosion_cache.sync(db) if explosion_mode == "cached" else None
+    # Migawka grafu BOM wraz z danymi produktów z pozycji zamówień
+    graph = load_bom_graph(
+        db, product_ids={order_item.product_id for order in orders for order_item in order.items}
+    )
+    _report_progress(progress_callback, 0.2)
+    
+    # Zakres obliczeń net-change: None oznacza pełne przeliczenie
+    parameters = calculation_parameters(material_requirement, order_ids)
+    changed = changed_product_ids(db, material_requirement, parameters) if net_change else None
+    affected: Optional[set] = None
+    if changed is not None:
+        affected = affected_products(graph, changed)
+        graph = graph.subgraph(relevant_products(graph, affected))
+    
+    components_demand = explode_orders(
+        graph, orders, material_requirement, explosion_mode, workers, cache_generation
+    )
+    exploded_at = time.perf_counter()
+    _report_progress(progress_callback, 0.6)
+    
+    receipts = load_scheduled_receipts(db, components_demand) if material_requirement.consider_stock else {}
+    item_rows = requirement_item_rows(material_requirement, graph, components_demand, affected, receipts)
+    pegging_rows = build_pegging_rows(
+        graph, orders, material_requirement_id, material_requirement.planning_end_date, affected
+    )
+    
+    _report_progress(progress_callback, 0.8)
+    
+    with count_statements(db) as statements:
+        if affected is None:
+            # Zastąpienie pozycji: jedno usunięcie i jeden zbiorczy insert w ramach jednej transakcji
+            delete_pegging(db, [material_requirement_id])
+            db.query(MaterialRequirementItem).filter(
+                MaterialRequirementItem.material_requirement_id == material_requirement_id
+            ).delete(synchronize_session=False)
+            if item_rows:
+                # Insert na poziomie tabeli - jedno executemany niezależnie od wartości NULL w wierszach
+                db.execute(insert(MaterialRequirementItem.__table__), item_rows)
+            item_changes = {"inserted": len(item_rows)}
+        else:
+            # Net-change: zapis wyłącznie różnic dla produktów dotkniętych zmianami
+            delete_pegging(db, [material_requirement_id], affected)
+            item_changes = upsert_requirement_items(db, material_requirement_id, item_rows, affected)
+        
+        # Pegging - powiązanie zapotrzebowania z pozycjami zamówień, z których wynika
+        link_pegging_items(
+            db, [material_requirement_id], pegging_rows,
+            lambda _, product_id, required_date: (product_id, requirement_period(material_requirement, required_date))
+        )
+        insert_pegging(db, pegging_rows)
+    
+    # Aktualizacja zapotrzebowania materiałowego
+    material_requirement.status = MaterialRequirementStatus.CALCULATED
+    material_requirement.calculation_date = datetime.utcnow()
+    material_requirement.calculation_metadata = {
+        "mode": "regenerative" if affected is None else "net_change",
+        "explosion_mode": explosion_mode,
+        "snapshot_at": snapshot_at.isoformat(),
+        "parameters": parameters,
+        "orders": len(orders),
+        "changed_products": None if changed is None else len(changed),
+        "parallel_workers": workers,
+        "demanded_products": len(components_demand),
+        "items": item_changes,
+        "pegging": len(pegging_rows),
+        "persist_statements": statements["count"],
+        "explosion_ms": round((exploded_at - started_at) * 1000, 1),
+        "persist_ms": round((time.perf_counter() - exploded_at) * 1000, 1),
+    }
+    if user_id:
+        material_requirement.user_id = user_id
+    
+    if before_commit:
+        db.flush()
+        before_commit(db)
+    db.commit()
+    db.expire(material_requirement, ["items"])
+    db.refresh(material_requirement)
+    
+    return material_requirement
+
+
+def calculate_mrp_batch(
+    db: Session,
+    material_requirement_ids: List[int],
+    user_id: Optional[int] = None,
+    explosion_mode: Optional[str] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Oblicza wiele zapotrzebowań materiałowych w jednym przebiegu (pełne przeliczenie).
+    
+    Wszystkie zapotrzebowania korzystają z jednej migawki grafu BOM, a zamówienia całej partii
+    są rozwijane jedną eksplozją (explode_batch_orders) - zamówienie powiązane z kilkoma
+    zapotrzebowaniami jest rozwijane tylko raz (dla danej daty zapotrzebowania).
+    Wyniki wszystkich zapotrzebowań są zapisywane w jednej transakcji.
+    Błąd walidacji jednego zapotrzebowania nie przerywa obliczeń pozostałych.
+    Zapotrzebowania, których blokada obliczeń jest zajęta (obliczenia w toku w innym
+    zadaniu lub procesie), są pomijane ze statusem "failed". Blokady są przedłużane w tle
+    przez cały czas obliczeń; jeśli którakolwiek zostanie utracona, wyniki partii nie są zapisywane.
+    
+    Args:
+        db: Sesja bazy danych
+        material_requirement_ids: Lista ID zapotrzebowań materiałowych
+        user_id: ID użytkownika wykonującego obliczenia
+        explosion_mode: Silnik eksplozji BOM (domyślnie settings.MRP_EXPLOSION_MODE)
+        
+    Returns:
+        Słownik: ID zapotrzebowania -> {"status": "calculated" | "failed", "error": opis błędu}
+    """
+    requirement_ids = list(dict.fromkeys(material_requirement_ids))
+    with ExitStack() as locks:
+        held_locks = {}
+        for material_requirement_id in requirement_ids:
+            lock = locks.enter_context(
+                requirement_lock(db.get_bind(), material_requirement_id, wait=False, heartbeat=True)
+            )
+            if lock:
+                held_locks[material_requirement_id] = lock
+        
+        def verify_locks(session: Session, calculated_ids: List[int]) -> None:
+            for lock in held_locks.values():
+                lock.verify(session.connection())
+        
+        try:
+            results = calculate_locked_mrp_batch(
+                db, list(held_locks), user_id, explosion_mode, verify_locks
+            ) if held_locks else {}
+        except CalculationLockLost as e:
+            db.rollback()
+            results = {material_requirement_id: {"status": "failed", "error": str(e)} for material_requirement_id in held_locks}
+    
+    in_progress = {"status": "failed", "error": "Obliczenia zapotrzebowania są już w toku"}
+    return {
+        material_requirement_id: results.get(material_requirement_id, in_progress)
+        for material_requirement_id in requirement_ids
+    }
+
+
+def calculate_locked_mrp_batch(
+    db: Session,
+    material_requirement_ids: List[int],
+    user_id: Optional[int] = None,
+    explosion_mode: Optional[str] = None,
+    before_commit: Optional[Callable[[Session, List[int]], None]] = None,
+    skip_in_progress: bool = True
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Obliczenia partii zapotrzebowań (jak calculate_mrp_batch), których blokady obliczeń
+    utrzymuje wywołujący.
+    
+    Args:
+        db: Sesja bazy danych
+        material_requirement_ids: Lista ID zapotrzebowań materiałowych
+        user_id: ID użytkownika wykonującego obliczenia
+        explosion_mode: Silnik eksplozji BOM (domyślnie settings.MRP_EXPLOSION_MODE)
+        before_commit: Funkcja wywoływana z sesją i ID obliczonych zapotrzebowań tuż przed
+            zatwierdzeniem transakcji zapisu; wyjątek przerywa zapis
+        skip_in_progress: Czy pomijać zapotrzebowania oczekujące na obliczenia lub obliczane
+            (False - status nadało zadanie obliczeniowe wywołującego)
+        
+    Returns:
+        Słownik: ID zapotrzebowania -> {"status": "calculated" | "failed", "error": opis błędu}
+    """
+    explosion_mode = explosion_mode or settings.MRP_EXPLOSION_MODE
+    if explosion_mode not in EXPLOSION_MODES:
+        raise ValueError(f"Nieznany tryb eksplozji BOM: {explosion_mode}")
+    
+    started_at = time.perf_counter()
+    snapshot_at = datetime.utcnow()
+    requirement_ids = list(dict.fromkeys(material_requirement_ids))
+    results: Dict[int, Dict[str, Any]] = {}
+    
+    def fail(material_requirement_id: int, error: str) -> None:
+        results[material_requirement_id] = {"status": "failed", "error": error}
+    
+    # Zapotrzebowania, powiązania i zamówienia - po jednym zapytaniu dla całej partii
+    requirements = {
+        material_requirement.id: material_requirement
+        for material_requirement in db.query(MaterialRequirement).filter(
+            MaterialRequirement.id.in_(requirement_ids)
+        )
+    }
+    order_ids_by_requirement: Dict[int, List[int]] = {}
+    for material_requirement_id, order_id in db.query(
+        MaterialRequirementOrder.material_requirement_id, MaterialRequirementOrder.order_id
+    ).filter(MaterialRequirementOrder.material_requirement_id.in_(requirement_ids)):
+        order_ids_by_requirement.setdefault(material_requirement_id, []).append(order_id)
+    
+    all_order_ids = {order_id for order_ids in order_ids_by_requirement.values() for order_id in order_ids}
+    orders = {
+        order.id: order
+        for order in db.query(Order).options(selectinload(Order.items)).filter(
+            Order.id.in_(all_order_ids),
+            Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.IN_PRODUCTION])
+        )
+    } if all_order_ids else {}
+    
+    cache_generation = explosion_cache.sync(db) if explosion_mode == "cached" else None
+    # Jedna migawka grafu BOM dla wszystkich zapotrzebowań
+    graph = load_bom_graph(
+        db, product_ids={order_item.product_id for order in orders.values() for order_item in order.items}
+    )
+    # Przyjęcia planowane wszystkich produktów - jedno zapytanie dla całej partii
+    receipts = load_scheduled_receipts(db)
+    
+    # Zapotrzebowania do obliczenia wraz z zamówieniami (ID zamówienia, data zapotrzebowania)
+    pending: Dict[int, Tuple[MaterialRequirement, List[int], List[Order], List[Tuple[int, Optional[datetime]]]]] = {}
+    batch_orders: Dict[Tuple[int, Optional[datetime]], Order] = {}
+    calculated: Dict[int, Dict[str, Any]] = {}
+    item_rows: List[Dict[str, Any]] = []
+    pegging_rows: List[Dict[str, Any]] = []
+    
+    for material_requirement_id in requirement_ids:
+        material_requirement = requirements.get(material_requirement_id)
+        if material_requirement is None:
+            fail(material_requirement_id, f"Nie znaleziono zapotrzebowania materiałowego o ID {material_requirement_id}")
+            continue
+        if skip_in_progress and material_requirement.status in (
+            MaterialRequirementStatus.QUEUED, MaterialRequirementStatus.CALCULATING
+        ):
+            fail(material_requirement_id, "Obliczenia zapotrzebowania są już w toku")
+            continue
+        order_ids = order_ids_by_requirement.get(material_requirement_id)
+        if not order_ids:
+            fail(material_requirement_id, f"Zapotrzebowanie materiałowe {material_requirement_id} nie ma powiązanych zamówień")
+            continue
+        requirement_orders = [orders[order_id] for order_id in order_ids if order_id in orders]
+        if not requirement_orders:
+            fail(material_requirement_id, "Nie znaleziono potwierdzonych zamówień do obliczenia zapotrzebowania")
+            continue
+        
+        keys = []
+        for order in requirement_orders:
+            key = (order.id, order.required_date or material_requirement.planning_end_date)
+            batch_orders[key] = order
+            keys.append(key)
+        pending[material_requirement_id] = (material_requirement, order_ids, requirement_orders, keys)
+    
+    # Jedna eksplozja zamówień całej partii
+    try:
+        order_demands = explode_batch_orders(graph, batch_orders, explosion_mode, cache_generation)
+    except ValueError as e:
+        for material_requirement_id in pending:
+            fail(material_requirement_id, str(e))
+        pending = {}
+    
+    for material_requirement_id, (material_requirement, order_ids, requirement_orders, keys) in pending.items():
+        try:
+            components_demand: Dict[int, Dict[str, Any]] = {}
+            for key in keys:
+                _merge_demand(components_demand, order_demands[key])
+            rows = requirement_item_rows(material_requirement, graph, components_demand, receipts=receipts)
+            requirement_pegging = build_pegging_rows(
+                graph, requirement_orders, material_requirement_id, material_requirement.planning_end_date
+            )
+        except ValueError as e:
+            fail(material_requirement_id, str(e))
+            continue
+        
+        item_rows.extend(rows)
+        pegging_rows.extend(requirement_pegging)
+        calculated[material_requirement_id] = {
+            "parameters": calculation_parameters(material_requirement, order_ids),
+            "orders": len(requirement_orders),
+            "demanded_products": len(components_demand),
+            "items": {"inserted": len(rows)},
+            "pegging": len(requirement_pegging),
+        }
+    
+    exploded_at = time.perf_counter()
+    if not calculated:
+        return {material_requirement_id: results[material_requirement_id] for material_requirement_id in requirement_ids}
+    
+    # Zapis wyników całej partii w jednej transakcji
+    with count_statements(db) as statements:
+        delete_pegging(db, list(calculated))
+        db.query(MaterialRequirementItem).filter(
+            MaterialRequirementItem.material_requirement_id.in_(calculated)
+        ).delete(synchronize_session=False)
+        if item_rows:
+            db.execute(insert(MaterialRequirementItem.__table__), item_rows)
+        link_pegging_items(
+            db, list(calculated), pegging_rows,
+            lambda material_requirement_id, product_id, required_date: (
+                material_requirement_id, product_id,
+                requirement_period(requirements[material_requirement_id], required_date)
+            )
+        )
+        insert_pegging(db, pegging_rows)
+    
+    calculation_date = datetime.utcnow()
+    for material_requirement_id, summary in calculated.items():
+        material_requirement = requirements[material_requirement_id]
+        material_requirement.status = MaterialRequirementStatus.CALCULATED
+        material_requirement.calculation_date = calculation_date
+        material_requirement.calculation_metadata = {
+            "mode": "regenerative",
+            "explosion_mode": explosion_mode,
+            "snapshot_at": snapshot_at.isoformat(),
+            "changed_products": None,
+            "batch_size": len(calculated),
+            "exploded_orders": len(batch_orders),
+            **summary,
+            "persist_statements": statements["count"],
+            "explosion_ms": round((exploded_at - started_at) * 1000, 1),
+            "persist_ms": round((time.perf_counter() - exploded_at) * 1000, 1),
+        }
+        if user_id:
+            material_requirement.user_id = user_id
+        results[material_requirement_id] = {"status": "calculated", "error": None}
+    
+    if before_commit:
+        db.flush()
+        before_commit(db, list(calculated))
+    db.commit()
+    for material_requirement in requirements.values():
+        db.expire(material_requirement, ["items"])
+    
+    return {material_requirement_id: results[material_requirement_id] for material_requirement_id in requirement_ids}
+
+
+def _report_progress(progress_callback: Optional[Callable[[float], None]], progress: float) -> None:
+    if progress_callback:
+        progress_callback(progress)
+
+
+@contextmanager
+def count_statements(db: Session) -> Iterator[Dict[str, int]]:
+    """
+    Liczy zapytania SQL wysłane przez połączenie sesji w obrębie bloku.
+    """
+    connection = db.connection()
+    counter = {"count": 0}
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+    
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+def explode_orders(
+    graph: BOMGraph,
+    orders: List[Order],
+    material_requirement: MaterialRequirement,
+    explosion_mode: str,
+    workers: int = 1,
+    cache_generation: Optional[int] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Wyznacza zapotrzebowanie brutto na komponenty dla pozycji zamówień.
+    
+    Produkty końcowe z aktywną listą BOM są rozwijane wybranym silnikiem eksplozji,
+    pozostałe produkty trafiają do zapotrzebowania bezpośrednio. cache_generation to
+    pokolenie pamięci podręcznej rozwinięć z synchronizacji przed wczytaniem grafu.
     
+    Returns:
+        Słownik zbiorczego zapotrzebowania na komponenty (ID produktu -> dane zapotrzebowania)
+    """
     # Słownik do przechowywania zbiorczego zapotrzebowania na komponenty
     components_demand = {}
     
+    # Zapotrzebowanie na produkty końcowe, które wymaga eksplozji BOM
+    demands: List[Tuple[int, float, Optional[datetime]]] = []
+    
     # Przetwarzanie każdego zamówienia
     for order in orders:
-        for order_item in order.items:
-            product = order_item.product
-            quantity = order_item.quantity
-            
-            # Jeśli to produkt końcowy, oblicz zapotrzebowanie na komponenty
-            if product.product_type == ProductType.FINAL:
-                # Znajdź aktywną listę BOM dla produktu
-                bom = db.query(BOM).filter(
-                    BOM.product_id == product.id,
-                    BOM.is_active == True
-                ).first()
-                
-                if bom:
-                    # Rekurencyjne obliczenie zapotrzebowania dla produktu
-                    calculate_component_requirements(
-                        db=db,
-                        components_demand=components_demand,
-                        product_id=product.id,
-                        quantity=quantity,
-                        required_date=order.required_date or material_requirement.planning_end_date,
-                        consider_stock=material_requirement.consider_stock,
-                        consider_min_stock=material_requirement.consider_min_stock
-                    )
-                else:
-                    logger.warning(f"Nie znaleziono aktywnej listy BOM dla produktu {product.id}")
+        required_date = order.required_date or material_requirement.planning_end_date
+        _collect_order_demand(graph, order, required_date, components_demand, demands)
+    
+    explode_demands(
+        graph=graph,
+        demands=demands,
+        components_demand=components_demand,
+        explosion_mode=explosion_mode,
+        consider_stock=material_requirement.consider_stock,
+        consider_min_stock=material_requirement.consider_min_stock,
+        workers=workers,
+        cache_generation=cache_generation
+    )
+    return components_demand
+
+
+def explode_batch_orders(
+    graph: BOMGraph,
+    orders: Dict[Tuple[int, Optional[datetime]], Order],
+    explosion_mode: str,
+    cache_generation: Optional[int] = None
+) -> Dict[Tuple[int, Optional[datetime]], Dict[int, Dict[str, Any]]]:
+    """
+    Wyznacza zapotrzebowanie brutto na komponenty dla zamówień wielu zapotrzebowań jedną eksplozją.
+    
+    Zapotrzebowanie wszystkich zamówień partii jest rozwijane razem (np. silnik "llc" rozwija
+    każdy zespół raz dla całej partii), a każda ilość jest oznaczona kluczem (ID zamówienia,
+    data zapotrzebowania), według którego wynik jest następnie rozdzielany. Eksplozja jest
+    liniowa, więc wynik dla zamówienia jest taki sam jak z explode_orders.
+    
+    Args:
+        graph: Migawka grafu BOM
+        orders: (ID zamówienia, data zapotrzebowania) -> zamówienie
+        explosion_mode: Silnik eksplozji BOM
+        cache_generation: Pokolenie pamięci podręcznej rozwinięć z synchronizacji przed wczytaniem grafu
+    
+    Returns:
+        (ID zamówienia, data zapotrzebowania) -> zapotrzebowanie na komponenty
+    """
+    # Zapotrzebowanie całej partii - w miejscu daty zapotrzebowania klucz zamówienia
+    batch_demand: Dict[int, Dict[str, Any]] = {}
+    demands: List[Tuple[int, float, Any]] = []
+    for key, order in orders.items():
+        _collect_order_demand(graph, order, key, batch_demand, demands)
+    
+    explode_demands(
+        graph=graph,
+        demands=demands,
+        components_demand=batch_demand,
+        explosion_mode=explosion_mode,
+        cache_generation=cache_generation
+    )
+    
+    order_demands: Dict[Tuple[int, Optional[datetime]], Dict[int, Dict[str, Any]]] = {key: {} for key in orders}
+    for product_id, demand_info in batch_demand.items():
+        for key, quantity in demand_info["quantities_by_date"].items():
+            _add_demand(order_demands[key], product_id, quantity, key[1])
+    return order_demands
+
+
+def _collect_order_demand(
+    graph: BOMGraph,
+    order: Order,
+    required_date: Any,
+    components_demand: Dict[int, Dict[str, Any]],
+    demands: List[Tuple[int, float, Any]]
+) -> None:
+    # Produkty końcowe z listą BOM trafiają do eksplozji, pozostałe - bezpośrednio do zapotrzebowania
+    for order_item in order.items:
+        product = graph.get_product(order_item.product_id)
+        if product is None:
+            continue
+        
+        # Jeśli to produkt końcowy, oblicz zapotrzebowanie na komponenty
+        if product.product_type == ProductType.FINAL:
+            if graph.has_bom(product.id):
+                demands.append((product.id, order_item.quantity, required_date))
             else:
-                # Jeśli to komponent lub materiał, dodaj go bezpośrednio
-                if product.id not in components_demand:
-                    components_demand[product.id] = {
-                        "required_quantity": 0,
-                        "required_date": order.required_date or material_requirement.planning_end_date
-                    }
-                
-                components_demand[product.id]["required_quantity"] += quantity
+                logger.warning(f"Nie znaleziono aktywnej listy BOM dla produktu {product.id}")
+        else:
+            # Jeśli to komponent lub materiał, dodaj go bezpośrednio
+            _add_demand(components_demand, product.id, order_item.quantity, required_date)
+
+
+def requirement_item_rows(
+    material_requirement: MaterialRequirement,
+    graph: BOMGraph,
+    components_demand: Dict[int, Dict[str, Any]],
+    affected: Optional[Set[int]] = None,
+    receipts: Optional[Dict[int, List[ScheduledReceipt]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Wiersze pozycji zapotrzebowania do zapisu, wyliczone na podstawie danych produktów z migawki.
     
-    # Tworzenie pozycji zapotrzebowania materiałowego na podstawie obliczonych wartości
+    Args:
+        affected: Produkty objęte przeliczeniem net-change (None - wszystkie produkty)
+        receipts: Przyjęcia planowane produktów (z load_scheduled_receipts)
+    """
+    item_rows = []
     for product_id, demand_info in components_demand.items():
-        product = db.query(Product).get(product_id)
+        product = graph.get_product(product_id)
         if not product:
             continue
+        if affected is not None and product_id not in affected:
+            continue
+        
+        product_receipts = receipts.get(product_id, []) if receipts else []
+        for item_values in build_requirement_items(material_requirement, product, demand_info, product_receipts):
+            item_rows.append({
+                "material_requirement_id": material_requirement.id,
+                "product_id": product_id,
+                **item_values
+            })
+    return item_rows
+
+
+def build_requirement_items(
+    material_requirement: MaterialRequirement,
+    product: Any,
+    demand_info: Dict[str, Any],
+    receipts: Optional[List[ScheduledReceipt]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Wylicza wartości pozycji zapotrzebowania (netting) dla jednego produktu.
+    
+    Zapotrzebowanie jest pokrywane prognozowanym stanem dostępnym: saldem magazynowym
+    oraz przyjęciami planowanymi (otwartymi zamówieniami zakupu), które dotrą najpóźniej
+    w dniu zapotrzebowania. Przyjęcia są uwzględniane razem ze stanem (consider_stock).
+    
+    Bez okresów planowania (PlanningBucket.NONE) całe zapotrzebowanie produktu trafia do
+    jednej pozycji z najwcześniejszą datą. W trybie dziennym lub tygodniowym zapotrzebowanie
+    jest dzielone na okresy, a prognozowany stan magazynowy przechodzi między kolejnymi okresami
+    i rośnie o przyjęcia planowane w danym okresie.
+    
+    Args:
+        material_requirement: Zapotrzebowanie materiałowe (parametry obliczeń)
+        product: Produkt (model lub ProductInfo)
+        demand_info: Zapotrzebowanie brutto na produkt z eksplozji BOM
+        receipts: Przyjęcia planowane produktu posortowane po dacie dostawy
         
+    Returns:
+        Lista słowników z wartościami pól MaterialRequirementItem
+    """
+    # Obliczenie dostępnej ilości z uwzględnieniem minimalnych stanów
+    available_quantity = 0
+    if material_requirement.consider_stock:
+        available_quantity = product.quantity_in_stock or 0
+        if material_requirement.consider_min_stock and product.minimum_stock > 0:
+            available_quantity = max(0, available_quantity - product.minimum_stock)
+    else:
+        receipts = None
+    
+    # Dostawy po końcu horyzontu planowania nie pokrywają zapotrzebowania
+    planning_end_date = material_requirement.planning_end_date
+    receipts = [
+        receipt for receipt in receipts or []
+        if planning_end_date is None or receipt.receipt_date <= planning_end_date
+    ]
+    
+    lead_time_days = product.lead_time_days or 0
+    bucket = material_requirement.planning_bucket or PlanningBucket.NONE
+    
+    if bucket == PlanningBucket.NONE:
         required_quantity = demand_info["required_quantity"]
         required_date = demand_info["required_date"]
         
-        # Obliczenie dostępnej ilości z uwzględnieniem minimalnych stanów
-        available_quantity = 0
-        if material_requirement.consider_stock:
-            available_quantity = product.quantity_in_stock
-            if material_requirement.consider_min_stock and product.minimum_stock > 0:
-                available_quantity = max(0, available_quantity - product.minimum_stock)
+        # Przyjęcia planowane dostępne w dniu zapotrzebowania
+        available_quantity += sum(
+            receipt.quantity for receipt in receipts
+            if required_date is None or receipt.receipt_date <= required_date
+        )
         
         # Obliczenie ilości do zamówienia
         quantity_to_procure = max(0, required_quantity - available_quantity)
         
         # Jeśli nie ma potrzeby zamawiania, pomijamy
         if quantity_to_procure <= 0 and not material_requirement.consider_min_stock:
+            return []
+        
+        return [_item_values(required_quantity, available_quantity, quantity_to_procure, required_date, lead_time_days)]
+    
+    periods = _bucket_demand(demand_info["quantities_by_date"], bucket,
+                             material_requirement.planning_start_date, planning_end_date)
+    receipts_by_period: Dict[datetime, float] = {}
+    for receipt in receipts:
+        period_start = _bucket_period(receipt.receipt_date, bucket, material_requirement.planning_start_date, planning_end_date)
+        receipts_by_period[period_start] = receipts_by_period.get(period_start, 0) + receipt.quantity
+    
+    items = []
+    projected_on_hand = available_quantity
+    for period_start in sorted(set(periods) | set(receipts_by_period)):
+        gross_quantity, required_date = periods.get(period_start, (0, None))
+        
+        # Netting w okresie - stan magazynowy wraz z dostawami okresu przechodzi do kolejnych okresów
+        on_hand = projected_on_hand + receipts_by_period.get(period_start, 0)
+        net_quantity = max(0, gross_quantity - on_hand)
+        projected_on_hand = max(0, on_hand - gross_quantity)
+        
+        # Pozycja powstaje tylko dla okresów z zapotrzebowaniem netto
+        if net_quantity <= 0:
             continue
         
-        # Obliczenie daty planowanego zamówienia z uwzględnieniem lead time
-        planned_order_date = None
-        if required_date and product.lead_time_days > 0:
-            planned_order_date = required_date - timedelta(days=product.lead_time_days)
-        
-        # Dodanie pozycji zapotrzebowania
-        material_requirement_item = MaterialRequirementItem(
-            material_requirement_id=material_requirement_id,
-            product_id=product_id,
-            required_quantity=required_quantity,
-            available_quantity=available_quantity,
-            quantity_to_procure=quantity_to_procure,
-            requirement_date=required_date,
-            planned_order_date=planned_order_date,
-            is_available=(quantity_to_procure <= 0),
-            notes=f"Lead time: {product.lead_time_days} dni" if product.lead_time_days > 0 else None
+        item = _item_values(gross_quantity, on_hand, net_quantity, required_date or period_start, lead_time_days)
+        period_note = f"Okres od {period_start.strftime('%Y-%m-%d')}"
+        item["notes"] = f"{period_note}; {item['notes']}" if item["notes"] else period_note
+        items.append(item)
+    
+    return items
+
+
+def _item_values(
+    required_quantity: float,
+    available_quantity: float,
+    quantity_to_procure: float,
+    required_date: Optional[datetime],
+    lead_time_days: int
+) -> Dict[str, Any]:
+    """
+    Wartości pojedynczej pozycji zapotrzebowania.
+    """
+    # Obliczenie daty planowanego zamówienia z uwzględnieniem lead time
+    planned_order_date = None
+    if required_date and lead_time_days > 0:
+        planned_order_date = required_date - timedelta(days=lead_time_days)
+    
+    return {
+        "required_quantity": required_quantity,
+        "available_quantity": available_quantity,
+        "quantity_to_procure": quantity_to_procure,
+        "requirement_date": required_date,
+        "planned_order_date": planned_order_date,
+        "is_available": quantity_to_procure <= 0,
+        "notes": f"Lead time: {lead_time_days} dni" if lead_time_days > 0 else None
+    }
+
+
+def _bucket_demand(
+    quantities_by_date: Dict[Optional[datetime], float],
+    bucket: PlanningBucket,
+    planning_start_date: datetime,
+    planning_end_date: Optional[datetime]
+) -> Dict[datetime, Tuple[float, Optional[datetime]]]:
+    """
+    Grupuje zapotrzebowanie w okresy horyzontu planowania.
+    
+    Zapotrzebowanie przed początkiem horyzontu (lub bez daty) trafia do pierwszego okresu,
+    a po jego końcu - do ostatniego okresu.
+    
+    Returns:
+        Słownik: początek okresu -> (ilość brutto, najwcześniejsza data zapotrzebowania w okresie)
+    """
+    buckets: Dict[datetime, Tuple[float, Optional[datetime]]] = {}
+    for required_date, quantity in quantities_by_date.items():
+        period_start = _bucket_period(required_date, bucket, planning_start_date, planning_end_date)
+        
+        total, earliest = buckets.get(period_start, (0, None))
+        if required_date and (earliest is None or required_date < earliest):
+            earliest = required_date
+        buckets[period_start] = (total + quantity, earliest)
+    
+    return buckets
+
+
+def requirement_period(material_requirement: MaterialRequirement, required_date: Optional[datetime]) -> Optional[datetime]:
+    """
+    Początek okresu planowania, do którego trafia zapotrzebowanie z daną datą
+    (None, jeśli zapotrzebowanie nie jest dzielone na okresy).
+    """
+    bucket = material_requirement.planning_bucket or PlanningBucket.NONE
+    if bucket == PlanningBucket.NONE:
+        return None
+    return _bucket_period(
+        required_date, bucket, material_requirement.planning_start_date, material_requirement.planning_end_date
+    )
+
+
+def _bucket_period(
+    required_date: Optional[datetime],
+    bucket: PlanningBucket,
+    planning_start_date: datetime,
+    planning_end_date: Optional[datetime]
+) -> datetime:
+    """
+    Początek okresu dla daty zapotrzebowania ograniczonej do horyzontu planowania.
+    """
+    period_date = required_date or planning_start_date
+    period_date = max(period_date, planning_start_date)
+    if planning_end_date:
+        period_date = min(period_date, planning_end_date)
+    return _period_start(period_date, bucket)
+
+
+def _period_start(value: datetime, bucket: PlanningBucket) -> datetime:
+    """
+    Początek okresu (dnia lub tygodnia), do którego należy data.
+    """
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == PlanningBucket.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def explode_demands(
+    graph: BOMGraph,
+    demands: List[Tuple[int, float, Optional[datetime]]],
+    components_demand: Dict[int, Dict[str, Any]],
+    explosion_mode: str = "llc",
+    consider_stock: bool = True,
+    consider_min_stock: bool = True,
+    workers: int = 1,
+    cache_generation: Optional[int] = None
+) -> None:
+    """
+    Rozwija zapotrzebowanie na produkty końcowe wybranym silnikiem eksplozji.
+    
+    Args:
+        graph: Migawka grafu BOM
+        demands: Lista krotek (ID produktu, ilość, data zapotrzebowania)
+        components_demand: Słownik do przechowywania zbiorczego zapotrzebowania na komponenty
+        explosion_mode: Silnik eksplozji (jeden z EXPLOSION_MODES)
+        consider_stock: Czy uwzględniać stany magazynowe
+        consider_min_stock: Czy uwzględniać minimalne stany magazynowe
+        workers: Liczba procesów eksplozji równoległej (tylko silnik "cached")
+        cache_generation: Pokolenie pamięci podręcznej rozwinięć z ExplosionCache.sync()
+            wywołanego przed wczytaniem grafu (tylko silnik "cached")
+    """
+    if explosion_mode == "recursive":
+        # Kolejność poziomów z indeksu grafu BOM - przy cyklu obliczenia kończą się błędem zamiast rekurencji bez końca
+        graph.low_level_codes()
+        for product_id, quantity, required_date in demands:
+            calculate_component_requirements(
+                graph=graph,
+                components_demand=components_demand,
+                product_id=product_id,
+                quantity=quantity,
+                required_date=required_date,
+                consider_stock=consider_stock,
+                consider_min_stock=consider_min_stock
+            )
+    elif explosion_mode == "cached":
+        calculate_cached_requirements(graph, demands, components_demand, workers, cache_generation)
+    elif explosion_mode == "llc":
+        calculate_level_requirements(graph, demands, components_demand)
+    elif explosion_mode == "sparse":
+        calculate_sparse_requirements(graph, demands, components_demand)
+    else:
+        raise ValueError(f"Nieznany tryb eksplozji BOM: {explosion_mode}")
+
+
+def calculate_cached_requirements(
+    graph: BOMGraph,
+    demands: List[Tuple[int, float, Optional[datetime]]],
+    components_demand: Dict[int, Dict[str, Any]],
+    workers: int = 1,
+    cache_generation: Optional[int] = None
+) -> None:
+    """
+    Eksplozja BOM na podstawie spłaszczonych rozwinięć jednej sztuki zespołu.
+    
+    Rozwinięcia są pobierane z pamięci podręcznej (kluczowanej produktem i wersją aktywnej
+    listy BOM) i skalowane ilością zapotrzebowania. Dla wycinka grafu (net-change) używana
+    jest pamięć lokalna, ponieważ rozwinięcia wycinka nie są kompletne.
+    Wynik jest zgodny z calculate_component_requirements (z dokładnością do kolejności mnożenia).
+    
+    Przy workers > 1 rozwinięcia produktów końcowych są wyznaczane w puli procesów, a skalowanie
+    odbywa się w kolejności zapotrzebowań - wynik jest identyczny z obliczeniem sekwencyjnym.
+    
+    Args:
+        graph: Migawka grafu BOM
+        demands: Lista krotek (ID produktu, ilość, data zapotrzebowania)
+        components_demand: Słownik do przechowywania zbiorczego zapotrzebowania na komponenty
+        workers: Liczba procesów eksplozji
+        cache_generation: Pokolenie pamięci podręcznej z synchronizacji przed wczytaniem grafu
+    """
+    if graph.is_partial:
+        cache, cache_generation = ExplosionCache(max_size=len(graph.bom_ids)), None
+    else:
+        cache = explosion_cache
+    
+    explosions = {}
+    if workers > 1:
+        explosions = explode_units_parallel(
+            graph, [product_id for product_id, _, _ in demands if graph.has_bom(product_id)], cache, workers,
+            cache_generation
         )
+    
+    for product_id, quantity, required_date in demands:
+        if not graph.has_bom(product_id):
+            logger.warning(f"Nie znaleziono aktywnej listy BOM dla produktu {product_id}")
+            continue
         
-        db.add(material_requirement_item)
+        explosion = explosions.get(product_id) or explode_per_unit(graph, product_id, cache, cache_generation)
+        for component_id, unit_quantity in explosion.quantities.items():
+            _add_demand(components_demand, component_id, unit_quantity * quantity, required_date)
+
+
+def calculate_level_requirements(
+    graph: BOMGraph,
+    demands: List[Tuple[int, float, Optional[datetime]]],
+    components_demand: Dict[int, Dict[str, Any]]
+) -> None:
+    """
+    Eksplozja BOM poziomami według kodów niskiego poziomu.
     
-    # Aktualizacja zapotrzebowania materiałowego
-    material_requirement.status = MaterialRequirementStatus.CALCULATED
-    material_requirement.calculation_date = datetime.utcnow()
-    if user_id:
-        material_requirement.user_id = user_id
+    Zapotrzebowanie brutto na każdy zespół jest najpierw agregowane ze wszystkich
+    poziomów nadrzędnych, a dopiero potem zespół jest rozwijany - dzięki temu każdy
+    zespół (np. wspólny silnik) jest rozwijany dokładnie raz w ramach obliczeń.
+    Wynik jest zgodny z calculate_component_requirements.
     
-    db.commit()
-    db.refresh(material_requirement)
+    Args:
+        graph: Migawka grafu BOM
+        demands: Lista krotek (ID produktu, ilość, data zapotrzebowania)
+        components_demand: Słownik do przechowywania zbiorczego zapotrzebowania na komponenty
+    """
+    codes = graph.low_level_codes()
     
-    return material_requirement
+    # Poziom -> ID zespołu -> data zapotrzebowania -> ilość brutto
+    gross: Dict[int, Dict[int, Dict[Optional[datetime], float]]] = {}
+    
+    def add_gross(product_id: int, quantity: float, required_date: Optional[datetime]) -> None:
+        by_date = gross.setdefault(codes[product_id], {}).setdefault(product_id, {})
+        by_date[required_date] = by_date.get(required_date, 0) + quantity
+    
+    for product_id, quantity, required_date in demands:
+        if not graph.has_bom(product_id):
+            logger.warning(f"Nie znaleziono aktywnej listy BOM dla produktu {product_id}")
+            continue
+        add_gross(product_id, quantity, required_date)
+    
+    level = 0
+    while gross:
+        level_demand = gross.pop(level, {})
+        for product_id, by_date in level_demand.items():
+            for edge in graph.components(product_id):
+                # Jeśli komponent jest opcjonalny, pomijamy go
+                if edge.is_optional:
+                    continue
+                
+                is_assembly = graph.is_assembly(edge.component_id)
+                for required_date, quantity in by_date.items():
+                    component_quantity = edge.quantity * quantity
+                    if is_assembly:
+                        add_gross(edge.component_id, component_quantity, required_date)
+                    else:
+                        _add_demand(components_demand, edge.component_id, component_quantity, required_date)
+        level += 1
+
+
+def calculate_sparse_requirements(
+    graph: BOMGraph,
+    demands: List[Tuple[int, float, Optional[datetime]]],
+    components_demand: Dict[int, Dict[str, Any]]
+) -> None:
+    """
+    Wektorowa eksplozja BOM na macierzy rzadkiej produkt x produkt.
+    
+    Struktura aktywnych list BOM jest zapisywana jako macierz A, w której A[komponent, zespół]
+    to ilość komponentu na jednostkę zespołu. Zapotrzebowanie jest macierzą produkt x data,
+    a zapotrzebowanie na kolejne poziomy powstaje przez powtarzane mnożenie A @ X.
+    Wynik jest zgodny z calculate_component_requirements (z dokładnością do kolejności sumowania).
+    
+    Args:
+        graph: Migawka grafu BOM
+        demands: Lista krotek (ID produktu, ilość, data zapotrzebowania)
+        components_demand: Słownik do przechowywania zbiorczego zapotrzebowania na komponenty
+    """
+    try:
+        import numpy as np
+        from scipy import sparse
+    except ImportError:
+        raise ValueError("Tryb eksplozji \"sparse\" wymaga zainstalowanych pakietów numpy i scipy")
+    
+    explode = []
+    for product_id, quantity, required_date in demands:
+        if not graph.has_bom(product_id):
+            logger.warning(f"Nie znaleziono aktywnej listy BOM dla produktu {product_id}")
+            continue
+        explode.append((product_id, quantity, required_date))
+    if not explode:
+        return
+    
+    # Indeksy wierszy (produkty) i kolumn (daty zapotrzebowania)
+    product_ids = sorted(
+        set(graph.products) | set(graph.bom_ids) | {product_id for product_id, _, _ in explode}
+        | {edge.component_id for edges in graph.children.values() for edge in edges}
+    )
+    index = {product_id: position for position, product_id in enumerate(product_ids)}
+    dates = sorted({required_date for _, _, required_date in explode}, key=lambda d: (d is not None, d))
+    date_index = {required_date: position for position, required_date in enumerate(dates)}
+    size = len(product_ids)
+    
+    # Macierz struktury - tylko krawędzie, po których schodzi eksplozja
+    rows, cols, data = [], [], []
+    for parent_id, edges in graph.children.items():
+        if not graph.is_assembly(parent_id):
+            continue
+        for edge in edges:
+            if edge.is_optional:
+                continue
+            rows.append(index[edge.component_id])
+            cols.append(index[parent_id])
+            data.append(float(edge.quantity))
+    structure = sparse.csr_matrix((data, (rows, cols)), shape=(size, size))
+    # Wzorzec powiązań - pozwala zachować daty również dla zerowych ilości
+    pattern = sparse.csr_matrix((np.ones(len(data)), (rows, cols)), shape=(size, size))
+    
+    assembly_mask = np.array([graph.is_assembly(product_id) for product_id in product_ids], dtype=float)
+    leaf_mask = 1.0 - assembly_mask
+    assemblies = sparse.diags(assembly_mask)
+    leaves = sparse.diags(leaf_mask)
+    
+    current = sparse.csr_matrix(
+        ([float(quantity) for _, quantity, _ in explode],
+         ([index[product_id] for product_id, _, _ in explode],
+          [date_index[required_date] for _, _, required_date in explode])),
+        shape=(size, len(dates))
+    )
+    current_reach = current.copy()
+    current_reach.data = np.ones(len(current_reach.data))
+    
+    leaf_totals = sparse.csr_matrix((size, len(dates)))
+    leaf_reach = sparse.csr_matrix((size, len(dates)))
+    
+    depth = 0
+    while current_reach.nnz:
+        if depth > size:
+            raise ValueError("Wykryto cykl w strukturach BOM")
+        flow = structure @ current
+        flow_reach = pattern @ current_reach
+        leaf_totals = leaf_totals + leaves @ flow
+        leaf_reach = leaf_reach + leaves @ flow_reach
+        current = assemblies @ flow
+        current_reach = assemblies @ flow_reach
+        current_reach.eliminate_zeros()
+        depth += 1
+    
+    # Tylko niezerowe elementy - bez gęstej macierzy produkty x daty
+    totals: Dict[Tuple[int, int], float] = {}
+    leaf_totals = leaf_totals.tocoo()
+    for row, col, value in zip(leaf_totals.row, leaf_totals.col, leaf_totals.data):
+        totals[row, col] = totals.get((row, col), 0.0) + float(value)
+    leaf_reach = leaf_reach.tocoo()
+    for row, col in sorted(zip(leaf_reach.row, leaf_reach.col)):
+        _add_demand(components_demand, product_ids[row], totals.get((row, col), 0.0), dates[col])
 
 
 def calculate_component_requirements(
-    db: Session,
+    graph: BOMGraph,
     components_demand: Dict[int, Dict[str, Any]],
     product_id: int,
     quantity: float,
@@ -167,8 +1037,11 @@ def calculate_component_requirements(
     """
     Funkcja rekurencyjnie obliczająca zapotrzebowanie na komponenty dla danego produktu.
     
+    Referencyjna implementacja eksplozji (tryb "recursive") - zespół używany przez
+    kilku rodziców jest rozwijany osobno dla każdego z nich.
+    
     Args:
-        db: Sesja bazy danych
+        graph: Migawka grafu BOM
         components_demand: Słownik do przechowywania zbiorczego zapotrzebowania na komponenty
         product_id: ID produktu
         quantity: Ilość produktu
@@ -176,65 +1049,67 @@ def calculate_component_requirements(
         consider_stock: Czy uwzględniać stany magazynowe
         consider_min_stock: Czy uwzględniać minimalne stany magazynowe
     """
-    # Znajdź aktywną listę BOM dla produktu
-    bom = db.query(BOM).filter(
-        BOM.product_id == product_id,
-        BOM.is_active == True
-    ).first()
-    
-    if not bom:
+    if not graph.has_bom(product_id):
         logger.warning(f"Nie znaleziono aktywnej listy BOM dla produktu {product_id}")
         return
     
     # Przetwarzanie każdego komponentu z listy BOM
-    for bom_item in bom.items:
-        component = bom_item.component
-        component_quantity = bom_item.quantity * quantity
-        
+    for edge in graph.components(product_id):
         # Jeśli komponent jest opcjonalny, pomijamy go
-        if bom_item.is_optional:
+        if edge.is_optional:
             continue
         
+        component_quantity = edge.quantity * quantity
+        
         # Jeśli komponent jest złożony (ma własną listę BOM), rekurencyjnie oblicz zapotrzebowanie
-        if component.product_type in [ProductType.FINAL, ProductType.COMPONENT]:
-            sub_bom = db.query(BOM).filter(
-                BOM.product_id == component.id,
-                BOM.is_active == True
-            ).first()
-            
-            if sub_bom:
-                calculate_component_requirements(
-                    db=db,
-                    components_demand=components_demand,
-                    product_id=component.id,
-                    quantity=component_quantity,
-                    required_date=required_date,
-                    consider_stock=consider_stock,
-                    consider_min_stock=consider_min_stock
-                )
-            else:
-                # Jeśli komponent nie ma listy BOM, dodaj go do zapotrzebowania
-                if component.id not in components_demand:
-                    components_demand[component.id] = {
-                        "required_quantity": 0,
-                        "required_date": required_date
-                    }
-                
-                components_demand[component.id]["required_quantity"] += component_quantity
-                # Aktualizacja daty, jeśli bieżąca jest wcześniejsza
-                if required_date and (not components_demand[component.id]["required_date"] or 
-                                    required_date < components_demand[component.id]["required_date"]):
-                    components_demand[component.id]["required_date"] = required_date
+        if graph.is_assembly(edge.component_id):
+            calculate_component_requirements(
+                graph=graph,
+                components_demand=components_demand,
+                product_id=edge.component_id,
+                quantity=component_quantity,
+                required_date=required_date,
+                consider_stock=consider_stock,
+                consider_min_stock=consider_min_stock
+            )
         else:
-            # Komponent jest materiałem lub usługą, dodaj go do zapotrzebowania
-            if component.id not in components_demand:
-                components_demand[component.id] = {
-                    "required_quantity": 0,
-                    "required_date": required_date
-                }
-            
-            components_demand[component.id]["required_quantity"] += component_quantity
-            # Aktualizacja daty, jeśli bieżąca jest wcześniejsza
-            if required_date and (not components_demand[component.id]["required_date"] or 
-                                required_date < components_demand[component.id]["required_date"]):
-                components_demand[component.id]["required_date"] = required_date
+            # Komponent bez listy BOM, materiał lub usługa - dodaj go do zapotrzebowania
+            _add_demand(components_demand, edge.component_id, component_quantity, required_date)
+
+
+def _merge_demand(
+    components_demand: Dict[int, Dict[str, Any]],
+    other_demand: Dict[int, Dict[str, Any]]
+) -> None:
+    """
+    Dołącza zapotrzebowanie z innego rozwinięcia, zachowując rozbicie ilości według dat.
+    """
+    for product_id, demand_info in other_demand.items():
+        for required_date, quantity in demand_info["quantities_by_date"].items():
+            _add_demand(components_demand, product_id, quantity, required_date)
+
+
+def _add_demand(
+    components_demand: Dict[int, Dict[str, Any]],
+    product_id: int,
+    quantity: float,
+    required_date: Optional[datetime]
+) -> None:
+    """
+    Dodaje zapotrzebowanie na produkt, zachowując najwcześniejszą datę zapotrzebowania
+    oraz rozbicie ilości według dat (na potrzeby okresów planowania).
+    """
+    if product_id not in components_demand:
+        components_demand[product_id] = {
+            "required_quantity": 0,
+            "required_date": required_date,
+            "quantities_by_date": {}
+        }
+    
+    components_demand[product_id]["required_quantity"] += quantity
+    quantities_by_date = components_demand[product_id]["quantities_by_date"]
+    quantities_by_date[required_date] = quantities_by_date.get(required_date, 0) + quantity
+    # Aktualizacja daty, jeśli bieżąca jest wcześniejsza
+    if required_date and (not components_demand[product_id]["required_date"] or 
+                        required_date < components_demand[product_id]["required_date"]):
+        components_demand[product_id]["required_date"] = required_date
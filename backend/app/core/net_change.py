@@ -0,0 +1,160 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.bom_graph import BOMGraph
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem
+from app.models.planning_change import PlanningChange
+
+
+# Pola pozycji zapotrzebowania porównywane przy aktualizacji net-change
+ITEM_FIELDS = (
+    "required_quantity", "available_quantity", "quantity_to_procure",
+    "requirement_date", "planned_order_date", "is_available", "notes"
+)
+
+
+def record_planning_changes(
+    db: Session,
+    entity_type: str,
+    entity_id: int,
+    product_ids: Iterable[Optional[int]]
+) -> None:
+    """
+    Zapisuje w dzienniku zmian produkty dotknięte zmianą zamówienia, listy BOM, produktu
+    lub stanu magazynowego.
+    Wpisy są dodawane do bieżącej transakcji - zatwierdza je commit wywołującego.
+    
+    Args:
+        db: Sesja bazy danych
+        entity_type: Rodzaj zmienionego obiektu (order, bom, product, inventory)
+        entity_id: ID zmienionego obiektu
+        product_ids: Produkty, których zapotrzebowanie mogło się zmienić
+    """
+    for product_id in {product_id for product_id in product_ids if product_id is not None}:
+        db.add(PlanningChange(entity_type=entity_type, entity_id=entity_id, product_id=product_id))
+
+
+def calculation_parameters(material_requirement: MaterialRequirement, order_ids: Iterable[int]) -> Dict[str, Any]:
+    """
+    Parametry obliczeń zapisywane w metadanych - ich zmiana wymusza pełne przeliczenie.
+    """
+    return {
+        "consider_stock": bool(material_requirement.consider_stock),
+        "consider_min_stock": bool(material_requirement.consider_min_stock),
+        "planning_bucket": material_requirement.planning_bucket.value if material_requirement.planning_bucket else None,
+        "planning_start_date": _isoformat(material_requirement.planning_start_date),
+        "planning_end_date": _isoformat(material_requirement.planning_end_date),
+        "order_ids": sorted(set(order_ids)),
+    }
+
+
+def changed_product_ids(
+    db: Session,
+    material_requirement: MaterialRequirement,
+    parameters: Dict[str, Any]
+) -> Optional[Set[int]]:
+    """
+    Zwraca produkty zmienione od ostatniego obliczenia zapotrzebowania.
+    
+    Returns:
+        Zbiór ID produktów lub None, jeśli konieczne jest pełne przeliczenie
+        (brak poprzedniego obliczenia albo zmienione parametry zapotrzebowania)
+    """
+    metadata = material_requirement.calculation_metadata or {}
+    snapshot_at = metadata.get("snapshot_at")
+    if not material_requirement.calculation_date or not snapshot_at:
+        return None
+    if metadata.get("parameters") != parameters:
+        return None
+    
+    rows = db.query(PlanningChange.product_id).filter(
+        PlanningChange.created_at >= datetime.fromisoformat(snapshot_at)
+    ).distinct()
+    return {product_id for product_id, in rows}
+
+
+def affected_products(graph: BOMGraph, changed: Set[int]) -> Set[int]:
+    """
+    Produkty, których zapotrzebowanie należy przeliczyć: zmienione produkty wraz
+    ze wszystkimi komponentami ich aktywnych list BOM (na dowolnym poziomie).
+    """
+    affected = set(changed)
+    stack = list(changed)
+    while stack:
+        for edge in graph.components(stack.pop()):
+            if edge.component_id not in affected:
+                affected.add(edge.component_id)
+                stack.append(edge.component_id)
+    return affected
+
+
+def relevant_products(graph: BOMGraph, affected: Set[int]) -> Set[int]:
+    """
+    Produkty, przez które prowadzi eksplozja do produktów dotkniętych zmianą
+    (produkty dotknięte zmianą wraz z ich zespołami nadrzędnymi).
+    """
+    parents: Dict[int, List[int]] = {}
+    for parent_id, edges in graph.children.items():
+        for edge in edges:
+            parents.setdefault(edge.component_id, []).append(parent_id)
+    
+    relevant = set(affected)
+    stack = list(affected)
+    while stack:
+        for parent_id in parents.get(stack.pop(), []):
+            if parent_id not in relevant:
+                relevant.add(parent_id)
+                stack.append(parent_id)
+    return relevant
+
+
+def upsert_requirement_items(
+    db: Session,
+    material_requirement_id: int,
+    item_rows: List[Dict[str, Any]],
+    product_ids: Set[int]
+) -> Dict[str, int]:
+    """
+    Aktualizuje pozycje zapotrzebowania wybranych produktów, zapisując tylko różnice.
+    
+    Pozycje są dopasowywane po (produkt, data zapotrzebowania): niezmienione pozostają
+    bez zmian, zmienione są aktualizowane, nadmiarowe usuwane, a brakujące dodawane.
+    
+    Returns:
+        Liczba dodanych, zaktualizowanych i usuniętych pozycji
+    """
+    existing = {}
+    if product_ids:
+        columns = [getattr(MaterialRequirementItem, field) for field in ITEM_FIELDS]
+        for row in db.query(MaterialRequirementItem.id, MaterialRequirementItem.product_id, *columns).filter(
+            MaterialRequirementItem.material_requirement_id == material_requirement_id,
+            MaterialRequirementItem.product_id.in_(product_ids)
+        ):
+            existing[(row.product_id, row.requirement_date)] = row
+    
+    to_insert, to_update = [], []
+    for item_row in item_rows:
+        current = existing.pop((item_row["product_id"], item_row["requirement_date"]), None)
+        if current is None:
+            to_insert.append(item_row)
+        elif any(getattr(current, field) != item_row[field] for field in ITEM_FIELDS):
+            to_update.append({"id": current.id, **{field: item_row[field] for field in ITEM_FIELDS}})
+    to_delete = [row.id for row in existing.values()]
+    
+    if to_delete:
+        db.execute(delete(MaterialRequirementItem.__table__).where(
+            MaterialRequirementItem.__table__.c.id.in_(to_delete)
+        ))
+    if to_update:
+        db.execute(update(MaterialRequirementItem), to_update)
+    if to_insert:
+        db.execute(insert(MaterialRequirementItem.__table__), to_insert)
+    
+    return {"inserted": len(to_insert), "updated": len(to_update), "deleted": len(to_delete)}
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.archive import existing_order_numbers
+from app.core.net_change import record_planning_changes
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.schemas.order import OrderCreate
+
+
+def create_orders_batch(
+    db: Session,
+    orders_in: List[OrderCreate],
+    user_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Tworzy wiele zamówień wraz z pozycjami (np. partię zamówień EDI dealerów) w jednej transakcji.
+
+    Numery zamówień i produkty pozycji są sprawdzane jednym zapytaniem dla całej partii,
+    a zamówienia i pozycje są zapisywane poleceniami INSERT dla wielu wierszy. Zamówienie
+    z powtórzonym lub istniejącym numerem albo nieistniejącym produktem jest pomijane
+    z opisem błędu - pozostałe zamówienia są tworzone. Zapis zatwierdza commit wywołującego.
+
+    Args:
+        db: Sesja bazy danych
+        orders_in: Zamówienia do utworzenia
+        user_id: ID użytkownika tworzącego zamówienia
+
+    Returns:
+        Wyniki w kolejności zamówień: {"order_number", "status": "created" | "failed", "order_id", "error"}
+    """
+    order_numbers = {order_in.order_number for order_in in orders_in}
+    existing_numbers = existing_order_numbers(db, order_numbers)
+    product_ids = {item_in.product_id for order_in in orders_in for item_in in order_in.items}
+    known_products = {
+        product_id for product_id, in db.query(Product.id).filter(Product.id.in_(product_ids))
+    } if product_ids else set()
+
+    results: List[Dict[str, Any]] = []
+    accepted: List[OrderCreate] = []
+    seen_numbers = set()
+    for order_in in orders_in:
+        error = None
+        if order_in.order_number in existing_numbers:
+            error = "Zamówienie o tym numerze już istnieje."
+        elif order_in.order_number in seen_numbers:
+            error = "Numer zamówienia powtarza się w partii."
+        else:
+            missing = sorted({item_in.product_id for item_in in order_in.items} - known_products)
+            if missing:
+                error = f"Nie znaleziono produktu o ID {', '.join(str(product_id) for product_id in missing)}"
+        seen_numbers.add(order_in.order_number)
+        results.append({"order_number": order_in.order_number, "status": "failed", "order_id": None, "error": error})
+        if error is None:
+            accepted.append(order_in)
+
+    if not accepted:
+        return results
+
+    order_date = datetime.utcnow()
+    order_ids = dict(db.execute(
+        insert(Order.__table__).returning(Order.__table__.c.order_number, Order.__table__.c.id),
+        [
+            {
+                "order_number": order_in.order_number,
+                "order_type": order_in.order_type,
+                "status": order_in.status,
+                "customer_name": order_in.customer_name,
+                "customer_reference": order_in.customer_reference,
+                "order_date": order_in.order_date or order_date,
+                "required_date": order_in.required_date,
+                "estimated_completion_date": order_in.estimated_completion_date,
+                "actual_completion_date": order_in.actual_completion_date,
+                "notes": order_in.notes,
+                "user_id": user_id,
+                "created_at": order_date,
+                "updated_at": order_date,
+            }
+            for order_in in accepted
+        ]
+    ).tuples().all())
+
+    item_rows = [
+        {
+            "order_id": order_ids[order_in.order_number],
+            "product_id": item_in.product_id,
+            "quantity": item_in.quantity,
+            "unit_price": item_in.unit_price,
+            "position": item_in.position or position,
+            "notes": item_in.notes,
+            "created_at": order_date,
+            "updated_at": order_date,
+        }
+        for order_in in accepted
+        for position, item_in in enumerate(order_in.items, start=1)
+    ]
+    if item_rows:
+        db.execute(insert(OrderItem.__table__), item_rows)
+
+    for order_in in accepted:
+        record_planning_changes(
+            db, "order", order_ids[order_in.order_number], [item_in.product_id for item_in in order_in.items]
+        )
+    for result in results:
+        if result["error"] is None:
+            result["status"] = "created"
+            result["order_id"] = order_ids[result["order_number"]]
+    return results
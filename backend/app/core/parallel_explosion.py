@@ -0,0 +1,176 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+import threading
+
+from app.core.bom_graph import BOMGraph
+from app.core.explosion_cache import CacheKey, CachedExplosion, ExplosionCache, cache_key, explode_per_unit
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_explosion_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Zwraca pulę procesów eksplozji współdzieloną przez kolejne obliczenia (tworzoną przy pierwszym
+    użyciu, bez kosztu uruchamiania procesów przy każdym obliczeniu). Pula jest tworzona ponownie,
+    gdy obliczenie potrzebuje więcej procesów, oraz w procesie potomnym (pula nie jest dziedziczona).
+    """
+    global _pool, _pool_workers, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid() or _pool_workers < workers:
+            if _pool is not None and _pool_pid == os.getpid():
+                # Części zleconych już obliczeń są dokończone przez dotychczasową pulę
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_explosion_pool() -> None:
+    """
+    Zamyka pulę procesów eksplozji (wywoływane przy zatrzymaniu aplikacji).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    # Pula z procesem zakończonym awaryjnie nie przyjmuje nowych zadań - kolejne obliczenie tworzy nową
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def explode_units_parallel(
+    graph: BOMGraph,
+    product_ids: Sequence[int],
+    cache: ExplosionCache,
+    workers: int,
+    generation: Optional[int] = None
+) -> Dict[int, CachedExplosion]:
+    """
+    Wyznacza rozwinięcia jednostkowe produktów końcowych w puli procesów.
+
+    Produkty nieobecne w pamięci podręcznej są dzielone na części (po jednej na proces),
+    a każda część jest rozwijana we współdzielonej puli procesów na wycinku grafu BOM
+    obejmującym tylko jej struktury (serializowany jest wycinek, nie cała migawka). Wyniki - łącznie
+    z rozwinięciami zespołów pośrednich - trafiają do pamięci podręcznej procesu głównego.
+    Rozwinięcie jednostkowe nie zależy od procesu, który je wyznaczył, więc dalsze
+    skalowanie daje wynik identyczny z obliczeniem sekwencyjnym.
+
+    Args:
+        graph: Migawka grafu BOM
+        product_ids: Produkty końcowe z aktywną listą BOM
+        cache: Pamięć podręczna rozwinięć
+        workers: Liczba procesów
+        generation: Pokolenie pamięci podręcznej, z którym zapisywane są wyniki (ExplosionCache.put)
+
+    Returns:
+        Słownik: ID produktu -> rozwinięcie jednej sztuki
+    """
+    explosions: Dict[int, CachedExplosion] = {}
+    missing = []
+    for product_id in sorted(set(product_ids)):
+        entry = cache.get(cache_key(graph, product_id))
+        if entry is not None:
+            explosions[product_id] = entry
+        else:
+            missing.append(product_id)
+
+    chunks = _split_products(graph, missing, workers)
+    if len(chunks) < 2:
+        return explosions
+
+    missing_ids = set(missing)
+    pool = get_explosion_pool(workers)
+    try:
+        results = list(pool.map(_explode_chunk, [_chunk_graph(graph, chunk) for chunk in chunks], chunks))
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    for entries in results:
+        for key, entry in entries:
+            cache.put(key, entry, generation)
+            if key[0] in missing_ids:
+                explosions[key[0]] = entry
+
+    return explosions
+
+
+def _split_products(graph: BOMGraph, product_ids: List[int], workers: int) -> List[List[int]]:
+    """
+    Dzieli produkty na części o zbliżonej wielkości struktur. Produkty o tym samym
+    pierwszym zespole (rodzina produktów) trafiają do tej samej części, aby wspólne
+    zespoły były rozwijane tylko w jednym procesie.
+    """
+    families: Dict[int, List[int]] = {}
+    for product_id in product_ids:
+        assemblies = [
+            edge.component_id for edge in graph.components(product_id)
+            if not edge.is_optional and graph.is_assembly(edge.component_id)
+        ]
+        families.setdefault(min(assemblies, default=product_id), []).append(product_id)
+
+    chunks: List[List[int]] = [[] for _ in range(min(workers, len(families)))]
+    sizes = [0] * len(chunks)
+    # Największe rodziny najpierw - do najmniej obciążonej części
+    for family in sorted(families.values(), key=len, reverse=True):
+        position = sizes.index(min(sizes))
+        chunks[position].extend(family)
+        sizes[position] += len(family)
+    return [chunk for chunk in chunks if chunk]
+
+
+def _chunk_graph(graph: BOMGraph, product_ids: List[int]) -> BOMGraph:
+    """
+    Wycinek grafu potrzebny do rozwinięcia części: produkty części, osiągalne z nich zespoły
+    i ich komponenty (bez komponentów opcjonalnych, które nie są rozwijane). Listy BOM, ich wersje
+    i kody niskiego poziomu pochodzą z pełnej migawki, więc klucze pamięci podręcznej i kolejność
+    rozwijania zespołów są takie same jak w procesie głównym.
+    """
+    reachable = set(product_ids)
+    expanded = set(product_ids)
+    stack = list(product_ids)
+    while stack:
+        for edge in graph.components(stack.pop()):
+            if edge.is_optional:
+                continue
+            reachable.add(edge.component_id)
+            if edge.component_id not in expanded and graph.is_assembly(edge.component_id):
+                expanded.add(edge.component_id)
+                stack.append(edge.component_id)
+
+    bom_ids = {product_id: graph.bom_ids[product_id] for product_id in expanded if product_id in graph.bom_ids}
+    chunk = BOMGraph(
+        products={product_id: graph.products[product_id] for product_id in reachable if product_id in graph.products},
+        bom_ids=bom_ids,
+        children={
+            product_id: [edge for edge in graph.components(product_id) if not edge.is_optional]
+            for product_id in expanded
+        },
+        bom_versions={
+            bom_id: graph.bom_versions[bom_id] for bom_id in bom_ids.values() if bom_id in graph.bom_versions
+        },
+        is_partial=True
+    )
+    codes = graph.low_level_codes()
+    chunk.use_low_level_codes({product_id: codes.get(product_id, 0) for product_id in reachable})
+    return chunk
+
+
+def _explode_chunk(graph: BOMGraph, product_ids: List[int]) -> List[Tuple[CacheKey, CachedExplosion]]:
+    # Wykonywane w procesie puli - lokalna pamięć podręczna na czas jednej części
+    local_cache = ExplosionCache(max_size=len(graph.bom_ids) + 1)
+    for product_id in product_ids:
+        explode_per_unit(graph, product_id, local_cache)
+    return local_cache.items()
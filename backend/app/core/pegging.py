@@ -0,0 +1,167 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.core.bom_graph import BOMGraph
+from app.models.material_requirement import MaterialRequirementItem, MaterialRequirementPegging
+from app.models.order import Order
+from app.models.product import ProductType
+
+
+# Rozwinięcie jednej sztuki produktu ze ścieżkami: (ID produktu, ścieżka zespołów, ilość na sztukę)
+UnitPaths = List[Tuple[int, Tuple[int, ...], float]]
+
+
+def build_pegging_rows(
+    graph: BOMGraph,
+    orders: List[Order],
+    material_requirement_id: int,
+    default_required_date: Optional[datetime],
+    product_ids: Optional[Set[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Wyznacza rekordy pegging - źródło zapotrzebowania na każdy produkt wraz ze ścieżką w strukturze BOM.
+
+    Rozwinięcie ze ścieżkami jest liczone raz dla każdego produktu końcowego i skalowane
+    ilością pozycji zamówienia. Rekordy o tej samej pozycji zamówienia, produkcie i ścieżce
+    są sumowane.
+
+    Args:
+        graph: Migawka grafu BOM
+        orders: Zamówienia z pozycjami
+        material_requirement_id: ID zapotrzebowania materiałowego
+        default_required_date: Data zapotrzebowania zamówień bez wymaganej daty
+        product_ids: Produkty, dla których mają powstać rekordy (None - wszystkie)
+
+    Returns:
+        Lista słowników z wartościami pól MaterialRequirementPegging
+    """
+    unit_paths: Dict[int, UnitPaths] = {}
+    rows: Dict[Tuple[int, int, int, str], Dict[str, Any]] = {}
+
+    for order in orders:
+        required_date = order.required_date or default_required_date
+        for order_item in order.items:
+            product = graph.get_product(order_item.product_id)
+            if product is None:
+                continue
+
+            if product.product_type == ProductType.FINAL:
+                if not graph.has_bom(product.id):
+                    continue
+                # Ścieżka rozpoczyna się od produktu końcowego
+                paths = [
+                    (product_id, (product.id,) + path, quantity)
+                    for product_id, path, quantity in _unit_paths(graph, product.id, unit_paths)
+                ]
+            else:
+                # Produkt zamawiany bezpośrednio - pusta ścieżka
+                paths = [(product.id, (), 1.0)]
+
+            for product_id, path, unit_quantity in paths:
+                if product_ids is not None and product_id not in product_ids:
+                    continue
+                bom_path = "/".join(str(node) for node in path)
+                key = (order.id, order_item.id, product_id, bom_path)
+                row = rows.get(key)
+                if row is None:
+                    rows[key] = {
+                        "material_requirement_id": material_requirement_id,
+                        "product_id": product_id,
+                        "order_id": order.id,
+                        "order_item_id": order_item.id,
+                        "end_product_id": product.id,
+                        "bom_path": bom_path,
+                        "quantity": unit_quantity * order_item.quantity,
+                        "required_date": required_date,
+                    }
+                else:
+                    row["quantity"] += unit_quantity * order_item.quantity
+
+    return list(rows.values())
+
+
+def link_pegging_items(
+    db: Session,
+    material_requirement_ids: List[int],
+    pegging_rows: List[Dict[str, Any]],
+    item_key: Callable[[int, int, Optional[datetime]], Hashable]
+) -> None:
+    """
+    Uzupełnia rekordy pegging o ID pozycji zapotrzebowania (jedno zapytanie dla wszystkich zapotrzebowań).
+
+    Args:
+        item_key: Funkcja (ID zapotrzebowania, ID produktu, data) -> klucz pozycji;
+            rekord i pozycja z tym samym kluczem są ze sobą wiązane
+    """
+    item_ids = {}
+    for item_id, material_requirement_id, product_id, requirement_date in db.query(
+        MaterialRequirementItem.id, MaterialRequirementItem.material_requirement_id,
+        MaterialRequirementItem.product_id, MaterialRequirementItem.requirement_date
+    ).filter(MaterialRequirementItem.material_requirement_id.in_(material_requirement_ids)):
+        item_ids[item_key(material_requirement_id, product_id, requirement_date)] = item_id
+
+    for row in pegging_rows:
+        row["material_requirement_item_id"] = item_ids.get(
+            item_key(row["material_requirement_id"], row["product_id"], row["required_date"])
+        )
+
+
+def delete_pegging(
+    db: Session,
+    material_requirement_ids: List[int],
+    product_ids: Optional[Set[int]] = None
+) -> None:
+    """
+    Usuwa rekordy pegging zapotrzebowań (opcjonalnie tylko wskazanych produktów).
+    Musi poprzedzać usunięcie pozycji zapotrzebowania, do których odwołują się rekordy.
+    """
+    statement = delete(MaterialRequirementPegging).where(
+        MaterialRequirementPegging.material_requirement_id.in_(material_requirement_ids)
+    )
+    if product_ids is not None:
+        statement = statement.where(MaterialRequirementPegging.product_id.in_(product_ids))
+    db.execute(statement)
+
+
+def insert_pegging(db: Session, pegging_rows: List[Dict[str, Any]]) -> None:
+    if pegging_rows:
+        db.execute(insert(MaterialRequirementPegging.__table__), pegging_rows)
+
+
+def _unit_paths(graph: BOMGraph, product_id: int, memo: Dict[int, UnitPaths]) -> UnitPaths:
+    """
+    Rozwinięcie jednej sztuki zespołu ze ścieżkami (kolejność zespołów z indeksu grafu BOM).
+    """
+    if product_id in memo:
+        return memo[product_id]
+
+    # Zespoły struktury bez wyznaczonego rozwinięcia - od najgłębszych poziomów
+    pending = {product_id}
+    stack = [product_id]
+    while stack:
+        for edge in graph.components(stack.pop()):
+            component_id = edge.component_id
+            if edge.is_optional or not graph.is_assembly(component_id):
+                continue
+            if component_id not in memo and component_id not in pending:
+                pending.add(component_id)
+                stack.append(component_id)
+
+    codes = graph.low_level_codes()
+    for assembly_id in sorted(pending, key=lambda node: codes.get(node, 0), reverse=True):
+        paths: UnitPaths = []
+        for edge in graph.components(assembly_id):
+            # Jeśli komponent jest opcjonalny, pomijamy go
+            if edge.is_optional:
+                continue
+            if graph.is_assembly(edge.component_id):
+                for component_id, path, quantity in memo[edge.component_id]:
+                    paths.append((component_id, (edge.component_id,) + path, edge.quantity * quantity))
+            else:
+                paths.append((edge.component_id, (), edge.quantity))
+        memo[assembly_id] = paths
+
+    return memo[product_id]
@@ -0,0 +1,277 @@
+from codecs import getincrementaldecoder
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.csv_format import check_csv_delimiter
+from app.core.explosion_cache import explosion_cache
+from app.core.inventory import open_balances, post_inventory_transactions
+from app.core.net_change import record_planning_changes
+from app.models.inventory import InventoryBalance, InventoryTransactionType
+from app.models.product import Product
+from app.schemas.product import ProductImportResult, ProductImportRow, ProductImportRowError
+
+
+# Obsługiwane formaty importu: CSV z wierszem nagłówka lub NDJSON (jeden obiekt JSON w linii)
+IMPORT_FORMATS = ("csv", "ndjson")
+# Pola wymagane przy tworzeniu produktu, który jeszcze nie istnieje
+REQUIRED_FOR_CREATE = ("name", "product_type")
+
+# Wiersz pliku: (numer linii, wartości pól lub None, opis błędu odczytu lub None)
+ImportRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ProductImportError(ValueError):
+    """Plik importu ma nieobsługiwany format lub niepoprawny nagłówek"""
+
+
+async def iter_import_records(
+    chunks: AsyncIterator[bytes],
+    import_format: str,
+    delimiter: str = ","
+) -> AsyncIterator[ImportRecord]:
+    """
+    Odczytuje kolejne wiersze pliku importu z fragmentów strumienia (np. treści żądania)
+    bez wczytywania całego pliku do pamięci.
+
+    W pliku CSV puste komórki są pomijane, a wartość w cudzysłowie może obejmować kilka linii.
+    Wiersz, którego nie da się odczytać (np. niepoprawny JSON), jest zwracany z opisem błędu.
+
+    Raises:
+        ProductImportError: Jeśli format jest nieobsługiwany lub plik CSV nie ma nagłówka z kolumną code
+        CSVDelimiterError: Jeśli separator kolumn pliku CSV jest niedozwolony
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ProductImportError(f"Nieobsługiwany format importu: {import_format}")
+    if import_format == "csv":
+        check_csv_delimiter(delimiter)
+
+    header: Optional[List[str]] = None
+    async for line_number, text in _iter_lines(chunks, quoted=import_format == "csv"):
+        if not text.strip():
+            continue
+        if import_format == "ndjson":
+            try:
+                values = json.loads(text)
+            except ValueError as e:
+                yield line_number, None, f"Niepoprawny JSON: {e}"
+                continue
+            if not isinstance(values, dict):
+                yield line_number, None, "Wiersz musi być obiektem JSON"
+                continue
+            yield line_number, values, None
+            continue
+
+        try:
+            cells = next(csv.reader([text], delimiter=delimiter))
+        except csv.Error as e:
+            yield line_number, None, f"Niepoprawny wiersz CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in cells]
+            if "code" not in header:
+                raise ProductImportError("Nagłówek pliku CSV musi zawierać kolumnę code")
+            continue
+        if len(cells) > len(header):
+            yield line_number, None, "Wiersz ma więcej kolumn niż nagłówek"
+            continue
+        yield line_number, {name: value for name, value in zip(header, cells) if value.strip()}, None
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], quoted: bool) -> AsyncIterator[Tuple[int, str]]:
+    # Kolejne rekordy tekstu wraz z numerem ich pierwszej linii. Dla CSV linie są łączone, dopóki
+    # liczba cudzysłowów jest nieparzysta (znak nowej linii wewnątrz wartości w cudzysłowie).
+    line_number = 0
+    record: List[str] = []
+    record_start = 0
+    quotes = 0
+    async for line in _iter_text_lines(chunks):
+        line_number += 1
+        if not record:
+            record_start = line_number
+        record.append(line.rstrip("\r"))
+        if quoted:
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+        yield record_start, "\n".join(record)
+        record = []
+        quotes = 0
+    if record:
+        yield record_start, "\n".join(record)
+
+
+async def _iter_text_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ProductImportError("Plik importu musi być zakodowany w UTF-8")
+    if pending:
+        yield pending
+
+
+class ProductImporter:
+    """
+    Importuje produkty partiami (np. katalog dostawcy) z aktualizacją istniejących.
+
+    Dla każdej partii: walidacja wierszy, jedno zapytanie o istniejące kody, zapis wszystkich
+    produktów jednym INSERT ... ON CONFLICT (code) DO UPDATE i commit. Istniejący produkt
+    otrzymuje tylko wartości podanych pól; nowy wymaga nazwy i typu. Stan magazynowy nowego
+    produktu trafia do dziennika ruchów jako korekta otwierająca, a istniejącego - jako
+    korekta o różnicę względem salda. Wiersze z tym samym kodem w jednej partii są łączone
+    (późniejsze wartości zastępują wcześniejsze).
+    """
+
+    def __init__(self, db: Session, user_id: Optional[int] = None):
+        self.db = db
+        self.user_id = user_id
+        self.result = ProductImportResult()
+
+    def import_records(self, records: List[ImportRecord]) -> None:
+        """
+        Importuje partię wierszy w jednej transakcji. Błąd zapisu partii oznacza wszystkie
+        jej wiersze jako nieudane - kolejne partie są importowane dalej.
+        """
+        self.result.rows += len(records)
+        rows: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        for line_number, values, error in records:
+            if error:
+                self._fail(line_number, None, [error])
+                continue
+            try:
+                row = ProductImportRow(**values)
+            except ValidationError as e:
+                code = values.get("code")
+                self._fail(line_number, code if isinstance(code, str) else None, [
+                    f"{'.'.join(str(location) for location in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                ])
+                continue
+            data = row.dict(exclude_unset=True)
+            previous = rows.get(row.code)
+            rows[row.code] = (line_number, {**previous[1], **data} if previous else data)
+
+        if not rows:
+            return
+        # Istniejące produkty partii - nazwa uzupełnia wiersz INSERT (NOT NULL jest sprawdzane przed ON CONFLICT)
+        existing = {
+            code: (product_id, name)
+            for code, product_id, name in self.db.query(Product.code, Product.id, Product.name).filter(
+                Product.code.in_(list(rows))
+            )
+        }
+        for code, (line_number, data) in list(rows.items()):
+            if code in existing:
+                data.setdefault("name", existing[code][1])
+                continue
+            missing = [field for field in REQUIRED_FOR_CREATE if data.get(field) is None]
+            if missing:
+                self._fail(line_number, code, [f"{field}: pole wymagane dla nowego produktu" for field in missing])
+                del rows[code]
+        self._write(rows, {code: product_id for code, (product_id, _) in existing.items()})
+
+    def _write(self, rows: Dict[str, Tuple[int, Dict[str, Any]]], existing: Dict[str, int]) -> None:
+        # Zapis partii w jednej transakcji; po błędzie wiersze są zapisywane pojedynczo,
+        # aby raport wskazał wiersze, których nie da się zapisać
+        if not rows:
+            return
+        try:
+            created, updated = self._upsert(rows, existing)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            if len(rows) > 1:
+                for code, row in rows.items():
+                    self._write({code: row}, existing)
+                return
+            for code, (line_number, _) in rows.items():
+                self._fail(line_number, code, [f"Zapis nie powiódł się: {getattr(e, 'orig', None) or e}"])
+            return
+        self.result.created += len(created)
+        self.result.updated += len(updated)
+        # Typ i parametry produktu wpływają na rozwinięcia zespołów
+        explosion_cache.invalidate(updated)
+
+    def _upsert(self, rows: Dict[str, Tuple[int, Dict[str, Any]]], existing: Dict[str, int]) -> Tuple[List[int], List[int]]:
+        table = Product.__table__
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            insert = postgresql.insert
+        elif dialect_name == "sqlite":
+            insert = sqlite.insert
+        else:
+            raise ProductImportError(f"Import produktów nie obsługuje bazy danych {dialect_name}")
+
+        # Wiersze o tym samym zestawie pól trafiają do jednego polecenia (executemany)
+        now = datetime.utcnow()
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for _, data in rows.values():
+            values = {**data, "created_at": now, "updated_at": now}
+            groups.setdefault(frozenset(values), []).append(values)
+
+        ids: Dict[str, int] = {}
+        for columns, group in groups.items():
+            statement = insert(table)
+            # Stan magazynowy istniejącego produktu zmienia korekta w dzienniku ruchów
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.code],
+                set_={
+                    name: statement.excluded[name]
+                    for name in columns - {"code", "created_at", "quantity_in_stock"}
+                }
+            ).returning(table.c.code, table.c.id)
+            ids.update(self.db.execute(statement, group).tuples().all())
+
+        created = [ids[code] for code in rows if code not in existing]
+        updated = [ids[code] for code in rows if code in existing]
+        open_balances(self.db, created)
+
+        stock = {
+            existing[code]: data["quantity_in_stock"]
+            for code, (_, data) in rows.items()
+            if code in existing and data.get("quantity_in_stock") is not None
+        }
+        if stock:
+            open_balances(self.db, stock)
+            on_hand = dict(self.db.query(InventoryBalance.product_id, InventoryBalance.on_hand).filter(
+                InventoryBalance.product_id.in_(list(stock))
+            ))
+            post_inventory_transactions(self.db, [
+                {
+                    "product_id": product_id,
+                    "transaction_type": InventoryTransactionType.ADJUSTMENT,
+                    "quantity": quantity_in_stock - on_hand.get(product_id, 0.0),
+                    "notes": "Import produktów",
+                }
+                for product_id, quantity_in_stock in stock.items()
+                if quantity_in_stock != on_hand.get(product_id, 0.0)
+            ], self.user_id)
+
+        for product_id in updated:
+            record_planning_changes(self.db, "product", product_id, [product_id])
+        return created, updated
+
+    def fail_file(self, error: str) -> None:
+        """
+        Zapisuje w wyniku błąd całego pliku (wiersz 0), który przerwał import - partie
+        zaimportowane wcześniej pozostają zapisane.
+        """
+        self.result.errors.insert(0, ProductImportRowError(row=0, errors=[error]))
+
+    def _fail(self, line_number: int, code: Optional[str], errors: List[str]) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.result.errors.append(ProductImportRowError(row=line_number, code=code, errors=errors))
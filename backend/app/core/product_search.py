@@ -0,0 +1,88 @@
+from typing import Optional
+
+from sqlalchemy import and_, column, func, or_, select, table, text
+from sqlalchemy.sql import Select
+
+from app.models.product import PRODUCT_SEARCH_TABLE, Product, ProductType
+
+
+# Najkrótsza fraza wyszukiwana indeksem trigramowym - krótsze zapytania dopasowują początek kodu
+MIN_TRIGRAM_LENGTH = 3
+# Wagi kolumn w rankingu FTS5 (bm25): kod, nazwa
+SQLITE_RANK = f"bm25({PRODUCT_SEARCH_TABLE}, 10.0, 1.0)"
+
+product_search = table(PRODUCT_SEARCH_TABLE, column("rowid"))
+
+
+def product_search_statement(
+    dialect_name: str,
+    query: str,
+    limit: int = 20,
+    product_type: Optional[ProductType] = None,
+    active: Optional[bool] = None
+) -> Select:
+    """
+    Zapytanie wyszukujące produkty po fragmentach kodu i nazwy, uporządkowane według trafności.
+
+    Każde słowo zapytania musi wystąpić w kodzie lub nazwie produktu. W PostgreSQL
+    dopasowanie korzysta z indeksów trigramowych (pg_trgm), a ranking - z podobieństwa
+    trigramowego; dodatkowo zwracane są nazwy podobne do zapytania (literówki). W SQLite
+    dopasowanie i ranking (bm25, kod ważniejszy od nazwy) zapewnia tabela FTS5.
+    Zapytanie krótsze niż 3 znaki dopasowuje początek kodu produktu bez rozróżniania
+    wielkości liter (indeks upper(code)).
+
+    Args:
+        dialect_name: Nazwa dialektu bazy danych (postgresql, sqlite)
+        query: Tekst wyszukiwania
+        limit: Maksymalna liczba wyników
+        product_type: Filtr typu produktu
+        active: Filtr aktywności produktu
+
+    Returns:
+        Zapytanie Select zwracające obiekty Product
+    """
+    terms = query.split()
+    statement = select(Product)
+    if product_type:
+        statement = statement.where(Product.product_type == product_type)
+    if active is not None:
+        statement = statement.where(Product.active == active)
+
+    trigram_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_LENGTH]
+    if not trigram_terms:
+        # Zakres kodów z danym początkiem - korzysta z indeksu ix_product_code_upper
+        prefix = query.strip().upper()
+        code = func.upper(Product.code)
+        return statement.where(
+            code >= prefix, code < prefix + "\uffff"
+        ).order_by(code, Product.code).limit(limit)
+
+    if dialect_name == "postgresql":
+        phrase = " ".join(terms)
+        matches_terms = and_(*(
+            or_(Product.code.ilike(_like_pattern(term), escape="\\"), Product.name.ilike(_like_pattern(term), escape="\\"))
+            for term in terms
+        ))
+        rank = func.greatest(func.similarity(Product.code, phrase), func.similarity(Product.name, phrase))
+        return statement.where(
+            or_(matches_terms, Product.name.op("%")(phrase))
+        ).order_by(rank.desc(), Product.code).limit(limit)
+
+    # SQLite FTS5: każde słowo jako fraza (dopasowanie fragmentu tekstu tokenizerem trigramowym)
+    match = " AND ".join('"{}"'.format(term.replace('"', '""')) for term in trigram_terms)
+    statement = statement.join(product_search, product_search.c.rowid == Product.id).where(
+        text(f"{PRODUCT_SEARCH_TABLE} MATCH :match").bindparams(match=match)
+    )
+    # Krótkie słowa nie tworzą trigramów - sprawdzane na wierszach dopasowanych przez FTS5
+    for term in terms:
+        if len(term) < MIN_TRIGRAM_LENGTH:
+            statement = statement.where(or_(
+                Product.code.like(_like_pattern(term), escape="\\"),
+                Product.name.like(_like_pattern(term), escape="\\")
+            ))
+    return statement.order_by(text(SQLITE_RANK), Product.code).limit(limit)
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
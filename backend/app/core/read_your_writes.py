@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.models.read_primary_window import ReadPrimaryWindow
+
+
+def window_keys(user_id: Optional[int] = None, material_requirement_ids: Iterable[int] = ()) -> List[str]:
+    """
+    Klucze okien read-your-writes użytkownika i zapotrzebowań materiałowych.
+    """
+    keys = [f"user:{user_id}"] if user_id is not None else []
+    keys += [f"materialrequirement:{material_requirement_id}" for material_requirement_id in material_requirement_ids]
+    return keys
+
+
+def open_read_primary_windows(db: Session, keys: List[str]) -> None:
+    """
+    Otwiera (lub przedłuża) okna read-your-writes - przez READ_YOUR_WRITES_SECONDS odczyty
+    objęte tymi kluczami trafiają do bazy głównej. Zapis zatwierdza commit wywołującego,
+    więc okno otwarte w transakcji wyników obliczeń jest widoczne razem z nimi.
+
+    Bez repliki do odczytu (DATABASE_REPLICA_URL) okna nie są potrzebne i nie są zapisywane.
+    """
+    if not settings.DATABASE_REPLICA_URL or not keys:
+        return
+    dialect_name = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    now = datetime.utcnow()
+    read_primary_until = now + timedelta(seconds=settings.READ_YOUR_WRITES_SECONDS)
+    statement = insert(ReadPrimaryWindow.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ReadPrimaryWindow.window_key],
+        set_={"read_primary_until": statement.excluded.read_primary_until, "updated_at": now}
+    )
+    db.execute(statement, [
+        {"window_key": key, "read_primary_until": read_primary_until, "created_at": now, "updated_at": now}
+        for key in sorted(set(keys))
+    ])
+
+
+def read_primary_statement(keys: List[str]) -> Select:
+    """
+    Zapytanie (do bazy głównej), czy którekolwiek z okien read-your-writes jest otwarte.
+    """
+    return select(exists().where(
+        ReadPrimaryWindow.window_key.in_(keys),
+        ReadPrimaryWindow.read_primary_until > datetime.utcnow()
+    ))
@@ -4,4 +4,11 @@ from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.product import Product  # noqa
 from app.models.bom import BOM, BOMItem  # noqa
+from app.models.bom_graph_node import BOMGraphNode  # noqa
 from app.models.order import Order, OrderItem  # noqa
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementPegging  # noqa
+from app.models.calculation_job import CalculationJob, CalculationLock  # noqa
+from app.models.planning_change import PlanningChange  # noqa
+from app.models.read_primary_window import ReadPrimaryWindow  # noqa
+from app.models.inventory import InventoryBalance, InventoryTransaction  # noqa
+from app.models.archive import MaterialRequirementArchive, MaterialRequirementItemArchive, MaterialRequirementOrderArchive, OrderArchive, OrderItemArchive  # noqa
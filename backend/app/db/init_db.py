@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_password_hash
+from app.core.bom_index import update_bom_index
+from app.core.inventory import open_balances
+from app.models.bom import BOMItem
+from app.models.bom_graph_node import BOMGraphNode
 from app.models.user import User
 from app.models.product import Product, ProductType
 
@@ -49,7 +53,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.COMPONENT,
                 unit="szt",
                 price=12000,
-                quantity_in_stock=5,
+                opening_stock=5,
                 minimum_stock=2,
                 lead_time_days=30,
                 active=True
@@ -61,7 +65,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.COMPONENT,
                 unit="szt",
                 price=25000,
-                quantity_in_stock=3,
+                opening_stock=3,
                 minimum_stock=1,
                 lead_time_days=45,
                 active=True
@@ -73,7 +77,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.FINAL,
                 unit="szt",
                 price=85000,
-                quantity_in_stock=1,
+                opening_stock=1,
                 minimum_stock=0,
                 lead_time_days=60,
                 active=True
@@ -85,7 +89,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.MATERIAL,
                 unit="m²",
                 price=350,
-                quantity_in_stock=120,
+                opening_stock=120,
                 minimum_stock=50,
                 lead_time_days=20,
                 active=True
@@ -97,7 +101,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.MATERIAL,
                 unit="l",
                 price=45,
-                quantity_in_stock=200,
+                opening_stock=200,
                 minimum_stock=100,
                 lead_time_days=10,
                 active=True
@@ -109,7 +113,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.COMPONENT,
                 unit="szt",
                 price=1200,
-                quantity_in_stock=8,
+                opening_stock=8,
                 minimum_stock=3,
                 lead_time_days=15,
                 active=True
@@ -121,7 +125,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.COMPONENT,
                 unit="szt",
                 price=850,
-                quantity_in_stock=12,
+                opening_stock=12,
                 minimum_stock=5,
                 lead_time_days=10,
                 active=True
@@ -133,7 +137,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.COMPONENT,
                 unit="szt",
                 price=450,
-                quantity_in_stock=15,
+                opening_stock=15,
                 minimum_stock=5,
                 lead_time_days=7,
                 active=True
@@ -145,7 +149,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.FINAL,
                 unit="szt",
                 price=65000,
-                quantity_in_stock=2,
+                opening_stock=2,
                 minimum_stock=1,
                 lead_time_days=45,
                 active=True
@@ -157,7 +161,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.COMPONENT,
                 unit="szt",
                 price=12000,
-                quantity_in_stock=6,
+                opening_stock=6,
                 minimum_stock=2,
                 lead_time_days=30,
                 active=True
@@ -169,7 +173,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.SERVICE,
                 unit="usł",
                 price=500,
-                quantity_in_stock=0,
+                opening_stock=0,
                 minimum_stock=0,
                 lead_time_days=1,
                 active=True
@@ -181,7 +185,7 @@ def init_db(db: Session) -> None:
                 product_type=ProductType.FINAL,
                 unit="szt",
                 price=120000,
-                quantity_in_stock=1,
+                opening_stock=1,
                 minimum_stock=0,
                 lead_time_days=90,
                 active=False
@@ -193,3 +197,19 @@ def init_db(db: Session) -> None:
         
         db.commit()
         print(f"Dodano {len(example_products)} przykładowych produktów do bazy danych.")
+    
+    # Zbuduj indeks grafu BOM, jeśli struktury istnieją, a indeks jest pusty (np. po migracji)
+    if db.query(BOMGraphNode.id).first() is None and db.query(BOMItem.id).first() is not None:
+        try:
+            update_bom_index(db)
+            db.commit()
+            print("Zbudowano indeks grafu BOM.")
+        except ValueError as e:
+            db.rollback()
+            print(f"Nie można zbudować indeksu grafu BOM: {e}")
+    
+    # Załóż salda magazynowe produktom bez salda (np. po migracji lub dodanych z pominięciem API)
+    opened = open_balances(db)
+    if opened:
+        db.commit()
+        print(f"Założono salda magazynowe dla {opened} produktów.")
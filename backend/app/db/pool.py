@@ -0,0 +1,251 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+
+POOL_MODES = ("queue", "null")
+SQLITE_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+# Sterowniki asynchroniczne dla obsługiwanych baz danych
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+class PoolMetrics:
+    """
+    Liczniki puli połączeń (od uruchomienia procesu) uzupełniające bieżący stan puli.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters = {
+            "connections_created": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "invalidations": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+        self._wait_seconds = 0.0
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def record_wait(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self._counters["waits"] += 1
+            self._wait_seconds += seconds
+            if timed_out:
+                self._counters["timeouts"] += 1
+
+    def attach(self, engine: Engine) -> None:
+        """Rejestruje liczniki w zdarzeniach puli silnika."""
+        event.listen(engine, "connect", lambda *args: self.increment("connections_created"))
+        event.listen(engine, "checkout", lambda *args: self.increment("checkouts"))
+        event.listen(engine, "checkin", lambda *args: self.increment("checkins"))
+        event.listen(engine, "invalidate", lambda *args: self.increment("invalidations"))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "wait_time_ms": round(self._wait_seconds * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+# Liczniki pul repliki do odczytu (DATABASE_REPLICA_URL)
+replica_pool_metrics = PoolMetrics()
+async_replica_pool_metrics = PoolMetrics()
+
+
+class _WaitMetricsMixin:
+    """
+    Pomiar oczekiwania na połączenie - gdy wszystkie połączenia (łącznie z nadmiarowymi)
+    są zajęte, pobranie czeka na zwolnienie połączenia lub kończy się przekroczeniem
+    czasu (pool_timeout).
+    """
+
+    metrics: PoolMetrics
+
+    def _do_get(self) -> Any:
+        saturated = (
+            self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+            and self.checkedin() == 0
+        )
+        if not saturated:
+            return super()._do_get()
+
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+class InstrumentedQueuePool(_WaitMetricsMixin, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_WaitMetricsMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def build_engine(database_url: str, metrics: PoolMetrics = pool_metrics) -> Engine:
+    """
+    Tworzy silnik bazy danych z ustawieniami puli połączeń z konfiguracji.
+
+    PostgreSQL korzysta z puli QueuePool (rozmiar, nadmiar, recykling, pre-ping) albo -
+    w trybie DB_POOL_MODE="null" - z NullPool, gdy pulą zarządza PgBouncer. SQLite
+    w pliku dostaje pragmy (WAL, synchronous, mmap_size, cache_size) przy każdym połączeniu.
+    """
+    url = make_url(database_url)
+    engine = create_engine(url, **_engine_options(
+        url, _pool_class(InstrumentedQueuePool, metrics), settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    ))
+    metrics.attach(engine)
+    if _is_sqlite_file(url):
+        _apply_sqlite_pragmas(engine)
+    return engine
+
+
+def build_async_engine(database_url: str, metrics: PoolMetrics = async_pool_metrics) -> AsyncEngine:
+    """
+    Tworzy asynchroniczny silnik dla tej samej bazy danych (asyncpg dla PostgreSQL,
+    aiosqlite dla SQLite) z pragmami SQLite. Rozmiar puli określają DB_ASYNC_POOL_SIZE
+    i DB_ASYNC_MAX_OVERFLOW - pula obsługuje endpointy odczytu, a pula synchroniczna zapisy.
+    """
+    url = async_database_url(database_url)
+    engine = create_async_engine(url, **_engine_options(
+        url, _pool_class(InstrumentedAsyncQueuePool, metrics), settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW
+    ))
+    metrics.attach(engine.sync_engine)
+    if _is_sqlite_file(url):
+        _apply_sqlite_pragmas(engine.sync_engine)
+    return engine
+
+
+def async_database_url(database_url: str) -> URL:
+    """
+    Adres bazy danych ze sterownikiem asynchronicznym (np. postgresql:// -> postgresql+asyncpg://).
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Brak sterownika asynchronicznego dla bazy danych: {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _pool_class(base: type, metrics: PoolMetrics) -> type:
+    # Klasa puli jest odtwarzana przy engine.dispose(), więc liczniki są atrybutem klasy
+    if base.metrics is metrics:
+        return base
+    return type(base.__name__, (base,), {"metrics": metrics})
+
+
+def connection_budget() -> Optional[Dict[str, int]]:
+    """
+    Maksymalna liczba połączeń z bazami danych jednego procesu aplikacji (rozmiar puli wraz
+    z nadmiarem) - dla każdej puli i łącznie. Z pulą wykonawczą zadań "process" każdy proces
+    zadań ma własną pulę synchroniczną bazy głównej (pole "job_processes").
+    
+    Returns:
+        Budżet połączeń lub None w trybie DB_POOL_MODE="null" (połączeniami zarządza PgBouncer)
+    """
+    if settings.DB_POOL_MODE == "null":
+        return None
+    sync_connections = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    async_connections = settings.DB_ASYNC_POOL_SIZE + settings.DB_ASYNC_MAX_OVERFLOW
+    budget = {"sync": sync_connections, "async": async_connections}
+    if settings.DATABASE_REPLICA_URL:
+        budget.update(replica=sync_connections, async_replica=async_connections)
+    if settings.MRP_JOB_EXECUTOR == "process":
+        budget["job_processes"] = settings.MRP_JOB_WORKERS * sync_connections
+    budget["total"] = sum(budget.values())
+    return budget
+
+
+def _engine_options(url: URL, poolclass: type, pool_size: int, max_overflow: int) -> Dict[str, Any]:
+    if settings.DB_POOL_MODE not in POOL_MODES:
+        raise ValueError(
+            f"Nieznany tryb puli połączeń: {settings.DB_POOL_MODE}. Dostępne tryby: {', '.join(POOL_MODES)}"
+        )
+
+    if settings.DB_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+    if url.get_backend_name() == "sqlite" and not _is_sqlite_file(url):
+        # Baza SQLite w pamięci korzysta z domyślnej puli dialektu (jedno połączenie)
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(engine: Engine) -> None:
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Nieznany tryb dziennika SQLite: {settings.SQLITE_JOURNAL_MODE}")
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Nieznany tryb synchronizacji SQLite: {settings.SQLITE_SYNCHRONOUS}")
+
+    pragmas = [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def pool_status(engine: Engine, metrics: PoolMetrics = pool_metrics) -> Dict[str, Any]:
+    """
+    Bieżący stan puli połączeń silnika wraz z licznikami od uruchomienia procesu.
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {
+        "pool_class": type(pool).__name__,
+        "dialect": engine.dialect.name,
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    counters = metrics.snapshot()
+    status.setdefault("checked_out", counters["checkouts"] - counters["checkins"])
+    status.update(counters)
+    return status
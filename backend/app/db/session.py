@@ -1,11 +1,27 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import async_replica_pool_metrics, build_async_engine, build_engine, replica_pool_metrics
 
-engine = create_engine(settings.DATABASE_URL)
+engine = build_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Silnik asynchroniczny dla endpointów odczytu (ta sama baza danych)
+async_engine = build_async_engine(settings.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Replika do odczytu - bez DATABASE_REPLICA_URL sesje odczytu korzystają z bazy głównej
+replica_engine = None
+async_replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = build_engine(settings.DATABASE_REPLICA_URL, replica_pool_metrics)
+    async_replica_engine = build_async_engine(settings.DATABASE_REPLICA_URL, async_replica_pool_metrics)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    async_replica_engine or async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     """
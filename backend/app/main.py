@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
 from app.core.config import settings
 from app.api.api_v1.api import api_router
+from app.api.deps import READ_PRIMARY_COOKIE, read_primary_window_keys
+from app.core.jobs import recover_interrupted_jobs, shutdown_executor
+from app.core.parallel_explosion import shutdown_explosion_pool
+from app.core.read_your_writes import open_read_primary_windows
 from app.db.session import SessionLocal
 from app.db.init_db import init_db
 
@@ -20,8 +27,43 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Kursor następnej strony list (stronicowanie keyset)
+        expose_headers=["X-Next-Cursor"],
     )
 
+# Po udanym zapisie kolejne odczyty klienta przez krótki czas trafiają do bazy głównej,
+# aby klient widział własne zmiany mimo opóźnienia replikacji. Okno jest zapisywane w ciasteczku
+# (przeglądarki) oraz po stronie serwera dla użytkownika z tokenu i zmienianego zapotrzebowania.
+@app.middleware("http")
+async def mark_read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        settings.DATABASE_REPLICA_URL
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        keys = read_primary_window_keys(request)
+        if keys:
+            await run_in_threadpool(_open_read_primary_windows, keys)
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+def _open_read_primary_windows(keys) -> None:
+    db = SessionLocal()
+    try:
+        open_read_primary_windows(db, keys)
+        db.commit()
+    finally:
+        db.close()
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -56,3 +98,20 @@ def startup_db_client():
         init_db(db)
     finally:
         db.close()
+
+
+# Zadania obliczeniowe przerwane przez zatrzymanie aplikacji nie zostaną już wykonane
+@app.on_event("startup")
+def recover_calculation_jobs():
+    db = SessionLocal()
+    try:
+        recover_interrupted_jobs(db)
+    finally:
+        db.close()
+
+
+# Zamknięcie puli zadań obliczeniowych i puli procesów eksplozji przy zatrzymaniu aplikacji
+@app.on_event("shutdown")
+def shutdown_job_executor():
+    shutdown_executor()
+    shutdown_explosion_pool()
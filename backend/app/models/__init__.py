@@ -1,8 +1,17 @@
 from app.models.user import User
 from app.models.product import Product, ProductType
 from app.models.bom import BOM, BOMItem
+from app.models.bom_graph_node import BOMGraphNode
 from app.models.order import Order, OrderStatus, OrderType, OrderItem
 from app.models.material_requirement import (
     MaterialRequirement, MaterialRequirementItem, 
-    MaterialRequirementOrder, MaterialRequirementStatus
+    MaterialRequirementOrder, MaterialRequirementPegging, MaterialRequirementStatus, PlanningBucket
+)
+from app.models.calculation_job import CalculationJob, CalculationJobStatus, CalculationLock
+from app.models.planning_change import PlanningChange
+from app.models.read_primary_window import ReadPrimaryWindow
+from app.models.inventory import InventoryBalance, InventoryTransaction, InventoryTransactionType
+from app.models.archive import (
+    MaterialRequirementArchive, MaterialRequirementItemArchive, MaterialRequirementOrderArchive,
+    OrderArchive, OrderItemArchive
 )
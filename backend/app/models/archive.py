@@ -0,0 +1,104 @@
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Text, Enum, Boolean, JSON, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.db.base_class import Base
+from app.models.material_requirement import MaterialRequirementStatus, PlanningBucket
+from app.models.order import OrderStatus, OrderType
+
+
+# Tabele archiwum mają te same kolumny co tabele bieżące (rekordy zachowują ID) oraz datę archiwizacji.
+# Kolumny tabel bieżących należy dodawać również tutaj - archiwizacja przenosi wszystkie kolumny.
+
+
+class OrderArchive(Base):
+    """Zamówienie przeniesione do archiwum (ukończone lub anulowane)"""
+    
+    order_number = Column(String, index=True, nullable=False)
+    order_type = Column(Enum(OrderType), nullable=False, default=OrderType.PRODUCTION)
+    status = Column(Enum(OrderStatus), nullable=False)
+    customer_name = Column(String, nullable=True)
+    customer_reference = Column(String, nullable=True)
+    order_date = Column(DateTime, nullable=False)
+    required_date = Column(DateTime, nullable=True)
+    estimated_completion_date = Column(DateTime, nullable=True)
+    actual_completion_date = Column(DateTime, nullable=True)
+    notes = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relacje
+    items = relationship("OrderItemArchive", back_populates="order", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_orderarchive_order_date_id", "order_date", "id"),
+    )
+
+
+class OrderItemArchive(Base):
+    """Pozycja zamówienia z archiwum"""
+    
+    order_id = Column(Integer, ForeignKey("orderarchive.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False, index=True)
+    quantity = Column(Float, nullable=False)
+    unit_price = Column(Float, nullable=True)
+    position = Column(Integer, nullable=True)
+    notes = Column(Text, nullable=True)
+    
+    # Relacje
+    order = relationship("OrderArchive", back_populates="items")
+
+
+class MaterialRequirementArchive(Base):
+    """Zapotrzebowanie materiałowe przeniesione do archiwum (zrealizowane lub anulowane)"""
+    
+    reference_number = Column(String, index=True, nullable=False)
+    status = Column(Enum(MaterialRequirementStatus), nullable=False)
+    creation_date = Column(DateTime, nullable=False)
+    calculation_date = Column(DateTime, nullable=True)
+    notes = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+    consider_stock = Column(Boolean, default=True)
+    consider_min_stock = Column(Boolean, default=True)
+    planning_start_date = Column(DateTime, nullable=False)
+    planning_end_date = Column(DateTime, nullable=True)
+    planning_bucket = Column(Enum(PlanningBucket), nullable=False, default=PlanningBucket.NONE)
+    calculation_metadata = Column(JSON, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relacje
+    items = relationship("MaterialRequirementItemArchive", back_populates="material_requirement",
+                         cascade="all, delete-orphan")
+    source_orders = relationship("MaterialRequirementOrderArchive", back_populates="material_requirement",
+                                 cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_materialrequirementarchive_creation_date_id", "creation_date", "id"),
+    )
+
+
+class MaterialRequirementOrderArchive(Base):
+    """Powiązanie zapotrzebowania z archiwum z zamówieniem (bieżącym lub z archiwum)"""
+    
+    material_requirement_id = Column(Integer, ForeignKey("materialrequirementarchive.id"), nullable=False, index=True)
+    order_id = Column(Integer, nullable=False)
+    
+    # Relacje
+    material_requirement = relationship("MaterialRequirementArchive", back_populates="source_orders")
+
+
+class MaterialRequirementItemArchive(Base):
+    """Pozycja zapotrzebowania materiałowego z archiwum"""
+    
+    material_requirement_id = Column(Integer, ForeignKey("materialrequirementarchive.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    required_quantity = Column(Float, nullable=False)
+    available_quantity = Column(Float, default=0.0)
+    quantity_to_procure = Column(Float, nullable=False)
+    requirement_date = Column(DateTime, nullable=True)
+    planned_order_date = Column(DateTime, nullable=True)
+    is_available = Column(Boolean, default=False)
+    notes = Column(Text, nullable=True)
+    
+    # Relacje
+    material_requirement = relationship("MaterialRequirementArchive", back_populates="items")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, ForeignKey, Boolean, Text
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from typing import List
 
@@ -20,6 +20,11 @@ class BOM(Base):
     # Relacje
     product = relationship("Product", back_populates="bom_parent")
     items = relationship("BOMItem", back_populates="bom", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Wyszukiwanie aktywnej listy BOM produktu
+        Index("ix_bom_product_id_is_active", "product_id", "is_active"),
+    )
 
 
 class BOMItem(Base):
@@ -28,7 +33,7 @@ class BOMItem(Base):
     """
     
     bom_id = Column(Integer, ForeignKey("bom.id"), nullable=False)
-    component_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    component_id = Column(Integer, ForeignKey("product.id"), nullable=False, index=True)
     quantity = Column(Float, nullable=False)
     unit = Column(String, nullable=False, default="pcs")
     position = Column(Integer, nullable=True)  # pozycja na liście składników
@@ -38,3 +43,8 @@ class BOMItem(Base):
     # Relacje
     bom = relationship("BOM", back_populates="items")
     component = relationship("Product", back_populates="bom_items")
+    
+    __table_args__ = (
+        # Indeks pokrywający - elementy listy BOM odczytywane przy eksplozji bez sięgania do tabeli
+        Index("ix_bomitem_bom_id_covering", "bom_id", "component_id", "quantity", "is_optional"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey
+
+from app.db.base_class import Base
+
+
+class BOMGraphNode(Base):
+    """
+    Indeks grafu aktywnych struktur materiałowych.
+    Utrzymywany przy każdym zapisie list BOM - przechowuje poziomy produktów,
+    dzięki którym obliczenia MRP nie muszą wyznaczać kolejności rozwijania struktur.
+    """
+    
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False, unique=True, index=True)
+    low_level_code = Column(Integer, nullable=False, default=0)  # najgłębszy poziom występowania produktu
+    depth = Column(Integer, nullable=False, default=0)  # liczba poziomów struktury poniżej produktu
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Text, Enum, Boolean
+from sqlalchemy.orm import relationship
+import enum
+
+from app.db.base_class import Base
+
+
+class CalculationJobStatus(str, enum.Enum):
+    """Status zadania obliczeniowego MRP"""
+    QUEUED = "queued"  # Oczekuje w kolejce
+    RUNNING = "running"  # W trakcie obliczeń
+    COMPLETED = "completed"  # Zakończone powodzeniem
+    FAILED = "failed"  # Zakończone błędem
+
+
+class CalculationJob(Base):
+    """
+    Zadanie asynchronicznego obliczenia zapotrzebowania materiałowego.
+    Stan zadania jest przechowywany w bazie, dzięki czemu jest widoczny dla wszystkich procesów aplikacji.
+    """
+    
+    material_requirement_id = Column(Integer, ForeignKey("materialrequirement.id"), nullable=False, index=True)
+    status = Column(Enum(CalculationJobStatus), nullable=False, default=CalculationJobStatus.QUEUED)
+    progress = Column(Float, nullable=False, default=0.0)  # postęp w zakresie 0-1
+    explosion_mode = Column(String, nullable=True)
+    net_change = Column(Boolean, nullable=False, default=False)  # przeliczenie tylko zmian
+    batch_id = Column(String, nullable=True, index=True)  # partia zapotrzebowań obliczanych razem
+    error = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relacje
+    material_requirement = relationship("MaterialRequirement")
+
+
+class CalculationLock(Base):
+    """
+    Blokada zapotrzebowania materiałowego w bazach bez blokad doradczych (np. SQLite).
+    Wiersz istnieje, dopóki blokada jest utrzymywana; po upływie expires_at blokadę procesu,
+    który przestał działać, może przejąć inny proces.
+    """
+    
+    lock_key = Column(String, nullable=False, unique=True, index=True)
+    owner = Column(String, nullable=False)  # identyfikator właściciela blokady
+    expires_at = Column(DateTime, nullable=False)
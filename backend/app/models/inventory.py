@@ -0,0 +1,43 @@
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Text, Enum, Index
+import enum
+
+from app.db.base_class import Base
+
+
+class InventoryTransactionType(str, enum.Enum):
+    """Rodzaj ruchu magazynowego"""
+    RECEIPT = "receipt"  # Przyjęcie (np. dostawa z zamówienia zakupu)
+    ISSUE = "issue"  # Wydanie (np. do produkcji)
+    ADJUSTMENT = "adjustment"  # Korekta stanu (inwentaryzacja, stan początkowy)
+
+
+class InventoryTransaction(Base):
+    """
+    Wpis dziennika ruchów magazynowych. Dziennik jest tylko dopisywany - stan produktu
+    jest sumą zmian, a bieżące saldo przechowuje InventoryBalance.
+    """
+
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    transaction_type = Column(Enum(InventoryTransactionType), nullable=False)
+    quantity = Column(Float, nullable=False)  # zmiana stanu: dodatnia dla przyjęć, ujemna dla wydań
+    # Zamówienie źródłowe - bez klucza obcego, ponieważ zamówienie może zostać przeniesione do archiwum
+    order_id = Column(Integer, nullable=True, index=True)
+    reference = Column(String, nullable=True)  # numer dokumentu magazynowego
+    notes = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+
+    __table_args__ = (
+        # Historia ruchów produktu w kolejności księgowania
+        Index("ix_inventorytransaction_product_id_id", "product_id", "id"),
+    )
+
+
+class InventoryBalance(Base):
+    """
+    Bieżące saldo magazynowe produktu, aktualizowane przyrostowo przy każdym
+    księgowaniu ruchu - obliczenia MRP czytają saldo bez przeglądania dziennika.
+    """
+
+    product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    on_hand = Column(Float, nullable=False, default=0.0)
+    last_transaction_id = Column(Integer, nullable=True)  # ostatni ruch ujęty w saldzie
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Text, Enum, Boolean
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Text, Enum, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -9,18 +9,27 @@ from app.db.base_class import Base
 class MaterialRequirementStatus(str, enum.Enum):
     """Status zapotrzebowania materiałowego"""
     DRAFT = "draft"  # Projekt zapotrzebowania
+    QUEUED = "queued"  # Obliczenia oczekują w kolejce
+    CALCULATING = "calculating"  # Obliczenia w toku
     CALCULATED = "calculated"  # Obliczone zapotrzebowanie
     PROCESSING = "processing"  # W trakcie realizacji
     COMPLETED = "completed"  # Zrealizowane
     CANCELLED = "cancelled"  # Anulowane
 
 
+class PlanningBucket(str, enum.Enum):
+    """Okres grupowania zapotrzebowania w czasie (time-phasing)"""
+    NONE = "none"  # Jedna pozycja na produkt dla całego horyzontu
+    DAY = "day"  # Okresy dzienne
+    WEEK = "week"  # Okresy tygodniowe (od poniedziałku)
+
+
 class MaterialRequirement(Base):
     """Model zapotrzebowania materiałowego w systemie MRP"""
     
     reference_number = Column(String, unique=True, index=True, nullable=False)
     status = Column(Enum(MaterialRequirementStatus), nullable=False, default=MaterialRequirementStatus.DRAFT)
-    creation_date = Column(DateTime, default=datetime.utcnow)
+    creation_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     calculation_date = Column(DateTime, nullable=True)
     notes = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
@@ -35,12 +44,25 @@ class MaterialRequirement(Base):
     planning_start_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     planning_end_date = Column(DateTime, nullable=True)
     
+    # Okres grupowania zapotrzebowania w horyzoncie planowania
+    planning_bucket = Column(Enum(PlanningBucket), nullable=False, default=PlanningBucket.NONE)
+    
+    # Metadane ostatniego obliczenia (tryb eksplozji, liczba pozycji i zapytań, czasy)
+    calculation_metadata = Column(JSON, nullable=True)
+    
     # Relacje
     items = relationship("MaterialRequirementItem", back_populates="material_requirement", cascade="all, delete-orphan")
     user = relationship("User", back_populates="material_requirements")
     
     # Relacja do zamówień, które były podstawą obliczeń
     source_orders = relationship("MaterialRequirementOrder", back_populates="material_requirement")
+    
+    __table_args__ = (
+        # Kolejność i stronicowanie kursorem listy zapotrzebowań
+        Index("ix_materialrequirement_creation_date_id", "creation_date", "id"),
+        # Archiwizacja przenosi rekordy z ID - SQLite nie może ponownie nadać zwolnionego ID
+        {"sqlite_autoincrement": True},
+    )
 
 
 class MaterialRequirementOrder(Base):
@@ -52,6 +74,11 @@ class MaterialRequirementOrder(Base):
     # Relacje
     material_requirement = relationship("MaterialRequirement", back_populates="source_orders")
     order = relationship("Order")
+    
+    __table_args__ = (
+        Index("ix_materialrequirementorder_requirement_order", "material_requirement_id", "order_id"),
+        {"sqlite_autoincrement": True},
+    )
 
 
 class MaterialRequirementItem(Base):
@@ -84,3 +111,36 @@ class MaterialRequirementItem(Base):
     # Relacje
     material_requirement = relationship("MaterialRequirement", back_populates="items")
     product = relationship("Product")
+    
+    __table_args__ = (
+        Index("ix_materialrequirementitem_requirement_product", "material_requirement_id", "product_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class MaterialRequirementPegging(Base):
+    """
+    Powiązanie (pegging) zapotrzebowania na produkt z pozycją zamówienia, z której wynika.
+    Zapisywane podczas obliczeń - pozwala wskazać źródło zapotrzebowania bez ponownej eksplozji BOM.
+    """
+    
+    material_requirement_id = Column(Integer, ForeignKey("materialrequirement.id"), nullable=False)
+    material_requirement_item_id = Column(
+        Integer, ForeignKey("materialrequirementitem.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    
+    # Źródło zapotrzebowania
+    order_id = Column(Integer, ForeignKey("order.id", ondelete="CASCADE"), nullable=False, index=True)
+    order_item_id = Column(Integer, ForeignKey("orderitem.id", ondelete="SET NULL"), nullable=True, index=True)
+    end_product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    
+    # Ścieżka w strukturze: ID produktów od pozycji zamówienia do zespołu zawierającego produkt (np. "12/34")
+    bom_path = Column(String, nullable=False, default="")
+    
+    quantity = Column(Float, nullable=False)
+    required_date = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_materialrequirementpegging_requirement_product", "material_requirement_id", "product_id"),
+    )
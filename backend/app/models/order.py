@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -30,7 +30,7 @@ class Order(Base):
     status = Column(Enum(OrderStatus), nullable=False, default=OrderStatus.DRAFT)
     customer_name = Column(String, nullable=True)
     customer_reference = Column(String, nullable=True)
-    order_date = Column(DateTime, default=datetime.utcnow)
+    order_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     required_date = Column(DateTime, nullable=True)
     estimated_completion_date = Column(DateTime, nullable=True)
     actual_completion_date = Column(DateTime, nullable=True)
@@ -40,13 +40,22 @@ class Order(Base):
     # Relacje
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     user = relationship("User", back_populates="orders")
+    
+    __table_args__ = (
+        # Kolejność i stronicowanie kursorem listy zamówień
+        Index("ix_order_order_date_id", "order_date", "id"),
+        # Przyjęcia planowane - otwarte zamówienia zakupu
+        Index("ix_order_order_type_status", "order_type", "status"),
+        # Archiwizacja przenosi rekordy z ID - SQLite nie może ponownie nadać zwolnionego ID
+        {"sqlite_autoincrement": True},
+    )
 
 
 class OrderItem(Base):
     """Pozycja w zamówieniu"""
     
-    order_id = Column(Integer, ForeignKey("order.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("order.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False, index=True)
     quantity = Column(Float, nullable=False)
     unit_price = Column(Float, nullable=True)
     position = Column(Integer, nullable=True)
@@ -55,3 +64,5 @@ class OrderItem(Base):
     # Relacje
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
+    
+    __table_args__ = {"sqlite_autoincrement": True}
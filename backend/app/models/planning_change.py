@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, Index
+
+from app.db.base_class import Base
+
+
+class PlanningChange(Base):
+    """
+    Dziennik zmian danych planistycznych (zamówień, list BOM, produktów i stanów magazynowych).
+    Każdy wpis wskazuje produkt, którego zapotrzebowanie mogło się zmienić - na tej
+    podstawie obliczenia net-change rozwijają ponownie tylko dotknięte gałęzie struktur.
+    """
+    
+    entity_type = Column(String, nullable=False)  # order, bom, product, inventory
+    entity_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_planningchange_created_at", "created_at"),
+    )
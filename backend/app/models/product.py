@@ -1,8 +1,9 @@
-from sqlalchemy import Boolean, Column, String, Float, Integer, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Boolean, Column, String, Float, Integer, Text, Enum, Index, event, func, select
+from sqlalchemy.orm import column_property, relationship
 import enum
 
 from app.db.base_class import Base
+from app.models.inventory import InventoryBalance
 
 
 class ProductType(str, enum.Enum):
@@ -22,7 +23,8 @@ class Product(Base):
     product_type = Column(Enum(ProductType), nullable=False, default=ProductType.COMPONENT)
     unit = Column(String, nullable=False, default="pcs")  # units, kg, m, m2, itp.
     price = Column(Float, nullable=True)
-    quantity_in_stock = Column(Float, default=0.0)
+    # Stan początkowy - trafia do dziennika ruchów jako korekta otwierająca saldo produktu
+    opening_stock = Column("quantity_in_stock", Float, default=0.0)
     minimum_stock = Column(Float, default=0.0)
     lead_time_days = Column(Integer, default=0)  # czas oczekiwania na dostawę w dniach
     active = Column(Boolean, default=True)
@@ -31,3 +33,53 @@ class Product(Base):
     bom_parent = relationship("BOM", back_populates="product")
     bom_items = relationship("BOMItem", back_populates="component")
     order_items = relationship("OrderItem", back_populates="product")
+    
+    __table_args__ = (
+        # Wyszukiwanie po początku kodu bez rozróżniania wielkości liter (app.core.product_search)
+        Index("ix_product_code_upper", func.upper(code)),
+    )
+
+
+# Stan magazynowy produktu to saldo z dziennika ruchów (InventoryBalance); produkt bez salda
+# (sprzed dziennika ruchów) ma stan zapisany jako stan początkowy
+Product.quantity_in_stock = column_property(
+    func.coalesce(
+        select(InventoryBalance.on_hand).where(InventoryBalance.product_id == Product.id).scalar_subquery(),
+        Product.opening_stock
+    )
+)
+
+
+# Wyszukiwanie produktów po kodzie i nazwie (app.core.product_search):
+# - PostgreSQL: indeksy GIN z operatorami trigramowymi (pg_trgm) - LIKE/ILIKE '%x%' i podobieństwo
+# - SQLite: tabela FTS5 z tokenizerem trigramowym, synchronizowana z tabelą product wyzwalaczami
+PRODUCT_SEARCH_TABLE = "productsearch"
+
+POSTGRESQL_PRODUCT_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_product_code_trgm ON product USING gin (code gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_product_name_trgm ON product USING gin (name gin_trgm_ops)",
+)
+
+SQLITE_PRODUCT_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {PRODUCT_SEARCH_TABLE} USING fts5("
+    "code, name, content='product', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS product_search_insert AFTER INSERT ON product BEGIN "
+    f"INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, code, name) VALUES (new.id, new.code, new.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS product_search_delete AFTER DELETE ON product BEGIN "
+    f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, code, name) "
+    f"VALUES ('delete', old.id, old.code, old.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS product_search_update AFTER UPDATE OF code, name ON product BEGIN "
+    f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, code, name) "
+    f"VALUES ('delete', old.id, old.code, old.name); "
+    f"INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, code, name) VALUES (new.id, new.code, new.name); END",
+)
+
+for statement in POSTGRESQL_PRODUCT_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_PRODUCT_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Product.__table__, "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {PRODUCT_SEARCH_TABLE}").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+
+from app.db.base_class import Base
+
+
+class ReadPrimaryWindow(Base):
+    """
+    Okno read-your-writes przy replice do odczytu. Do read_primary_until odczyty użytkownika
+    (po jego zapisie) lub odczyty zapotrzebowania (po zakończeniu obliczeń) trafiają do bazy
+    głównej. Okno jest przechowywane po stronie serwera, więc obejmuje również klientów
+    bez ciasteczek (tokeny Bearer, integracje EDI) i wyniki zadań obliczeniowych.
+    """
+    
+    window_key = Column(String, nullable=False, unique=True, index=True)  # np. user:1, materialrequirement:5
+    read_primary_until = Column(DateTime, nullable=False)
@@ -1 +1,8 @@
 # Schemas module
+from app.schemas.material_requirement import (
+    MaterialRequirement, MaterialRequirementCreate, MaterialRequirementUpdate,
+    MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementPegging, MaterialRequirementWithDetails,
+    MaterialRequirementBatchCalculate, MaterialRequirementBatchResult
+)
+from app.schemas.calculation_job import CalculationJob
+from app.schemas.inventory import InventoryBalance, InventoryTransaction, InventoryTransactionCreate
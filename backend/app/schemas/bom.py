@@ -61,3 +61,13 @@ class BOMInDBBase(BOMBase):
 
 class BOM(BOMInDBBase):
     items: List[BOMItem] = []
+
+
+# Indeks grafu BOM
+class BOMGraphNode(BaseModel):
+    product_id: int
+    low_level_code: int
+    depth: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,23 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.models.calculation_job import CalculationJobStatus
+
+
+class CalculationJob(BaseModel):
+    id: int
+    material_requirement_id: int
+    status: CalculationJobStatus
+    progress: float = 0.0
+    explosion_mode: Optional[str] = None
+    net_change: bool = False
+    batch_id: Optional[str] = None
+    error: Optional[str] = None
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
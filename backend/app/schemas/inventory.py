@@ -0,0 +1,46 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.models.inventory import InventoryTransactionType
+
+
+class InventoryTransactionBase(BaseModel):
+    product_id: Optional[int] = None
+    transaction_type: Optional[InventoryTransactionType] = None
+    quantity: Optional[float] = None
+    order_id: Optional[int] = None
+    reference: Optional[str] = None
+    notes: Optional[str] = None
+
+
+# Przyjęcie i wydanie - ilość dodatnia, korekta - zmiana stanu ze znakiem
+class InventoryTransactionCreate(InventoryTransactionBase):
+    product_id: int
+    transaction_type: InventoryTransactionType
+    quantity: float
+
+
+class InventoryTransaction(InventoryTransactionBase):
+    id: int
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScheduledReceipt(BaseModel):
+    receipt_date: datetime
+    quantity: float
+    order_id: int
+    order_number: str
+    projected_balance: float  # prognozowany stan po dostawie
+
+
+class InventoryBalance(BaseModel):
+    product_id: int
+    on_hand: float = 0.0
+    last_transaction_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    scheduled_receipts: List[ScheduledReceipt] = []
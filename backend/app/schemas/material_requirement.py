@@ -2,7 +2,7 @@ from typing import Optional, List, Any, Dict
 from datetime import datetime
 from pydantic import BaseModel, Field
 
-from app.models.material_requirement import MaterialRequirementStatus
+from app.models.material_requirement import MaterialRequirementStatus, PlanningBucket
 
 
 # Schematy dla MaterialRequirementItem
@@ -30,7 +30,7 @@ class MaterialRequirementItemInDBBase(MaterialRequirementItemBase):
     material_requirement_id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class MaterialRequirementItem(MaterialRequirementItemInDBBase):
@@ -51,13 +51,30 @@ class MaterialRequirementOrderInDBBase(MaterialRequirementOrderBase):
     material_requirement_id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class MaterialRequirementOrder(MaterialRequirementOrderInDBBase):
     pass
 
 
+# Schematy dla MaterialRequirementPegging
+class MaterialRequirementPegging(BaseModel):
+    id: int
+    material_requirement_id: int
+    material_requirement_item_id: Optional[int] = None
+    product_id: int
+    order_id: int
+    order_item_id: Optional[int] = None
+    end_product_id: int
+    bom_path: str = ""
+    quantity: float
+    required_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Schematy dla MaterialRequirement
 class MaterialRequirementBase(BaseModel):
     reference_number: str
@@ -67,6 +84,7 @@ class MaterialRequirementBase(BaseModel):
     consider_min_stock: bool = True
     planning_start_date: datetime
     planning_end_date: Optional[datetime] = None
+    planning_bucket: PlanningBucket = PlanningBucket.NONE
 
 
 class MaterialRequirementCreate(MaterialRequirementBase):
@@ -81,23 +99,39 @@ class MaterialRequirementUpdate(BaseModel):
     consider_min_stock: Optional[bool] = None
     planning_start_date: Optional[datetime] = None
     planning_end_date: Optional[datetime] = None
+    planning_bucket: Optional[PlanningBucket] = None
 
 
 class MaterialRequirementInDBBase(MaterialRequirementBase):
     id: int
     creation_date: datetime
     calculation_date: Optional[datetime] = None
+    calculation_metadata: Optional[Dict[str, Any]] = None
     user_id: Optional[int] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class MaterialRequirement(MaterialRequirementInDBBase):
     items: List[MaterialRequirementItem] = []
     source_orders: List[MaterialRequirementOrder] = []
+    archived_at: Optional[datetime] = None  # data przeniesienia do archiwum
 
 
 class MaterialRequirementWithDetails(MaterialRequirementInDBBase):
     items: List[Dict[str, Any]] = []  # Szczegóły z dołączonymi informacjami o produktach
     source_orders: List[Dict[str, Any]] = []  # Szczegóły z dołączonymi informacjami o zamówieniach
+
+
+# Schematy dla obliczeń wsadowych
+class MaterialRequirementBatchCalculate(BaseModel):
+    material_requirement_ids: List[int] = Field(..., min_length=1)
+    explosion_mode: Optional[str] = None
+
+
+class MaterialRequirementBatchResult(BaseModel):
+    material_requirement_id: int
+    status: str  # status zadania (queued, running, completed, failed) lub failed bez zadania
+    job_id: Optional[int] = None
+    error: Optional[str] = None
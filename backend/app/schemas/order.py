@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from app.models.order import OrderStatus, OrderType
 
@@ -68,6 +68,19 @@ class OrderInDBBase(OrderBase):
 
 class Order(OrderInDBBase):
     items: List[OrderItem] = []
+    archived_at: Optional[datetime] = None  # data przeniesienia do archiwum
+
+
+# Schematy dla tworzenia wsadowego
+class OrderBatchCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_length=1)
+
+
+class OrderBatchResult(BaseModel):
+    order_number: str
+    status: str  # created, failed
+    order_id: Optional[int] = None
+    error: Optional[str] = None
 
 
 # Schemat do filtrowania zamówień
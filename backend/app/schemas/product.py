@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.models.product import ProductType
 
@@ -49,3 +49,23 @@ class ProductFilter(BaseModel):
     product_type: Optional[ProductType] = None
     active: Optional[bool] = None
     min_stock: Optional[float] = None
+
+
+# Wiersz importu produktów - brakujące pola nie zmieniają istniejącego produktu
+class ProductImportRow(ProductBase):
+    code: str = Field(..., min_length=1)
+    quantity_in_stock: Optional[float] = Field(None, ge=0)
+
+
+class ProductImportRowError(BaseModel):
+    row: int  # numer wiersza (linii) w pliku; 0 - błąd całego pliku, który przerwał import
+    code: Optional[str] = None
+    errors: List[str]
+
+
+class ProductImportResult(BaseModel):
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ProductImportRowError] = []  # pierwsze błędy (najwyżej IMPORT_MAX_REPORTED_ERRORS)
@@ -0,0 +1,39 @@
+"""
+Skrypt archiwizujący ukończone i anulowane zamówienia oraz zapotrzebowania materiałowe.
+Rekordy starsze niż ARCHIVE_AFTER_DAYS dni (lub --days) są przenoszone do tabel archiwum,
+dzięki czemu tabele bieżące pozostają małe. Zarchiwizowane rekordy są dostępne w API
+z parametrem include_archived=true.
+
+Skrypt jest przeznaczony do okresowego uruchamiania (np. z crona).
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Dodaj katalog backendu do sys.path, aby umożliwić importy aplikacji
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.archive import archive_records
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archiwizacja zamkniętych zamówień i zapotrzebowań")
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                        help="Minimalny wiek rekordu (dni od ostatniej zmiany)")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE,
+                        help="Liczba rekordów przenoszonych w jednej transakcji")
+    args = parser.parse_args()
+
+    if args.days < 0 or args.batch_size < 1:
+        print("Wiek rekordów nie może być ujemny, a rozmiar partii musi być dodatni")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        archived = archive_records(db, datetime.utcnow() - timedelta(days=args.days), args.batch_size)
+    finally:
+        db.close()
+    print(f"Zarchiwizowano zapotrzebowań: {archived['material_requirements']}, zamówień: {archived['orders']}")
@@ -0,0 +1,86 @@
+"""
+Skrypt mierzący przepustowość (żądania na sekundę) endpointów odczytu API.
+Uruchamia zadaną liczbę równoległych klientów, które przez określony czas wysyłają
+żądania GET do wskazanych endpointów, i wypisuje liczbę żądań na sekundę oraz czasy odpowiedzi.
+
+Porównanie przed i po zmianie: uruchom skrypt kolejno dla dwóch instancji backendu
+(np. dwóch wersji kodu na różnych portach) z tymi samymi parametrami.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_ENDPOINTS = [
+    "/products/",
+    "/boms/",
+    "/orders/",
+    "/material-requirements/",
+]
+
+
+async def run_client(
+    client: httpx.AsyncClient, urls: List[str], deadline: float, latencies: List[float], errors: Dict[int, int]
+) -> None:
+    """Klient wysyłający żądania do kolejnych endpointów do upływu czasu testu."""
+    position = 0
+    while time.perf_counter() < deadline:
+        url = urls[position % len(urls)]
+        position += 1
+        started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+
+async def benchmark(base_url: str, endpoints: List[str], concurrency: int, duration: float, token: str) -> None:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    urls = [f"{base_url}{endpoint}" for endpoint in endpoints]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=60) as client:
+        # Rozgrzewka - nawiązanie połączeń i wypełnienie pamięci podręcznych bazy danych
+        await asyncio.gather(*(client.get(url) for url in urls))
+
+        latencies: List[float] = []
+        errors: Dict[int, int] = {}
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            run_client(client, urls, deadline, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"Endpointy: {', '.join(endpoints)}")
+    print(f"Klienci równolegli: {concurrency}, czas testu: {elapsed:.1f} s")
+    print(f"Żądania: {len(latencies)}, błędy: {errors or 0}")
+    print(f"Przepustowość: {len(latencies) / elapsed:.1f} żądań/s")
+    if latencies:
+        print(
+            f"Czas odpowiedzi: mediana {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+            f"max {latencies[-1] * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pomiar przepustowości endpointów odczytu API")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1", help="Bazowy URL API")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="Endpoint do testu (można podać wielokrotnie)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Liczba równoległych klientów")
+    parser.add_argument("--duration", type=float, default=15, help="Czas testu w sekundach")
+    parser.add_argument("--token", default="", help="Token JWT (gdy uwierzytelnianie jest wymagane)")
+    args = parser.parse_args()
+
+    if args.concurrency < 1 or args.duration <= 0:
+        print("Liczba klientów i czas testu muszą być dodatnie")
+        sys.exit(1)
+
+    asyncio.run(benchmark(args.url, args.endpoints or DEFAULT_ENDPOINTS, args.concurrency, args.duration, args.token))
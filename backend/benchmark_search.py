@@ -0,0 +1,114 @@
+"""
+Skrypt mierzący czas wyszukiwania produktów (app.core.product_search) na dużym katalogu.
+Domyślnie tworzy tymczasową bazę SQLite, wypełnia ją zadaną liczbą produktów, wykonuje
+serię typowych zapytań i wypisuje medianę oraz 95. percentyl czasu odpowiedzi.
+Kończy się błędem, jeśli 95. percentyl przekracza zadany limit.
+
+Dla istniejącej bazy (np. PostgreSQL z migracją 012) podaj --database-url i --products 0.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+# Dodaj katalog backendu do sys.path, aby umożliwić importy aplikacji
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.product_search import product_search_statement
+from app.db.base import Base
+from app.models.product import Product, ProductType
+
+NAME_WORDS = [
+    "kadłub", "pokład", "maszt", "bom", "żagiel", "grot", "fok", "ster", "miecz", "kil",
+    "okucie", "wanta", "sztag", "knaga", "kabestan", "bloczek", "lina", "szekla", "pompa", "zbiornik",
+    "silnik", "śruba", "wał", "panel", "kabina", "koja", "stół", "luk", "bulaj", "reling",
+]
+MATERIAL_WORDS = ["stal", "nierdzewna", "aluminium", "laminat", "tik", "mahoń", "dakron", "kevlar", "epoksyd"]
+
+DEFAULT_QUERIES = ["maszt", "KOM-0123", "00042", "reling tik", "kil stal", "ks", "knaga alu", "żagiel dakron"]
+
+
+def seed_products(session: Session, count: int, batch_size: int = 10000) -> None:
+    """Dodaje produkty o losowych kodach i nazwach złożonych ze słownika."""
+    generator = random.Random(42)
+    prefixes = {ProductType.FINAL: "LOD", ProductType.COMPONENT: "KOM", ProductType.MATERIAL: "MAT"}
+    start = session.execute(select(func.count(Product.id))).scalar() or 0
+    for offset in range(0, count, batch_size):
+        rows = []
+        for number in range(start + offset, start + min(offset + batch_size, count)):
+            product_type = generator.choice(list(prefixes))
+            rows.append({
+                "code": f"{prefixes[product_type]}-{number:06d}",
+                "name": " ".join([
+                    generator.choice(NAME_WORDS).capitalize(),
+                    generator.choice(MATERIAL_WORDS),
+                    f"{generator.randint(1, 999)} mm",
+                ]),
+                "product_type": product_type,
+                "unit": "pcs",
+                "active": generator.random() > 0.1,
+            })
+        session.execute(insert(Product), rows)
+        session.commit()
+
+
+def benchmark(session: Session, queries: List[str], repeat: int) -> List[float]:
+    """Wykonuje każde zapytanie repeat razy i zwraca czasy w milisekundach."""
+    dialect_name = session.get_bind().dialect.name
+    latencies = []
+    for query in queries:
+        # Rozgrzewka - wypełnienie pamięci podręcznej stron bazy danych
+        session.execute(product_search_statement(dialect_name, query)).scalars().all()
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = session.execute(product_search_statement(dialect_name, query)).scalars().all()
+            times.append((time.perf_counter() - started) * 1000)
+        latencies.extend(times)
+        print(f"{query!r:24} wyniki: {len(results):3}  mediana: {statistics.median(times):6.2f} ms  "
+              f"pierwszy: {results[0].code + ' ' + results[0].name if results else '-'}")
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pomiar czasu wyszukiwania produktów")
+    parser.add_argument("--database-url", default=None,
+                        help="Adres bazy danych (domyślnie tymczasowa baza SQLite)")
+    parser.add_argument("--products", type=int, default=100000, help="Liczba produktów do dodania")
+    parser.add_argument("--query", action="append", dest="queries",
+                        help="Zapytanie do testu (można podać wielokrotnie)")
+    parser.add_argument("--repeat", type=int, default=50, help="Liczba powtórzeń każdego zapytania")
+    parser.add_argument("--target-ms", type=float, default=20, help="Limit 95. percentyla w ms")
+    args = parser.parse_args()
+
+    temporary_directory = None
+    database_url = args.database_url
+    if database_url is None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temporary_directory.name, 'search.sqlite')}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        if args.products:
+            started = time.perf_counter()
+            seed_products(session, args.products)
+            print(f"Dodano {args.products} produktów w {time.perf_counter() - started:.1f} s")
+        latencies = sorted(benchmark(session, args.queries or DEFAULT_QUERIES, args.repeat))
+    engine.dispose()
+    if temporary_directory is not None:
+        temporary_directory.cleanup()
+
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"Łącznie: mediana {statistics.median(latencies):.2f} ms, p95 {p95:.2f} ms, max {latencies[-1]:.2f} ms")
+    if p95 > args.target_ms:
+        print(f"❌ 95. percentyl przekracza {args.target_ms} ms")
+        sys.exit(1)
+    print(f"✅ 95. percentyl poniżej {args.target_ms} ms")
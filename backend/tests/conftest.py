@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Silniki bazy danych aplikacji są tworzone przy imporcie (app.db.session) - testy korzystają
+# z tymczasowej bazy SQLite, nigdy z bazy wskazanej w środowisku
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mrp-tests-"), "mrp.sqlite")
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.archive import archive_records, existing_order_numbers, reference_number_exists
+from app.db.base import Base
+from app.models.archive import OrderArchive
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementStatus
+from app.models.order import Order, OrderStatus
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'archive.sqlite'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _order(order_number: str, status: OrderStatus = OrderStatus.DRAFT) -> Order:
+    closed_at = datetime.utcnow() - timedelta(days=365)
+    return Order(
+        order_number=order_number, status=status, order_date=closed_at,
+        actual_completion_date=closed_at, updated_at=closed_at
+    )
+
+
+def test_archived_order_id_is_not_reused(db):
+    open_order = _order("ZAM-1")
+    closed_order = _order("ZAM-2", OrderStatus.COMPLETED)
+    db.add_all([open_order, closed_order])
+    db.commit()
+    archived_id = closed_order.id
+    assert archived_id > open_order.id
+
+    # Archiwizacja rekordu o najwyższym ID
+    assert archive_records(db, older_than=datetime.utcnow())["orders"] == 1
+    assert db.get(Order, archived_id) is None
+    assert db.get(OrderArchive, archived_id) is not None
+
+    new_order = _order("ZAM-3", OrderStatus.COMPLETED)
+    db.add(new_order)
+    db.commit()
+    new_id = new_order.id
+    assert new_id > archived_id
+
+    # Kolejna archiwizacja nie narusza unikalności ID w tabeli archiwum
+    assert archive_records(db, older_than=datetime.utcnow())["orders"] == 1
+    assert db.get(OrderArchive, new_id).order_number == "ZAM-3"
+
+
+def test_archived_numbers_stay_taken(db):
+    closed_at = datetime.utcnow() - timedelta(days=365)
+    db.add_all([
+        _order("ZAM-1"),
+        _order("ZAM-2", OrderStatus.COMPLETED),
+        MaterialRequirement(
+            reference_number="MRP-1", status=MaterialRequirementStatus.COMPLETED,
+            creation_date=closed_at, planning_start_date=closed_at, updated_at=closed_at
+        ),
+    ])
+    db.commit()
+    archived = archive_records(db, older_than=datetime.utcnow())
+    assert archived == {"material_requirements": 1, "orders": 1}
+
+    # Numery rekordów z archiwum nie mogą zostać użyte ponownie
+    assert existing_order_numbers(db, ["ZAM-1", "ZAM-2", "ZAM-3"]) == {"ZAM-1", "ZAM-2"}
+    assert reference_number_exists(db, "MRP-1")
+    assert not reference_number_exists(db, "MRP-2")
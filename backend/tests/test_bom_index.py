@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.bom_index import BOMCycleError, update_bom_index
+from app.db.base import Base
+from app.models.bom import BOM, BOMItem
+from app.models.product import Product, ProductType
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bom.sqlite'}", connect_args={"timeout": 10})
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        engine.dispose()
+
+
+def _add_bom(db, product_id: int, component_id: int) -> None:
+    bom = BOM(name=f"BOM {product_id}", product_id=product_id, is_active=True)
+    db.add(bom)
+    db.flush()
+    db.add(BOMItem(bom_id=bom.id, component_id=component_id, quantity=1))
+    db.flush()
+
+
+def test_concurrent_boms_cannot_create_cycle(session_factory):
+    with session_factory() as db:
+        products = [Product(code=code, name=code, product_type=ProductType.COMPONENT) for code in ("A", "B")]
+        db.add_all(products)
+        db.commit()
+        a_id, b_id = (product.id for product in products)
+
+    checked = threading.Event()
+    errors = []
+
+    def add_reverse_bom():
+        # Druga transakcja: B -> A, rozpoczęta po sprawdzeniu cykli pierwszej, przed jej zatwierdzeniem
+        checked.wait()
+        with session_factory() as db:
+            try:
+                _add_bom(db, b_id, a_id)
+                update_bom_index(db)
+                db.commit()
+            except BOMCycleError as e:
+                db.rollback()
+                errors.append(e)
+
+    thread = threading.Thread(target=add_reverse_bom)
+    thread.start()
+    with session_factory() as db:
+        _add_bom(db, a_id, b_id)
+        update_bom_index(db)
+        checked.set()
+        thread.join(timeout=0.5)
+        db.commit()
+    thread.join()
+
+    assert len(errors) == 1
+    with session_factory() as db:
+        assert db.query(BOM).count() == 1
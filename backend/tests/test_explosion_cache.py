@@ -0,0 +1,28 @@
+from app.core.explosion_cache import CachedExplosion, ExplosionCache
+
+
+def _explosion(*product_ids: int) -> CachedExplosion:
+    return CachedExplosion(quantities={product_ids[-1]: 1.0}, dependencies=frozenset(product_ids))
+
+
+def test_put_from_graph_loaded_before_invalidation_is_dropped():
+    cache = ExplosionCache(max_size=10)
+    generation = cache.generation
+
+    # Lista BOM zespołu 1 zmieniona po wczytaniu grafu, a przed zapisaniem rozwinięcia
+    cache.invalidate([1])
+    cache.put((1, 10, None), _explosion(1, 2), generation)
+    assert cache.get((1, 10, None)) is None
+
+    cache.put((1, 10, None), _explosion(1, 2), cache.generation)
+    assert cache.get((1, 10, None)) is not None
+
+
+def test_invalidate_removes_assemblies_containing_product():
+    cache = ExplosionCache(max_size=10)
+    cache.put((1, 10, None), _explosion(1, 2, 3))
+    cache.put((4, 11, None), _explosion(4, 5))
+
+    assert cache.invalidate([3]) == 1
+    assert cache.get((1, 10, None)) is None
+    assert cache.get((4, 11, None)) is not None
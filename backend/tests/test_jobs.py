@@ -0,0 +1,166 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from app.core import jobs
+from app.core.calculation_lock import CalculationLockLost, requirement_lock
+from app.core.config import settings
+from app.core.read_your_writes import read_primary_statement, window_keys
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.calculation_job import CalculationJob, CalculationJobStatus, CalculationLock
+from app.models.material_requirement import (
+    MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementStatus
+)
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, ProductType
+
+
+@pytest.fixture
+def material_requirement_id():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    product = Product(code="J-1", name="Produkt", product_type=ProductType.COMPONENT)
+    order = Order(order_number="J-1", status=OrderStatus.CONFIRMED, required_date=datetime(2026, 1, 1))
+    order.items = [OrderItem(product=product, quantity=2)]
+    material_requirement = MaterialRequirement(
+        reference_number="J-1", status=MaterialRequirementStatus.DRAFT, planning_start_date=datetime(2026, 1, 1)
+    )
+    material_requirement.source_orders = [MaterialRequirementOrder(order=order)]
+    db.add_all([product, order, material_requirement])
+    db.commit()
+    try:
+        yield material_requirement.id
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_heartbeat_keeps_lock_until_taken_over(material_requirement_id):
+    with requirement_lock(engine, material_requirement_id) as lock:
+        lock.start_heartbeat(interval=0.05)
+        with engine.begin() as connection:
+            connection.execute(update(CalculationLock).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        time.sleep(0.3)
+        with SessionLocal() as db:
+            assert db.query(CalculationLock.expires_at).scalar() > datetime.utcnow()
+
+        # Blokada przejęta przez inny proces
+        with engine.begin() as connection:
+            connection.execute(update(CalculationLock).values(owner="inny"))
+        time.sleep(0.3)
+        assert lock.lost
+        with pytest.raises(CalculationLockLost):
+            lock.verify()
+
+
+def test_job_abandoned_during_calculation_is_not_completed(material_requirement_id, monkeypatch):
+    with SessionLocal() as db:
+        job = CalculationJob(material_requirement_id=material_requirement_id, status=CalculationJobStatus.QUEUED)
+        db.add(job)
+        db.commit()
+        job_id = job.id
+
+    calculate_mrp = jobs.calculate_mrp
+
+    def abandon_and_calculate(*args, **kwargs):
+        # Inny proces uznaje zadanie za porzucone w trakcie obliczeń
+        with engine.begin() as connection:
+            connection.execute(
+                update(CalculationJob.__table__)
+                .where(CalculationJob.__table__.c.id == job_id)
+                .values(status=CalculationJobStatus.FAILED, error="Zadanie obliczeniowe zostało przerwane")
+            )
+        return calculate_mrp(*args, **kwargs)
+
+    monkeypatch.setattr(jobs, "calculate_mrp", abandon_and_calculate)
+    jobs.run_calculation_job(job_id)
+
+    with SessionLocal() as db:
+        job = db.get(CalculationJob, job_id)
+        assert job.status == CalculationJobStatus.FAILED
+        assert job.error == "Zadanie obliczeniowe zostało przerwane"
+        assert db.query(MaterialRequirementItem).count() == 0
+        assert db.get(MaterialRequirement, material_requirement_id).calculation_date is None
+
+
+def test_job_completes_with_results(material_requirement_id, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", "sqlite://")
+    with SessionLocal() as db:
+        job = CalculationJob(material_requirement_id=material_requirement_id, status=CalculationJobStatus.QUEUED)
+        db.add(job)
+        db.commit()
+        job_id = job.id
+
+    jobs.run_calculation_job(job_id)
+
+    with SessionLocal() as db:
+        job = db.get(CalculationJob, job_id)
+        assert job.status == CalculationJobStatus.COMPLETED
+        assert job.progress == 1.0
+        assert db.get(MaterialRequirement, material_requirement_id).status == MaterialRequirementStatus.CALCULATED
+        assert db.query(CalculationLock).count() == 0
+        # Odczyty wyników zapotrzebowania trafiają przez chwilę do bazy głównej
+        assert db.execute(read_primary_statement(window_keys(material_requirement_ids=[material_requirement_id]))).scalar()
+
+
+def test_batch_jobs_complete_together(material_requirement_id, monkeypatch):
+    with SessionLocal() as db:
+        second = MaterialRequirement(reference_number="J-2", status=MaterialRequirementStatus.DRAFT)
+        second.source_orders = [MaterialRequirementOrder(order_id=db.query(Order.id).scalar())]
+        db.add(second)
+        db.commit()
+        material_requirements = db.query(MaterialRequirement).all()
+
+        # Partia jest wykonywana w teście synchronicznie, zamiast w puli
+        submitted = []
+        monkeypatch.setattr(jobs, "get_executor", lambda: SimpleNamespace(submit=lambda *args: submitted.append(args)))
+        batch_jobs, errors = jobs.enqueue_batch_calculation(db, material_requirements)
+        assert not errors
+        assert {job.status for job in batch_jobs.values()} == {CalculationJobStatus.QUEUED}
+        assert len({job.batch_id for job in batch_jobs.values()}) == 1
+        assert len(submitted) == 1
+
+    function, batch_id = submitted[0]
+    function(batch_id)
+
+    with SessionLocal() as db:
+        assert {job.status for job in db.query(CalculationJob)} == {CalculationJobStatus.COMPLETED}
+        assert {mr.status for mr in db.query(MaterialRequirement)} == {MaterialRequirementStatus.CALCULATED}
+        assert db.query(MaterialRequirementItem).count() == 2
+        assert db.query(CalculationLock).count() == 0
+
+
+def test_startup_recovery_fails_interrupted_jobs(material_requirement_id):
+    with SessionLocal() as db:
+        calculated = MaterialRequirement(
+            reference_number="J-2", status=MaterialRequirementStatus.CALCULATING, calculation_date=datetime(2026, 1, 1)
+        )
+        db.add(calculated)
+        db.get(MaterialRequirement, material_requirement_id).status = MaterialRequirementStatus.QUEUED
+        db.add(CalculationJob(material_requirement_id=material_requirement_id, status=CalculationJobStatus.QUEUED))
+        db.commit()
+        calculated_id = calculated.id
+
+        assert jobs.recover_interrupted_jobs(db) == 1
+
+    with SessionLocal() as db:
+        job = db.query(CalculationJob).one()
+        assert job.status == CalculationJobStatus.FAILED
+        assert job.error == "Zadanie obliczeniowe zostało przerwane przez restart aplikacji"
+        assert db.get(MaterialRequirement, material_requirement_id).status == MaterialRequirementStatus.DRAFT
+        # Zapotrzebowanie bez aktywnego zadania wraca do statusu obliczonego
+        assert db.get(MaterialRequirement, calculated_id).status == MaterialRequirementStatus.CALCULATED
+
+
+def test_startup_recovery_skips_jobs_locked_by_running_process(material_requirement_id):
+    with SessionLocal() as db:
+        db.add(CalculationJob(material_requirement_id=material_requirement_id, status=CalculationJobStatus.RUNNING))
+        db.commit()
+
+        with requirement_lock(engine, material_requirement_id):
+            assert jobs.recover_interrupted_jobs(db) == 0
+        assert db.query(CalculationJob.status).scalar() == CalculationJobStatus.RUNNING
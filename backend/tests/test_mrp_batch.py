@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+
+from app.core.mrp import EXPLOSION_MODES, calculate_mrp, calculate_mrp_batch
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.bom import BOM, BOMItem
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, ProductType
+
+
+@pytest.fixture
+def material_requirement_ids() -> List[int]:
+    """Trzy zapotrzebowania o częściowo wspólnych zamówieniach (wspólny zespół w dwóch wyrobach)."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    materials = [Product(code=f"M-{index}", name=f"Materiał {index}", product_type=ProductType.MATERIAL) for index in range(3)]
+    engine_assembly = Product(code="SILNIK", name="Silnik", product_type=ProductType.COMPONENT)
+    boats = [Product(code=f"LODZ-{index}", name=f"Łódź {index}", product_type=ProductType.FINAL) for index in range(2)]
+    db.add_all(materials + [engine_assembly] + boats)
+    db.flush()
+    db.add_all([
+        BOM(name="Silnik", product_id=engine_assembly.id, items=[
+            BOMItem(component_id=materials[0].id, quantity=2), BOMItem(component_id=materials[1].id, quantity=0.5)
+        ]),
+        BOM(name="Łódź 0", product_id=boats[0].id, items=[
+            BOMItem(component_id=engine_assembly.id, quantity=1), BOMItem(component_id=materials[2].id, quantity=3)
+        ]),
+        BOM(name="Łódź 1", product_id=boats[1].id, items=[
+            BOMItem(component_id=engine_assembly.id, quantity=2), BOMItem(component_id=materials[0].id, quantity=1)
+        ]),
+    ])
+
+    start = datetime(2026, 1, 5)
+    orders = []
+    for index in range(4):
+        order = Order(order_number=f"B-{index}", status=OrderStatus.CONFIRMED, required_date=start + timedelta(days=7 * index))
+        order.items = [
+            OrderItem(product_id=boats[index % 2].id, quantity=index + 1),
+            OrderItem(product_id=materials[1].id, quantity=1),
+        ]
+        orders.append(order)
+    # Zamówienie bez daty - data zapotrzebowania to koniec horyzontu zapotrzebowania
+    undated = Order(order_number="B-X", status=OrderStatus.CONFIRMED)
+    undated.items = [OrderItem(product_id=boats[1].id, quantity=2)]
+    orders.append(undated)
+    db.add_all(orders)
+
+    requirements = []
+    for index, requirement_orders in enumerate((orders[:3], orders[1:], orders[::2])):
+        material_requirement = MaterialRequirement(
+            reference_number=f"MR-{index}", planning_start_date=start, planning_end_date=start + timedelta(days=30 + index)
+        )
+        material_requirement.source_orders = [MaterialRequirementOrder(order=order) for order in requirement_orders]
+        requirements.append(material_requirement)
+    db.add_all(requirements)
+    db.commit()
+    try:
+        yield [material_requirement.id for material_requirement in requirements]
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def _items(db, material_requirement_id: int):
+    return sorted(
+        (item.product_id, item.requirement_date, round(item.required_quantity, 9), round(item.quantity_to_procure, 9))
+        for item in db.query(MaterialRequirementItem).filter(
+            MaterialRequirementItem.material_requirement_id == material_requirement_id
+        )
+    )
+
+
+@pytest.mark.parametrize("explosion_mode", EXPLOSION_MODES)
+def test_batch_matches_single_calculations(material_requirement_ids, explosion_mode):
+    if explosion_mode == "sparse":
+        pytest.importorskip("scipy")
+    with SessionLocal() as db:
+        expected = {}
+        for material_requirement_id in material_requirement_ids:
+            calculate_mrp(db, material_requirement_id, explosion_mode=explosion_mode)
+            expected[material_requirement_id] = _items(db, material_requirement_id)
+
+        results = calculate_mrp_batch(db, material_requirement_ids, explosion_mode=explosion_mode)
+
+        assert all(result["status"] == "calculated" for result in results.values()), results
+        for material_requirement_id in material_requirement_ids:
+            assert _items(db, material_requirement_id) == expected[material_requirement_id]
+        # Każde zamówienie rozwinięte raz dla partii (zamówienie bez daty - dla dwóch różnych horyzontów)
+        metadata = db.get(MaterialRequirement, material_requirement_ids[0]).calculation_metadata
+        assert metadata["exploded_orders"] == 6
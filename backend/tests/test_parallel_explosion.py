@@ -0,0 +1,57 @@
+from app.core import parallel_explosion
+from app.core.bom_graph import BOMEdge, BOMGraph, ProductInfo
+from app.core.explosion_cache import ExplosionCache, explode_per_unit
+from app.models.product import ProductType
+
+
+def _graph() -> BOMGraph:
+    # Dwie rodziny produktów końcowych (1, 2 i 3) ze wspólnym zespołem 11 oraz komponentem opcjonalnym
+    product_types = {1: ProductType.FINAL, 2: ProductType.FINAL, 3: ProductType.FINAL, 10: ProductType.COMPONENT,
+                     11: ProductType.COMPONENT, 12: ProductType.COMPONENT, 20: ProductType.MATERIAL,
+                     21: ProductType.MATERIAL, 22: ProductType.MATERIAL}
+    products = {
+        product_id: ProductInfo(product_id, f"P-{product_id}", "Produkt", product_type, "szt", 0.0, 0.0, 0)
+        for product_id, product_type in product_types.items()
+    }
+    children = {
+        1: [BOMEdge(10, 2.0, False), BOMEdge(22, 1.0, True)],
+        2: [BOMEdge(10, 1.0, False), BOMEdge(20, 3.0, False)],
+        3: [BOMEdge(12, 1.0, False)],
+        10: [BOMEdge(11, 2.0, False), BOMEdge(20, 1.0, False)],
+        11: [BOMEdge(21, 4.0, False)],
+        12: [BOMEdge(11, 1.0, False)],
+    }
+    return BOMGraph(
+        products=products,
+        bom_ids={product_id: 100 + product_id for product_id in children},
+        children=children,
+        bom_versions={100 + product_id: "1.0" for product_id in children},
+    )
+
+
+def test_chunk_graph_contains_only_chunk_structures():
+    graph = _graph()
+    chunk = parallel_explosion._chunk_graph(graph, [3])
+
+    assert set(chunk.products) == {3, 11, 12, 21}
+    assert set(chunk.bom_ids) == {3, 11, 12}
+    # Kody niskiego poziomu i klucze pamięci podręcznej zgodne z pełną migawką
+    assert all(chunk.low_level_codes()[product_id] == graph.low_level_codes()[product_id] for product_id in chunk.bom_ids)
+    sequential = ExplosionCache(max_size=10)
+    assert explode_per_unit(chunk, 3, ExplosionCache(max_size=10)) == explode_per_unit(graph, 3, sequential)
+
+
+def test_parallel_explosion_matches_sequential_and_reuses_pool():
+    graph = _graph()
+    sequential = ExplosionCache(max_size=10)
+    expected = {product_id: explode_per_unit(graph, product_id, sequential) for product_id in (1, 2, 3)}
+
+    try:
+        explosions = parallel_explosion.explode_units_parallel(graph, [1, 2, 3], ExplosionCache(max_size=10), workers=2)
+        pool = parallel_explosion.get_explosion_pool(2)
+        assert explosions == expected
+
+        parallel_explosion.explode_units_parallel(graph, [1, 2, 3], ExplosionCache(max_size=10), workers=2)
+        assert parallel_explosion.get_explosion_pool(2) is pool
+    finally:
+        parallel_explosion.shutdown_explosion_pool()
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.product import Product
+from app.models.user import User
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(email="admin@example.com", hashed_password="-", is_active=True, is_superuser=True))
+        db.commit()
+    try:
+        yield TestClient(app)
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+def _import(chunks) -> httpx.Response:
+    # Treść żądania przesyłana w kilku fragmentach (TestClient wysyła ją w całości)
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def post() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(
+                f"{settings.API_V1_STR}/products/import?format=csv", content=body(),
+                headers={"content-type": "text/csv"}
+            )
+
+    return asyncio.run(post())
+
+
+def test_file_error_mid_stream_reports_imported_chunks(client):
+    rows = "".join(f"P-{index},Produkt {index},material\n" for index in range(3))
+    response = _import([f"code,name,product_type\n{rows}".encode(), b"P-9,\xff\xfe,material\n"])
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["rows"], result["created"]) == (3, 3)
+    assert result["errors"][0]["row"] == 0
+    assert "UTF-8" in result["errors"][0]["errors"][0]
+    with SessionLocal() as db:
+        assert db.query(Product).count() == 3
+
+
+def test_file_rejected_before_first_row(client):
+    response = _import([b"name,product_type\nProdukt,material\n"])
+    assert response.status_code == 400
+
+
+def test_unsupported_delimiter(client):
+    response = client.post(
+        f"{settings.API_V1_STR}/products/import?format=csv&delimiter=%22", content=b"code\nP-1\n"
+    )
+    assert response.status_code == 422
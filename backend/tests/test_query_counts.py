@@ -0,0 +1,120 @@
+"""
+Liczba zapytań SQL endpointów list i szczegółów nie może zależeć od liczby zwracanych obiektów -
+inaczej relacje są ładowane osobno dla każdego obiektu (problem N+1).
+"""
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+from app.models.bom import BOM, BOMItem
+from app.models.material_requirement import MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, ProductType
+from app.models.user import User
+
+PAGE_SMALL = 2
+PAGE_LARGE = 40
+
+RESOURCES = ("products", "boms", "orders", "material-requirements")
+
+
+class QueryCounter:
+    """Licznik zapytań wykonanych przez silnik synchroniczny i asynchroniczny aplikacji."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __enter__(self) -> "QueryCounter":
+        for counted_engine in (engine, async_engine.sync_engine):
+            event.listen(counted_engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for counted_engine in (engine, async_engine.sync_engine):
+            event.remove(counted_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args) -> None:
+        self.count += 1
+
+    def measure(self, client: TestClient, url: str) -> int:
+        self.count = 0
+        response = client.get(f"{settings.API_V1_STR}{url}")
+        assert response.status_code == 200, f"{url}: {response.text}"
+        return self.count
+
+
+@pytest.fixture(scope="module")
+def requirements() -> Dict[str, int]:
+    """
+    Dane testowe w bazie aplikacji.
+
+    Returns:
+        ID zapotrzebowania z kilkoma pozycjami (small) i z wieloma pozycjami (large)
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(email="admin@example.com", hashed_password="-", is_active=True, is_superuser=True))
+
+    products = [
+        Product(code=f"P-{index:03d}", name=f"Produkt {index}", product_type=ProductType.COMPONENT)
+        for index in range(PAGE_LARGE)
+    ]
+    db.add_all(products)
+    db.flush()
+
+    start = datetime(2026, 1, 1)
+    orders = []
+    for index, product in enumerate(products):
+        bom = BOM(name=f"BOM {product.code}", product_id=product.id)
+        bom.items = [BOMItem(component_id=component.id, quantity=1) for component in products[index + 1:index + 4]]
+        order = Order(order_number=f"O-{index:03d}", status=OrderStatus.CONFIRMED, required_date=start)
+        order.items = [OrderItem(product_id=component.id, quantity=2) for component in products[index:index + 3]]
+        db.add_all([bom, order])
+        orders.append(order)
+    db.flush()
+
+    created = []
+    for index in range(PAGE_LARGE):
+        # Ostatnie zapotrzebowanie obejmuje wszystkie produkty i zamówienia
+        size = PAGE_LARGE if index == PAGE_LARGE - 1 else PAGE_SMALL
+        requirement = MaterialRequirement(
+            reference_number=f"MR-{index:03d}", planning_start_date=start,
+            planning_end_date=start + timedelta(days=30)
+        )
+        requirement.items = [
+            MaterialRequirementItem(product_id=product.id, required_quantity=1, quantity_to_procure=1)
+            for product in products[:size]
+        ]
+        requirement.source_orders = [MaterialRequirementOrder(order_id=order.id) for order in orders[:size]]
+        db.add(requirement)
+        created.append(requirement)
+    db.commit()
+    ids = {"small": created[0].id, "large": created[-1].id}
+    db.close()
+
+    yield ids
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_list_query_count_does_not_depend_on_page_size(requirements, resource):
+    client = TestClient(app)
+    with QueryCounter() as counter:
+        small = counter.measure(client, f"/{resource}/?limit={PAGE_SMALL}")
+        large = counter.measure(client, f"/{resource}/?limit={PAGE_LARGE}")
+    assert small == large
+
+
+def test_details_query_count_does_not_depend_on_item_count(requirements):
+    client = TestClient(app)
+    with QueryCounter() as counter:
+        small = counter.measure(client, f"/material-requirements/{requirements['small']}/details")
+        large = counter.measure(client, f"/material-requirements/{requirements['large']}/details")
+    assert small == large
@@ -0,0 +1,129 @@
+"""
+Plany zapytań (EXPLAIN) kluczowych ścieżek obliczeń MRP - każde zapytanie musi wyszukiwać
+wiersze w indeksie, a nie odczytywać całą tabelę ani cały indeks.
+
+Domyślnie sprawdzana jest tymczasowa baza SQLite (EXPLAIN QUERY PLAN). Zmienna środowiskowa
+QUERY_PLANS_DATABASE_URL wskazuje inną bazę, np. PostgreSQL (EXPLAIN FORMAT JSON) - skanowanie
+sekwencyjne jest wtedy wyłączane, aby na małych tabelach planista nie wybierał go mimo
+dostępnego indeksu.
+"""
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import create_engine, select, tuple_
+from sqlalchemy.engine import Connection
+
+from app.core.product_search import product_search_statement
+from app.db.base import Base
+from app.models.bom import BOM, BOMItem
+from app.models.inventory import InventoryBalance, InventoryTransaction
+from app.models.material_requirement import (
+    MaterialRequirement, MaterialRequirementItem, MaterialRequirementOrder, MaterialRequirementPegging
+)
+from app.models.order import Order, OrderItem, OrderStatus, OrderType
+
+# Typy węzłów planu PostgreSQL odczytujące indeks - bez warunku indeksu jest to pełny skan indeksu
+POSTGRESQL_INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def hot_path_queries(dialect_name: str) -> List[Tuple[str, Any]]:
+    """Zapytania obliczeń MRP, które muszą korzystać z indeksów."""
+    return [
+        ("Aktywna lista BOM produktu",
+         select(BOM.id).where(BOM.product_id == 1, BOM.is_active == True)),
+        ("Elementy listy BOM",
+         select(BOMItem.component_id, BOMItem.quantity, BOMItem.is_optional).where(BOMItem.bom_id == 1)),
+        ("Zastosowania komponentu",
+         select(BOMItem.bom_id).where(BOMItem.component_id == 1)),
+        ("Pozycje zamówień",
+         select(OrderItem.id, OrderItem.product_id, OrderItem.quantity).where(OrderItem.order_id.in_([1, 2]))),
+        ("Zamówienia z produktem",
+         select(OrderItem.order_id).where(OrderItem.product_id == 1)),
+        ("Zamówienia źródłowe zapotrzebowania",
+         select(MaterialRequirementOrder.order_id).where(MaterialRequirementOrder.material_requirement_id == 1)),
+        ("Pozycje zapotrzebowania",
+         select(MaterialRequirementItem.id).where(MaterialRequirementItem.material_requirement_id == 1)),
+        ("Pozycje zapotrzebowania dla produktów (net-change)",
+         select(MaterialRequirementItem.id).where(
+             MaterialRequirementItem.material_requirement_id == 1,
+             MaterialRequirementItem.product_id.in_([1, 2])
+         )),
+        ("Pegging pozycji zapotrzebowania",
+         select(MaterialRequirementPegging.id).where(MaterialRequirementPegging.material_requirement_item_id == 1)),
+        ("Pegging zamówienia",
+         select(MaterialRequirementPegging.id).where(MaterialRequirementPegging.order_id == 1)),
+        ("Strona listy zamówień (kursor)",
+         select(Order.id).where(tuple_(Order.order_date, Order.id) > (datetime(2026, 1, 1), 1))
+         .order_by(Order.order_date, Order.id).limit(100)),
+        ("Strona listy zapotrzebowań (kursor)",
+         select(MaterialRequirement.id).where(
+             tuple_(MaterialRequirement.creation_date, MaterialRequirement.id) > (datetime(2026, 1, 1), 1)
+         ).order_by(MaterialRequirement.creation_date, MaterialRequirement.id).limit(100)),
+        ("Saldo magazynowe produktów",
+         select(InventoryBalance.on_hand).where(InventoryBalance.product_id.in_([1, 2]))),
+        ("Przyjęcia planowane (otwarte zamówienia zakupu)",
+         select(Order.id).where(
+             Order.order_type == OrderType.PURCHASE,
+             Order.status.in_([OrderStatus.SUBMITTED, OrderStatus.CONFIRMED])
+         )),
+        ("Wyszukiwanie produktów po początku kodu",
+         product_search_statement(dialect_name, "ko")),
+        ("Ruchy magazynowe produktu",
+         select(InventoryTransaction.id).where(InventoryTransaction.product_id == 1)
+         .order_by(InventoryTransaction.id).limit(100)),
+    ]
+
+
+def full_scans(connection: Connection, statement: Any) -> List[str]:
+    """
+    Zwraca opisy kroków planu, które odczytują całą tabelę lub cały indeks.
+    """
+    # Stałe wartości parametrów są wstawiane bezpośrednio do zapytania (także listy IN)
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        # Tylko "SEARCH ... USING ... INDEX" wyszukuje wiersze w indeksie - "SCAN tabela" przegląda
+        # całą tabelę, a "SCAN ... USING (COVERING) INDEX" cały indeks
+        return [row[-1] for row in rows if row[-1].startswith("SCAN") and row[-1] != "SCAN CONSTANT ROW"]
+
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = []
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node: Dict[str, Any] = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                scans.append(f"Seq Scan on {node['Relation Name']}")
+            elif node["Node Type"] in POSTGRESQL_INDEX_SCANS and "Index Cond" not in node:
+                scans.append(f"{node['Node Type']} using {node['Index Name']} bez warunku indeksu")
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    raise ValueError(f"Nieobsługiwana baza danych: {connection.dialect.name}")
+
+
+@pytest.fixture(scope="module")
+def connection(tmp_path_factory):
+    database_url = os.environ.get("QUERY_PLANS_DATABASE_URL") or (
+        f"sqlite:///{tmp_path_factory.mktemp('query-plans') / 'mrp.sqlite'}"
+    )
+    engine = create_engine(database_url)
+    # Brakujące tabele i indeksy z modeli
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET enable_seqscan = off")
+        yield connection
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", [name for name, _ in hot_path_queries("sqlite")])
+def test_hot_path_query_uses_index(connection, name):
+    statement = dict(hot_path_queries(connection.dialect.name))[name]
+    assert full_scans(connection, statement) == []
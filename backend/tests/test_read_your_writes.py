@@ -0,0 +1,56 @@
+import pytest
+from starlette.requests import Request
+
+from app.api.deps import reads_from_primary
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.read_your_writes import open_read_primary_windows, window_keys
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # Sesje odczytu pozostają związane z bazą główną - sprawdzany jest tylko wybór bazy
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", "sqlite://")
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+def _request(user_id=None, material_requirement_id=None) -> Request:
+    headers = []
+    if user_id is not None:
+        token = create_access_token({"sub": str(user_id)})
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    path_params = {"material_requirement_id": material_requirement_id} if material_requirement_id else {}
+    return Request({"type": "http", "method": "GET", "headers": headers, "path_params": path_params})
+
+
+def _open_windows(keys) -> None:
+    with SessionLocal() as db:
+        open_read_primary_windows(db, keys)
+        db.commit()
+
+
+def test_user_window_covers_clients_without_cookies(replica):
+    assert not reads_from_primary(_request(user_id=7))
+    _open_windows(window_keys(7))
+    assert reads_from_primary(_request(user_id=7))
+    assert not reads_from_primary(_request(user_id=8))
+    assert not reads_from_primary(_request())
+
+
+def test_material_requirement_window_covers_all_readers(replica):
+    _open_windows(window_keys(material_requirement_ids=[3]))
+    assert reads_from_primary(_request(material_requirement_id=3))
+    assert reads_from_primary(_request(user_id=8, material_requirement_id=3))
+    assert not reads_from_primary(_request(material_requirement_id=4))
+
+
+def test_expired_window_reads_from_replica(replica, monkeypatch):
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", -1)
+    _open_windows(window_keys(7, [3]))
+    assert not reads_from_primary(_request(user_id=7, material_requirement_id=3))
@@ -29,6 +29,7 @@ const MaterialRequirements = () => {
     consider_min_stock: true,
     planning_start_date: new Date(),
     planning_end_date: new Date(new Date().setMonth(new Date().getMonth() + 3)),
+    planning_bucket: 'none',
     source_orders: [],
     notes: ''
   });
@@ -85,6 +86,7 @@ const MaterialRequirements = () => {
         consider_min_stock: requirement.consider_min_stock,
         planning_start_date: new Date(requirement.planning_start_date),
         planning_end_date: requirement.planning_end_date ? new Date(requirement.planning_end_date) : null,
+        planning_bucket: requirement.planning_bucket || 'none',
         source_orders: requirement.source_orders.map(o => o.order_id),
         notes: requirement.notes || ''
       });
@@ -97,6 +99,7 @@ const MaterialRequirements = () => {
         consider_min_stock: true,
         planning_start_date: new Date(),
         planning_end_date: new Date(new Date().setMonth(new Date().getMonth() + 3)),
+        planning_bucket: 'none',
         source_orders: [],
         notes: ''
       });
@@ -130,20 +133,39 @@ const MaterialRequirements = () => {
     setRequirementDetails(null);
   };
 
+  const waitForCalculationJob = async (jobId) => {
+    // Obliczenia wykonywane są w tle - odpytuj stan zadania do jego zakończenia
+    while (true) {
+      const response = await axios.get(`${API_URL}/material-requirements/jobs/${jobId}`, {
+        headers: { Authorization: `Bearer ${currentUser.token}` }
+      });
+      const job = response.data;
+      if (job.status === 'completed') {
+        return job;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Błąd obliczania zapotrzebowania');
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+  };
+
   const handleCalculate = async (id) => {
     setCalculating(true);
     setCalculationError('');
     try {
-      await axios.post(`${API_URL}/material-requirements/${id}/calculate`, {}, {
+      const response = await axios.post(`${API_URL}/material-requirements/${id}/calculate`, {}, {
         headers: { Authorization: `Bearer ${currentUser.token}` }
       });
       await loadMaterialRequirements();
+      await waitForCalculationJob(response.data.id);
+      await loadMaterialRequirements();
       if (showDetailsModal && requirementDetails) {
         await loadRequirementDetails(id);
       }
     } catch (err) {
       console.error('Error calculating material requirement:', err);
-      setCalculationError(err.response?.data?.detail || 'Błąd obliczania zapotrzebowania');
+      setCalculationError(err.response?.data?.detail || err.message || 'Błąd obliczania zapotrzebowania');
     } finally {
       setCalculating(false);
     }
@@ -234,6 +256,10 @@ const MaterialRequirements = () => {
     switch (status) {
       case 'draft':
         return <Badge bg="secondary">Projekt</Badge>;
+      case 'queued':
+        return <Badge bg="warning" text="dark">W kolejce</Badge>;
+      case 'calculating':
+        return <Badge bg="warning" text="dark">Obliczanie</Badge>;
       case 'calculated':
         return <Badge bg="info">Obliczone</Badge>;
       case 'processing':
@@ -414,6 +440,19 @@ const MaterialRequirements = () => {
               </Col>
             </Row>
 
+            <Form.Group className="mb-3">
+              <Form.Label>Okresy planowania</Form.Label>
+              <Form.Select
+                name="planning_bucket"
+                value={formData.planning_bucket}
+                onChange={handleInputChange}
+              >
+                <option value="none">Brak (jedna pozycja na produkt)</option>
+                <option value="day">Dzienne</option>
+                <option value="week">Tygodniowe</option>
+              </Form.Select>
+            </Form.Group>
+
             <Row>
               <Col md={6}>
                 <Form.Group className="mb-3">